@@ -0,0 +1,285 @@
+"""
+Effort reports of the task list: estimated against spent hours.
+
+The tasks are copied once into a typed columnar pandas frame, with categorical
+category, assigner and status columns, numeric hours and datetime dates. The
+aggregates per category, per assigner and per week are vectorized groupby over
+that frame. Both the frame and the reports are kept until the store reports a
+change, so opening the reports again costs nothing. The archived tasks, see
+archive.py, are only read when the reports include them.
+"""
+# pandas is imported where it is used, it takes most of the startup time
+from archive import TaskArchive
+from perf import span
+from task import Task
+from typing import TYPE_CHECKING, Iterable, List, NamedTuple, Optional, Tuple
+import threading
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+CATEGORICAL_FIELDS = ("category", "assigner", "status")
+HOUR_FIELDS = ("estimated_hours", "spent_hours")
+DATE_FIELDS = ("do_date", "deadline")
+DONE_STATUS = "DONE"
+# Percentiles of the overrun of the done tasks
+OVERRUN_PERCENTILES = (0.5, 0.9)
+# Weeks start on Monday, by the do date of the task
+WEEK_PERIOD = "W-SUN"
+
+class EffortReport(NamedTuple):
+    """Aggregates of the task list, one row per group."""
+    by_category: "pd.DataFrame"
+    by_assigner: "pd.DataFrame"
+    by_week: "pd.DataFrame"
+    tasks: int
+    # Done tasks with an estimate and spent hours, the ones the accuracy is measured on
+    measured: int
+    # Archived tasks among the tasks
+    archived: int = 0
+
+def build_frame(tasks: Iterable[Task]) -> "pd.DataFrame":
+    """
+    Copy the task records into a typed columnar frame.
+
+    Args:
+        tasks (Iterable[Task]): The task records.
+
+    Returns:
+        pd.DataFrame: One row per task, with categorical category, assigner and status,
+        float hours (NaN when empty or not a number) and datetime dates (NaT when empty).
+    """
+    import pandas as pd
+
+    tasks = list(tasks)
+    columns = {}
+    for field in CATEGORICAL_FIELDS:
+        columns[field] = pd.Categorical([getattr(task_item, field) or "" for task_item in tasks])
+    for field in HOUR_FIELDS:
+        values = pd.Series([getattr(task_item, field) for task_item in tasks], dtype=object)
+        columns[field] = pd.to_numeric(values, errors="coerce").astype("float64")
+    for field in DATE_FIELDS:
+        values = pd.Series([getattr(task_item, field) for task_item in tasks], dtype="string")
+        columns[field] = pd.to_datetime(values.str.slice(0, 10), format="%Y-%m-%d", errors="coerce")
+    return pd.DataFrame(columns)
+
+def combine_frames(*frames: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    Concatenate frames of build_frame, e.g. of the tasks and of the archived tasks.
+
+    Args:
+        *frames (pd.DataFrame): The frames.
+
+    Returns:
+        pd.DataFrame: One frame, with the categorical columns over the categories of all of them.
+    """
+    import pandas as pd
+    frame = pd.concat(frames, ignore_index=True)
+    for field in CATEGORICAL_FIELDS:
+        # Categoricals with different categories are concatenated as plain objects
+        frame[field] = frame[field].astype("category")
+    return frame
+
+def _measured(frame: "pd.DataFrame") -> "pd.DataFrame":
+    # The hours of the done tasks with an estimate and spent hours, NaN for the others
+    done = frame["status"] == DONE_STATUS
+    measured = done & (frame["estimated_hours"] > 0) & frame["spent_hours"].notna()
+    estimated = frame["estimated_hours"].where(measured)
+    spent = frame["spent_hours"].where(measured)
+    return frame.assign(done=done,
+                        measured_estimate=estimated,
+                        measured_spent=spent,
+                        overrun=(spent - estimated) / estimated * 100)
+
+def summarize(frame: "pd.DataFrame", by: str, weeks: int = 1) -> "pd.DataFrame":
+    """
+    Aggregate the effort of the tasks by a column of the frame.
+
+    Args:
+        frame (pd.DataFrame): The frame of build_frame.
+        by (str): The column to group by, e.g. "category", or "week" for the week of the do date.
+        weeks (int): Number of weeks the tasks span, for the done tasks per week.
+
+    Returns:
+        pd.DataFrame: One row per group with the number of tasks, the total estimated and
+        spent hours, the number of done tasks and done tasks per week, the estimate
+        accuracy (estimated over spent hours of the done tasks, below 1 when they took
+        longer than estimated) and the percentiles of their overrun in percent.
+    """
+    import pandas as pd
+
+    work = _measured(frame)
+    if by == "week":
+        work["week"] = work["do_date"].dt.to_period(WEEK_PERIOD).dt.start_time
+    grouped = work.groupby(by, observed=True, sort=True)
+    summary = grouped.agg(tasks=("status", "size"),
+                          estimated=("estimated_hours", "sum"),
+                          spent=("spent_hours", "sum"),
+                          done=("done", "sum"),
+                          measured_estimate=("measured_estimate", "sum"),
+                          measured_spent=("measured_spent", "sum"))
+    summary["done_per_week"] = summary["done"] / max(weeks, 1)
+    summary["accuracy"] = summary["measured_estimate"] / summary["measured_spent"].where(summary["measured_spent"] > 0)
+    overrun = grouped["overrun"].quantile(list(OVERRUN_PERCENTILES))
+    overrun = overrun.unstack() if len(overrun) else pd.DataFrame(index=summary.index)
+    overrun = overrun.reindex(index=summary.index, columns=list(OVERRUN_PERCENTILES))
+    for fraction in OVERRUN_PERCENTILES:
+        summary[f"overrun_p{round(fraction * 100)}"] = overrun[fraction]
+    return summary.drop(columns=["measured_estimate", "measured_spent"])
+
+def span_weeks(frame: "pd.DataFrame") -> int:
+    """Return the number of weeks between the first and last do dates, at least 1."""
+    dates = frame["do_date"].dropna()
+    if dates.empty:
+        return 1
+    return (dates.max() - dates.min()).days // 7 + 1
+
+def build_report(frame: "pd.DataFrame") -> EffortReport:
+    """
+    Compute every aggregate of the reports.
+
+    Args:
+        frame (pd.DataFrame): The frame of build_frame.
+
+    Returns:
+        EffortReport: The aggregates per category, per assigner and per week.
+    """
+    weeks = span_weeks(frame)
+    measured = _measured(frame)["measured_spent"].notna()
+    return EffortReport(by_category=summarize(frame, "category", weeks),
+                        by_assigner=summarize(frame, "assigner", weeks),
+                        by_week=summarize(frame, "week"),
+                        tasks=len(frame),
+                        measured=int(measured.sum()))
+
+class TaskAnalytics:
+    """
+    Effort reports of a task store, computed on demand and cached until the tasks change.
+
+    Once attached to a task store, every add, edit, delete and reload bumps the data
+    version through the store listeners; the frame and the reports are rebuilt on the
+    next request after a change only. With include_archive the archived tasks are part
+    of the reports too; they are only read then, and again only once the archive changed.
+    """
+
+    def __init__(self, tasks: Iterable[Task] = ()):
+        """
+        Report on a task list.
+
+        Args:
+            tasks (Iterable[Task]): The task records, replaced by the ones of the store once attached.
+        """
+        self.store = None
+        self.archive: Optional[TaskArchive] = None
+        self.include_archive = False
+        self._tasks: List[Task] = list(tasks)
+        self._lock = threading.Lock()
+        self.version = 0
+        self._frame: Optional["pd.DataFrame"] = None
+        self._archive_frame: Optional["pd.DataFrame"] = None
+        self._report: Optional[EffortReport] = None
+        # Data keys the frames and the report were computed from, see dataKey
+        self._frame_version = -1
+        self._archive_key = None
+        self._report_key = None
+
+    def attachStore(self, store, archive: Optional[TaskArchive] = None):
+        """
+        Report on the tasks of a store and follow its changes.
+
+        Args:
+            store (TaskStore or SqliteTaskStore): The task store.
+            archive (Optional[TaskArchive]): The archive of the store, for include_archive.
+        """
+        if self.store is not None:
+            self.store.removeListener(self.onTaskChanged)
+        self.store = store
+        self.archive = archive
+        store.addListener(self.onTaskChanged)
+        self.onTaskChanged("reload", None)
+
+    def onTaskChanged(self, op: str, task_item: Optional[Task]):
+        """
+        Invalidate the cached frame and reports after a change of the task list.
+
+        Args:
+            op (str): The operation, "add", "edit", "delete" or "reload".
+            task_item (Optional[Task]): The task record, None for "reload".
+        """
+        with self._lock:
+            self.version += 1
+
+    def dataKey(self) -> Tuple:
+        """
+        Return what the reports are computed from, which changes with the data.
+
+        Returns:
+            Tuple: The data version of the tasks, and the fingerprint of the archive when included.
+        """
+        if self.include_archive and self.archive is not None:
+            return (self.version, self.archive.fingerprint())
+        return (self.version, None)
+
+    def frame(self) -> "pd.DataFrame":
+        """
+        Return the frame of the tasks, rebuilt only if they changed since the last call.
+
+        Returns:
+            pd.DataFrame: The frame of build_frame.
+        """
+        with self._lock:
+            version = self.version
+            frame = self._frame if self._frame_version == version else None
+        if frame is None:
+            tasks = list(self.store.tasks) if self.store is not None else self._tasks
+            with span("analytics.frame", rows=len(tasks)):
+                frame = build_frame(tasks)
+            with self._lock:
+                self._frame, self._frame_version = frame, version
+        return frame
+
+    def archiveFrame(self, key: Tuple) -> Optional["pd.DataFrame"]:
+        """
+        Return the frame of the archived tasks, read again only if the archive changed.
+
+        Args:
+            key (Tuple): The fingerprint of the archive, from TaskArchive.fingerprint.
+
+        Returns:
+            Optional["pd.DataFrame"]: The frame of build_frame, None without archive.
+        """
+        if self.archive is None:
+            return None
+        with self._lock:
+            if self._archive_frame is not None and self._archive_key == key:
+                return self._archive_frame
+        tasks = self.archive.tasks()
+        with span("analytics.frame", rows=len(tasks), archive=True):
+            frame = build_frame(tasks)
+        with self._lock:
+            self._archive_frame, self._archive_key = frame, key
+        return frame
+
+    def report(self) -> EffortReport:
+        """
+        Return the effort reports, recomputed only if the tasks changed since the last call.
+
+        Returns:
+            EffortReport: The aggregates per category, per assigner and per week.
+        """
+        key = self.dataKey()
+        with self._lock:
+            if self._report is not None and self._report_key == key:
+                return self._report
+        frame = self.frame()
+        archived = 0
+        if key[1] is not None:
+            archive_frame = self.archiveFrame(key[1])
+            if archive_frame is not None and len(archive_frame):
+                archived = len(archive_frame)
+                frame = combine_frames(frame, archive_frame)
+        with span("analytics.report", rows=len(frame)):
+            report = build_report(frame)._replace(archived=archived)
+        with self._lock:
+            self._report, self._report_key = report, key
+        return report
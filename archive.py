@@ -0,0 +1,348 @@
+"""
+Archive of the closed tasks, to keep the database small as the history grows.
+
+DONE and CANCELED tasks dated more than a number of days ago are moved out of the
+database into one archive workbook per month, in a folder next to the database
+(Test_archive/2024-09.xlsx for Test.xlsx). The archives keep the header, column widths
+and cell formatting of the database, so they read like it in Excel. The tasks are
+written to the archives before they are deleted from the database, and a task already
+in its archive is not written again, so an archive run interrupted at any point can
+simply be run again.
+
+Run `python archive.py --days 90` to archive the database of the settings without the
+GUI. The archived tasks are only read when asked for, with TaskArchive.
+"""
+from changes import file_fingerprint
+from copy import copy
+from datetime import date, timedelta
+from journal import save_workbook_atomic
+from perf import span
+from store import TaskStore, read_database, read_next_id, save_next_id
+from task import Task, id_column, last_data_row, parse_task_id
+from task_index import CLOSED_STATUS, parse_date
+from typing import Dict, Iterable, List, Optional, Tuple
+import argparse
+import os
+import re
+import sys
+import threading
+
+ARCHIVE_SUFFIX = "_archive"
+# Closed tasks older than this many days are archived by default
+ARCHIVE_DAYS = 90
+_MONTH_FILE_RE = re.compile(r"^(\d{4}-\d{2})\.xlsx$")
+
+def archive_dir(path: str) -> str:
+    """
+    Return the folder of the archives of a database.
+
+    Args:
+        path (str): Path of the Excel database.
+
+    Returns:
+        str: The folder next to the database.
+    """
+    return os.path.splitext(path)[0] + ARCHIVE_SUFFIX
+
+def archive_path(path: str, month: str) -> str:
+    """
+    Return the archive workbook of a month.
+
+    Args:
+        path (str): Path of the Excel database.
+        month (str): The month, "YYYY-MM".
+
+    Returns:
+        str: Path of the archive workbook.
+    """
+    return os.path.join(archive_dir(path), f"{month}.xlsx")
+
+def archivable_tasks(tasks: Iterable[Task], days: int = ARCHIVE_DAYS,
+                     today: Optional[date] = None) -> Dict[str, List[Task]]:
+    """
+    Select the closed tasks dated more than a number of days ago.
+
+    Args:
+        tasks (Iterable[Task]): The task records.
+        days (int): Age in days of the tasks to archive.
+        today (Optional[date]): The current day, date.today() by default.
+
+    Returns:
+        Dict[str, List[Task]]: The tasks to archive by month.
+    """
+    last_day = (today or date.today()) - timedelta(days=days)
+    months: Dict[str, List[Task]] = {}
+    for task_item in tasks:
+        if task_item.status not in CLOSED_STATUS:
+            continue
+        day = parse_date(task_item.do_date) or parse_date(task_item.deadline)
+        if day is not None and day < last_day:
+            months.setdefault(f"{day:%Y-%m}", []).append(task_item)
+    return months
+
+class StyleCopier:
+    """
+    Copy cell formatting from a worksheet to a worksheet of another workbook.
+
+    The style-id arrays of openpyxl index the style tables of their own workbook, so
+    every distinct style is rebuilt once in the target workbook and its new style-id
+    array reused for the following cells.
+    """
+
+    def __init__(self):
+        self._styles: Dict[Tuple[int, ...], object] = {}
+
+    def copy(self, source, target):
+        """
+        Copy the value and formatting of a cell.
+
+        Args:
+            source (Cell): The cell of the database.
+            target (Cell): The cell of the archive.
+        """
+        target.value = source.value
+        if not source.has_style:
+            return
+        key = tuple(source._style)
+        style = self._styles.get(key)
+        if style is None:
+            target.font = copy(source.font)
+            target.fill = copy(source.fill)
+            target.border = copy(source.border)
+            target.alignment = copy(source.alignment)
+            target.protection = copy(source.protection)
+            target.number_format = source.number_format
+            self._styles[key] = copy(target._style)
+        else:
+            target._style = copy(style)
+
+def new_archive_workbook(ws, styles: StyleCopier):
+    """
+    Create an archive workbook with the header and the column widths of the database.
+
+    Args:
+        ws (Worksheet): The worksheet of the database.
+        styles (StyleCopier): Style copier of the archive workbook.
+
+    Returns:
+        Workbook: The new workbook, holding the header row only.
+    """
+    from openpyxl import Workbook
+    wb = Workbook()
+    archive_ws = wb.active
+    archive_ws.title = ws.title
+    for cell in next(ws.iter_rows(min_row=1, max_row=1)):
+        styles.copy(cell, archive_ws.cell(row=1, column=cell.column))
+    for key, dimension in ws.column_dimensions.items():
+        if dimension.width:
+            archive_ws.column_dimensions[key].width = dimension.width
+    if ws.row_dimensions[1].height:
+        archive_ws.row_dimensions[1].height = ws.row_dimensions[1].height
+    archive_ws.freeze_panes = ws.freeze_panes
+    return wb
+
+def append_archive_rows(path: str, ws, rows: List[Tuple]) -> int:
+    """
+    Append rows of the database to an archive workbook, creating it if needed.
+
+    Rows already in the archive with the same values are skipped, they were written
+    by an archive run interrupted before the database was saved.
+
+    Args:
+        path (str): Path of the archive workbook.
+        ws (Worksheet): The worksheet of the database.
+        rows (List[Tuple]): The cells of every row to archive.
+
+    Returns:
+        int: Number of rows written.
+    """
+    from openpyxl import load_workbook
+    if not rows:
+        return 0
+    styles = StyleCopier()
+    try:
+        if os.path.exists(path):
+            wb = load_workbook(path)
+        else:
+            wb = new_archive_workbook(ws, styles)
+        archive_ws = wb.active
+        width = max(len(cells) for cells in rows)
+        archived = set(archive_ws.iter_rows(min_row=2, max_col=width, values_only=True))
+        row_num = last_data_row(archive_ws)
+        written = 0
+        for cells in rows:
+            values = tuple(cell.value for cell in cells) + (None,) * (width - len(cells))
+            if values in archived:
+                continue
+            row_num += 1
+            for cell in cells:
+                styles.copy(cell, archive_ws.cell(row=row_num, column=cell.column))
+            height = ws.row_dimensions[cells[0].row].height
+            if height:
+                archive_ws.row_dimensions[row_num].height = height
+            written += 1
+        if written:
+            save_workbook_atomic(wb, path)
+        return written
+    except Exception as e:
+        raise RuntimeError(f"Failed to write the archive {path}: {e}")
+
+def archive_tasks(store, days: int = ARCHIVE_DAYS, today: Optional[date] = None,
+                  dry_run: bool = False) -> Dict[str, List[Task]]:
+    """
+    Move the closed tasks dated more than a number of days ago to the monthly archives.
+
+    The pending changes are flushed first, the rows of the archived tasks are then
+    copied from the workbook of the store with their formatting to the archive of
+    their month, and only once every archive is saved are the tasks deleted from the
+    store, with a single save of the database. The listeners of the store are called
+    once with "reload".
+
+    Args:
+        store (TaskStore): The task store of the Excel database.
+        days (int): Age in days of the tasks to archive.
+        today (Optional[date]): The current day, date.today() by default.
+        dry_run (bool): Only select the tasks, nothing is written, not even the pending changes.
+
+    Returns:
+        Dict[str, List[Task]]: The archived tasks by month.
+    """
+    if not isinstance(store, TaskStore):
+        raise ValueError("Archiving needs the excel storage backend")
+    if dry_run:
+        return archivable_tasks(store.tasks, days, today)
+    store.flush()
+    months = archivable_tasks(store.tasks, days, today)
+    if not months:
+        return months
+    with span("archive.run", path=store.path) as timing:
+        archived_ids = {task_item.id for tasks in months.values() for task_item in tasks}
+        try:
+            # Read from the workbook of the store, which is loaded once for this and the flush
+            ws = store.worksheet()
+        except Exception as e:
+            raise RuntimeError(f"Failed to load data from {store.path}: {e}")
+        id_col = id_column(ws)
+        if id_col is None:
+            raise RuntimeError(f"Failed to archive tasks: no ID column in {store.path}")
+        rows: Dict[int, Tuple] = {}
+        for cells in ws.iter_rows(min_row=2):
+            task_id = parse_task_id(cells[id_col - 1].value) if id_col <= len(cells) else None
+            if task_id in archived_ids:
+                rows[task_id] = cells
+        os.makedirs(archive_dir(store.path), exist_ok=True)
+        for month, tasks in sorted(months.items()):
+            append_archive_rows(archive_path(store.path, month), ws,
+                                [rows[task_item.id] for task_item in tasks if task_item.id in rows])
+        # The IDs of the archived tasks are never given again
+        save_next_id(store.path, max(read_next_id(store.path), max(archived_ids) + 1))
+        store.deleteMany(archived_ids)
+        store.flush()
+        timing.set(rows=len(archived_ids), months=len(months))
+    return months
+
+class TaskArchive:
+    """
+    Lazy read access to the archived tasks of a database.
+
+    Nothing is read until the tasks are asked for. The archive workbooks are then read
+    with the native xlsx reader and kept together with their file fingerprints, so the
+    next calls only read again the months archived since.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open the archive of a database.
+
+        Args:
+            path (str): Path of the Excel database.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # Fingerprint and tasks of every archive workbook read so far
+        self._months: Dict[str, Tuple[Optional[Tuple[int, int]], List[Task]]] = {}
+
+    def months(self) -> List[str]:
+        """Return the archived months, "YYYY-MM", oldest first."""
+        try:
+            names = os.listdir(archive_dir(self.path))
+        except OSError:
+            return []
+        return sorted(match.group(1) for match in map(_MONTH_FILE_RE.match, names) if match)
+
+    def fingerprint(self) -> Tuple:
+        """Return the fingerprints of the archive workbooks, which change with their content."""
+        return tuple((month, file_fingerprint(archive_path(self.path, month))) for month in self.months())
+
+    def tasks(self) -> List[Task]:
+        """
+        Return the archived tasks, reading only the workbooks changed since the last call.
+
+        Returns:
+            List[Task]: The task records of every month, oldest month first.
+        """
+        tasks = []
+        with self._lock:
+            months = {}
+            for month, fingerprint in self.fingerprint():
+                cached = self._months.get(month)
+                if cached is None or cached[0] != fingerprint:
+                    path = archive_path(self.path, month)
+                    with span("archive.read", path=path) as timing:
+                        rows, _ = read_database(path)
+                        cached = (fingerprint, [Task.from_dict(task_item) for _, task_item in rows])
+                        timing.set(rows=len(cached[1]))
+                months[month] = cached
+                tasks.extend(cached[1])
+            self._months = months
+        return tasks
+
+def read_tasks(path: str) -> List[Task]:
+    """
+    Read the tasks of a database without opening a task store, which writes the IDs and the cache.
+
+    Args:
+        path (str): Path of the Excel database.
+
+    Returns:
+        List[Task]: The task records, without the changes still in the journal.
+    """
+    rows, _ = read_database(path)
+    return [Task.from_dict(task_item) for _, task_item in rows]
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from config import CONFIG_DATA, TASK_DATA_PATH, load_environment
+    parser = argparse.ArgumentParser(description="Move the old closed tasks to monthly archive workbooks")
+    parser.add_argument("--days", type=int, help="Age in days of the tasks to archive, the one of the settings by default")
+    parser.add_argument("--settings", default=TASK_DATA_PATH, help="Data file of the application settings")
+    parser.add_argument("--database", help="Excel database, the one of the settings by default")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the tasks to archive")
+    args = parser.parse_args(argv)
+
+    load_environment(args.settings)
+    database = args.database or CONFIG_DATA["database"]
+    days = args.days if args.days is not None else CONFIG_DATA["archive_days"] or ARCHIVE_DAYS
+    if not os.path.exists(database):
+        parser.error(f"No such database: {database}")
+
+    try:
+        if args.dry_run:
+            # The database is only read, nothing is flushed
+            months = archivable_tasks(read_tasks(database), days)
+        else:
+            store = TaskStore(database, flush_changes=0, flush_interval=None)
+            try:
+                months = archive_tasks(store, days)
+            finally:
+                store.close()
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    verb = "Would archive" if args.dry_run else "Archived"
+    for month, tasks in sorted(months.items()):
+        print(f"{verb} {len(tasks)} tasks of {month} to {archive_path(database, month)}")
+    print(f"{verb} {sum(len(tasks) for tasks in months.values())} closed tasks older than {days} days")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+Benchmark suite of the task database and the pages, with machine readable results.
+
+Run `python bench_suite.py --sizes 1000 10000 --output results.json` to time, on
+synthetic databases of workload.py, the one-shot database functions of task.py,
+the task store, the Today filter and the task name search. The pages are built on
+the offscreen Qt platform, so the suite runs headless. Every timing is written to the
+JSON file with the version it was measured on; pass a previous file with --compare to
+print how every timing changed.
+"""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from datetime import date
+from store import TaskStore
+from task import add_new_task_item, delete_task_item, edit_task_item, load_task_list
+from task_index import TaskIndex
+from typing import Callable, Dict, List, NamedTuple, Optional
+from workload import Workload, write_workbook
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+SIZES = [1000, 10000]
+REPEAT = 5
+# Above this many rows the functions loading and saving the whole workbook run once
+FULL_SAVE_LIMIT = 100000
+SEARCH_QUERIES = ["rev", "budget meet", "report 12", "ustom", "deploy 4", "reveiw", "budgte meting", "zzz"]
+
+class Timing(NamedTuple):
+    """Wall times in seconds of the runs of a benchmark case."""
+    name: str
+    rows: int
+    times: List[float]
+
+    def toDict(self) -> Dict:
+        ordered = sorted(self.times)
+        return {
+            "name": self.name,
+            "rows": self.rows,
+            "runs": len(ordered),
+            "best": ordered[0],
+            "median": statistics.median(ordered),
+            "p95": ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))],
+            "mean": statistics.fmean(ordered),
+        }
+
+def measure(func: Callable[[], object], repeat: int = REPEAT,
+            setup: Optional[Callable[[], object]] = None) -> List[float]:
+    """
+    Time several runs of a function.
+
+    Args:
+        func (Callable[[], object]): The timed function.
+        repeat (int): Number of runs.
+        setup (Optional[Callable[[], object]]): Called untimed before every run.
+
+    Returns:
+        List[float]: Wall time in seconds of every run.
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+def bench_database(path: str, rows: int, repeat: int) -> List[Timing]:
+    """Time the task.py functions, each loading and saving the whole workbook."""
+    work_path = os.path.join(os.path.dirname(path), "functions.xlsx")
+    shutil.copy(path, work_path)
+    task_item = load_task_list(path)[0]
+    repeat = repeat if rows <= FULL_SAVE_LIMIT else 1
+    timings = [Timing("load_task_list", rows, measure(lambda: load_task_list(path), repeat))]
+    timings.append(Timing("add_new_task_item", rows, measure(lambda: add_new_task_item(work_path, task_item), repeat)))
+    timings.append(Timing("edit_task_item", rows, measure(
+        lambda: edit_task_item(work_path, rows // 2, {"status": "IN PROGRESS", "spent_hours": 1}), repeat)))
+    timings.append(Timing("delete_task_item", rows, measure(lambda: delete_task_item(work_path, rows // 2), repeat)))
+    return timings
+
+def bench_store(path: str, rows: int, repeat: int) -> List[Timing]:
+    """Time the task store: opening with and without the parse cache, and saving a change."""
+    store_path = os.path.join(os.path.dirname(path), "store.xlsx")
+
+    def fresh_copy():
+        shutil.copy(path, store_path)
+        for suffix in (".cache", ".journal"):
+            if os.path.exists(store_path + suffix):
+                os.remove(store_path + suffix)
+
+    def open_store():
+        TaskStore(store_path, flush_interval=None).close()
+
+    timings = [Timing("store.open_uncached", rows, measure(open_store, repeat, setup=fresh_copy))]
+    timings.append(Timing("store.open_cached", rows, measure(open_store, repeat)))
+    store = TaskStore(store_path, flush_changes=0, flush_interval=None)
+    task_id = store.tasks[rows // 2].id
+
+    def edit_and_flush():
+        status = "DONE" if store.get(task_id).status != "DONE" else "TO DO"
+        store.edit(task_id, {"status": status})
+        store.flush()
+
+    timings.append(Timing("store.edit_flush", rows, measure(edit_and_flush, repeat if rows <= FULL_SAVE_LIMIT else 1)))
+    store.close()
+    return timings
+
+def bench_pages(path: str, rows: int, repeat: int) -> List[Timing]:
+    """Time the Today filter and the task name search on the offscreen Qt platform."""
+    from PySide6.QtCore import QEvent
+    from PySide6.QtWidgets import QApplication
+    from custom import SearchDialog
+    from gui import TodayTaskPage
+
+    app = QApplication.instance() or QApplication([])
+    store = TaskStore(path, flush_interval=None)
+    timings = [Timing("today.index_build", rows, measure(lambda: TaskIndex(store.tasks), repeat))]
+    task_index = TaskIndex(store.tasks)
+    timings.append(Timing("today.lookup", rows, measure(lambda: task_index.todayTasks(date.today()), repeat)))
+
+    def delete_later(widget):
+        # Deferred deletions only run in an event loop unless they are sent explicitly
+        widget.deleteLater()
+        app.sendPostedEvents(None, QEvent.Type.DeferredDelete)
+
+    def open_today_page():
+        page = TodayTaskPage(store, task_index)
+        page.show()
+        app.processEvents()
+        page.close()
+        delete_later(page)
+
+    timings.append(Timing("today.page", rows, measure(open_today_page, repeat)))
+
+    items = {task_item.id: task_item.task for task_item in store.tasks}
+    timings.append(Timing("search.build", rows, measure(lambda: delete_later(SearchDialog(None, items)), repeat)))
+    dialog = SearchDialog(None, items)
+    query_times = []
+    for query in SEARCH_QUERIES:
+        dialog.search_bar.setText(query)
+        # Run the search right away instead of after the typing delay
+        dialog.search_timer.stop()
+        query_times.extend(measure(dialog.filterTasks, repeat))
+    timings.append(Timing("search.query", rows, query_times))
+    delete_later(dialog)
+    store.close()
+    return timings
+
+def version() -> Optional[str]:
+    """Return the commit of the working tree, marked when it has local changes."""
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=repo_dir,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=repo_dir,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("-dirty" if dirty else "")
+
+def run_suite(sizes: List[int], repeat: int = REPEAT, workload: Workload = Workload()) -> Dict:
+    """
+    Run every benchmark case on a synthetic database of every size.
+
+    Args:
+        sizes (List[int]): Numbers of task rows.
+        repeat (int): Runs of every case.
+        workload (Workload): Shape of the databases, the number of rows is replaced.
+
+    Returns:
+        Dict: The run metadata and the results of every case.
+    """
+    results = []
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "tasks.xlsx")
+            write_workbook(path, workload._replace(rows=rows))
+            for bench in (bench_database, bench_store, bench_pages):
+                for timing in bench(path, rows, repeat):
+                    results.append(timing.toDict())
+                    print(f"{timing.name:22} {rows:8d} rows: {results[-1]['median'] * 1000:10.2f} ms")
+    return {
+        "version": version(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "workload": {key: value for key, value in workload._asdict().items() if key != "rows"},
+        "results": results,
+    }
+
+def compare(previous: Dict, current: Dict):
+    """Print the change of the median of every case measured in both runs."""
+    before = {(result["name"], result["rows"]): result for result in previous["results"]}
+    print(f"Compared with {previous.get('version')} of {previous.get('date')}")
+    for result in current["results"]:
+        old = before.get((result["name"], result["rows"]))
+        if old is None:
+            continue
+        ratio = result["median"] / old["median"] if old["median"] else float("inf")
+        print(f"{result['name']:22} {result['rows']:8d} rows: {old['median'] * 1000:10.2f} -> "
+              f"{result['median'] * 1000:10.2f} ms ({ratio:.2f}x)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the task database and the pages")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="Numbers of task rows")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="Runs of every case")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic databases")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare with")
+    args = parser.parse_args()
+
+    report = run_suite(args.sizes, args.repeat, Workload(seed=args.seed))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2, default=str)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as previous_file:
+            compare(json.load(previous_file), report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Benchmarks for the task database.
+
+Run `python benchmark.py --rows 50000` to build a synthetic database with
+workload.py, time the task loading against the previous row-by-row
+implementation, measure the memory used by the different task containers and
+check that the streaming loader keeps a flat memory profile, and compare the
+store startup with and without a valid parse cache, time bulk appends
+with the row style template against copying the styles field by field,
+measure the application startup on the offscreen Qt platform, compare
+the native xlsx reader with pandas on 1k, 10k and 100k rows, and time the
+task name search against 100k names. These compare the current code with the
+implementations it replaced; bench_suite.py times the current code for regressions.
+"""
+from datetime import datetime
+from openpyxl import load_workbook
+from openpyxl.styles import Alignment, Border, Font, PatternFill
+from search_index import SEARCH_LIMIT, SearchIndex
+from store import TaskStore
+from task import (COLUMN_MAPPING, INTERNAL_COLUMN, Task, TaskBatch, TaskTable, frame_to_task_list, iter_task_list,
+                  load_task_list)
+from workload import Workload, generate_tasks, write_workbook
+import pandas as pd
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Queries of every search rank: prefix, word, substring, fuzzy, and short ones
+SEARCH_QUERIES = ["rev", "update rep", "budget 123", "port", "ustom", "eting 42", "reveiw", "budgte meting",
+                  "relaese 7", "r", "de", "12345", "zzz"]
+
+# Run in a fresh interpreter by bench_startup, prints the seconds until the first
+# paint of the main window and until the tasks are loaded
+STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+import sys
+from PySide6.QtCore import QEvent, QObject, QTimer
+from PySide6.QtWidgets import QApplication
+import gui
+
+gui.CONFIG_DATA["database"] = sys.argv[1]
+times = {}
+
+class PaintProbe(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint and "paint" not in times:
+            times["paint"] = time.perf_counter() - start
+        return False
+
+def poll():
+    if "paint" in times and window.start_page.store is not None:
+        times["loaded"] = time.perf_counter() - start
+        app.quit()
+
+app = QApplication([])
+probe = PaintProbe()
+app.installEventFilter(probe)
+window = gui.TaskTracking()
+window.show()
+timer = QTimer()
+timer.timeout.connect(poll)
+timer.start(1)
+app.exec()
+print(times["paint"], times["loaded"])
+window.close()
+"""
+
+def legacy_frame_to_task_list(data: pd.DataFrame):
+    """Row-by-row conversion used by load_task_list before it was vectorized."""
+    task_list = []
+    for _, row in data.iterrows():
+        task_item = row.to_dict()
+        for date_field in ['do_date', 'deadline']:
+            if type(task_item[date_field]) == datetime or type(task_item[date_field]) == pd.Timestamp:
+                task_item[date_field] = task_item[date_field].strftime('%Y-%m-%d')
+        task_item = {key: ("" if (pd.isna(value)) else value)
+                     for key, value in task_item.items()}
+        task_list.append(task_item)
+    return task_list
+
+def timed(func, *args, repeat: int = 3):
+    """Return the result and the best wall time in seconds of several runs."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+def bench_load(path: str):
+    """Compare the vectorized and the row-by-row task conversion."""
+    data, read_time = timed(lambda: pd.read_excel(path, usecols=COLUMN_MAPPING.keys())
+                            .rename(columns=COLUMN_MAPPING), repeat=1)
+    legacy, legacy_time = timed(legacy_frame_to_task_list, data)
+    current, current_time = timed(frame_to_task_list, data)
+    assert current == legacy, "Vectorized conversion differs from the row-by-row one"
+    assert [list(map(type, task.values())) for task in current] == \
+        [list(map(type, task.values())) for task in legacy], "Value types differ"
+    print(f"read_excel:              {read_time * 1000:10.1f} ms")
+    print(f"row-by-row conversion:   {legacy_time * 1000:10.1f} ms")
+    print(f"vectorized conversion:   {current_time * 1000:10.1f} ms "
+          f"({legacy_time / current_time:.1f}x faster)")
+
+def measure_memory(build):
+    """Return the result of build() and the memory in bytes it still holds."""
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current - start
+
+def bench_memory(path: str):
+    """Compare the memory of the task list as dictionaries, Task records and a TaskTable."""
+    data = pd.read_excel(path, usecols=COLUMN_MAPPING.keys()).rename(columns=COLUMN_MAPPING)
+    # Every container is built from the same frame and keeps only its own objects
+    _, dict_size = measure_memory(lambda: frame_to_task_list(data))
+    _, record_size = measure_memory(lambda: [Task.from_dict(task_item)
+                                             for task_item in frame_to_task_list(data)])
+    _, table_size = measure_memory(lambda: TaskTable(frame_to_task_list(data)))
+    print(f"list of dicts:           {dict_size / 2**20:10.1f} MiB")
+    print(f"list of Task records:    {record_size / 2**20:10.1f} MiB")
+    print(f"TaskTable:               {table_size / 2**20:10.1f} MiB")
+
+def bench_stream(path: str, rows: int):
+    """Compare the peak memory of pd.read_excel and of streaming the same tasks."""
+    def peak(func):
+        tracemalloc.start()
+        func()
+        _, peak_size = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak_size
+
+    def stream(limit=None):
+        for _ in iter_task_list(path, limit=limit):
+            pass
+
+    print(f"read_excel peak:         {peak(lambda: pd.read_excel(path)) / 2**20:10.1f} MiB")
+    print(f"stream peak, {rows // 10:7d} rows: {peak(lambda: stream(rows // 10)) / 2**20:7.1f} MiB")
+    print(f"stream peak, {rows:7d} rows: {peak(stream) / 2**20:7.1f} MiB")
+    window, window_time = timed(lambda: list(iter_task_list(path, offset=rows - 100, limit=50)), repeat=1)
+    print(f"stream window of {len(window)} at the end: {window_time * 1000:7.1f} ms")
+
+def bench_cache(path: str):
+    """Compare the TaskStore startup when the parse cache misses and when it hits."""
+    store_path = os.path.join(os.path.dirname(path), "cache_test.xlsx")
+    shutil.copy(path, store_path)
+    miss = TaskStore(store_path, flush_interval=None)
+    hit = TaskStore(store_path, flush_interval=None)
+    assert hit.load_source == "cache" and hit.tasks == miss.tasks
+    print(f"store startup, cache miss: {miss.load_time * 1000:8.1f} ms")
+    print(f"store startup, cache hit:  {hit.load_time * 1000:8.1f} ms "
+          f"({miss.load_time / hit.load_time:.0f}x faster)")
+
+def legacy_append_task_row(ws, data):
+    """Row append used before the row style template, rebuilding the style objects of every cell."""
+    last_row = ws.max_row
+    for col_num in range(1, len(data)+1):
+        ws.cell(row=last_row + 1, column=col_num, value=data[INTERNAL_COLUMN[col_num-1]])
+    for col_num in range(1, ws.max_column + 1):
+        prev_cell = ws.cell(row=last_row, column=col_num)
+        new_cell = ws.cell(row=last_row + 1, column=col_num)
+        new_cell.font = Font(name=prev_cell.font.name, bold=prev_cell.font.bold, italic=prev_cell.font.italic,
+                             vertAlign=prev_cell.font.vertAlign, underline=prev_cell.font.underline,
+                             strike=prev_cell.font.strike, color=prev_cell.font.color)
+        new_cell.fill = PatternFill(fill_type=prev_cell.fill.fill_type, start_color=prev_cell.fill.start_color,
+                                    end_color=prev_cell.fill.end_color)
+        new_cell.border = Border(left=prev_cell.border.left, right=prev_cell.border.right,
+                                 top=prev_cell.border.top, bottom=prev_cell.border.bottom)
+        new_cell.alignment = Alignment(horizontal=prev_cell.alignment.horizontal,
+                                       vertical=prev_cell.alignment.vertical,
+                                       text_rotation=prev_cell.alignment.text_rotation,
+                                       wrap_text=prev_cell.alignment.wrap_text,
+                                       shrink_to_fit=prev_cell.alignment.shrink_to_fit,
+                                       indent=prev_cell.alignment.indent)
+        new_cell.number_format = prev_cell.number_format
+
+def bench_append(path: str, count: int = 500):
+    """Time appending many tasks to an opened workbook."""
+    task_item = next(iter_task_list(path)).to_dict()
+
+    def append(append_row):
+        ws = load_workbook(path).active
+        start = time.perf_counter()
+        append_row(ws)
+        return time.perf_counter() - start
+
+    def legacy(ws):
+        for _ in range(count):
+            legacy_append_task_row(ws, task_item)
+
+    def template(ws):
+        batch = TaskBatch(path)
+        for _ in range(count):
+            batch.add(task_item)
+        batch.apply(ws)
+
+    legacy_time = append(legacy)
+    template_time = append(template)
+    print(f"append {count}, copied styles:  {legacy_time * 1000:8.1f} ms")
+    print(f"append {count}, style template: {template_time * 1000:8.1f} ms "
+          f"({legacy_time / template_time:.1f}x faster)")
+
+def bench_startup(path: str):
+    """Time the application startup until the first paint and until the tasks are loaded."""
+    store_path = os.path.join(os.path.dirname(path), "startup_test.xlsx")
+    shutil.copy(path, store_path)
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    # The first start parses the workbook, the second one finds the parse cache
+    for label in ["cold", "warm"]:
+        output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT, store_path], cwd=repo_dir, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        paint_time, loaded_time = map(float, output.split()[-2:])
+        print(f"startup ({label}), first paint: {paint_time * 1000:8.1f} ms, "
+              f"tasks loaded: {loaded_time * 1000:8.1f} ms")
+
+def pandas_task_list(path: str):
+    """Fallback path of load_task_list, reading the sheet with pandas."""
+    data = pd.read_excel(path, usecols=COLUMN_MAPPING.keys()).rename(columns=COLUMN_MAPPING)
+    return frame_to_task_list(data)
+
+def bench_reader(tmp_dir: str, sizes=(1000, 10000, 100000)):
+    """Compare load_task_list with the native xlsx reader and with pandas."""
+    def import_time(module):
+        output = subprocess.run([sys.executable, "-c", f"import time; start = time.perf_counter(); "
+                                 f"import {module}; print(time.perf_counter() - start)"],
+                                cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stdout
+        return float(output)
+
+    print(f"import pandas:           {import_time('pandas') * 1000:10.1f} ms")
+    print(f"import task:             {import_time('task') * 1000:10.1f} ms")
+    for rows in sizes:
+        path = os.path.join(tmp_dir, f"reader_{rows}.xlsx")
+        write_workbook(path, Workload(rows=rows))
+        native, native_time = timed(load_task_list, path, repeat=1)
+        legacy, legacy_time = timed(pandas_task_list, path, repeat=1)
+        assert native == legacy, "Native reader differs from pandas"
+        assert [list(map(type, task.values())) for task in native] == \
+            [list(map(type, task.values())) for task in legacy], "Value types differ"
+        print(f"{rows:7d} rows, pandas: {legacy_time * 1000:9.1f} ms, native: {native_time * 1000:9.1f} ms "
+              f"({legacy_time / native_time:.1f}x faster)")
+
+def bench_search(count: int = 100000, seed: int = 0):
+    """Time the search index on task names against scanning every name."""
+    names = [data["task"] for data in generate_tasks(Workload(rows=count, seed=seed))]
+    index, build_time = timed(SearchIndex, enumerate(names), repeat=1)
+    print(f"search index of {count} names built in {build_time * 1000:.1f} ms")
+
+    def scan(query):
+        # Previous filter: lowercase every name on every keystroke
+        text = query.lower()
+        return [idx for idx, name in enumerate(names) if text in name.lower()]
+
+    latencies = []
+    for query in SEARCH_QUERIES:
+        results, search_time = timed(index.search, query, SEARCH_LIMIT, repeat=5)
+        _, scan_time = timed(scan, query, repeat=1)
+        latencies.append(search_time)
+        print(f"  {query!r:16} {len(results):4d} results in {search_time * 1000:7.2f} ms "
+              f"(scan: {scan_time * 1000:7.2f} ms)")
+    latencies.sort()
+    print(f"search latency p50: {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+          f"max: {latencies[-1] * 1000:.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the task database operations")
+    parser.add_argument("--rows", type=int, default=50000, help="Number of rows of the synthetic database")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "tasks.xlsx")
+        write_workbook(path, Workload(rows=args.rows))
+        print(f"Synthetic database with {args.rows} rows")
+        bench_load(path)
+        bench_memory(path)
+        bench_stream(path, args.rows)
+        bench_cache(path)
+        bench_append(path)
+        bench_startup(path)
+        bench_reader(tmp_dir)
+    bench_search()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+from task import COLUMN_MAPPING, INTERNAL_COLUMN
+from typing import List, NamedTuple, Optional, Tuple
+import hashlib
+import json
+import os
+import pickle
+
+CACHE_SUFFIX = ".cache"
+# Bump when the layout of the cached data changes
+CACHE_FORMAT = 2
+SCHEMA_VERSION = hashlib.sha1(json.dumps([CACHE_FORMAT, COLUMN_MAPPING, INTERNAL_COLUMN]).encode()).hexdigest()
+
+class CachedTasks(NamedTuple):
+    """Parsed content of a database as stored in its cache."""
+    rows: List[int]
+    values: List[tuple]
+    ids: List[Optional[int]]
+    compacted_seq: int
+
+def cache_path(path: str) -> str:
+    """
+    Return the path of the parse cache belonging to a database.
+
+    Args:
+        path (str): Path of the Excel database.
+
+    Returns:
+        str: Path of the cache file next to the database.
+    """
+    return path + CACHE_SUFFIX
+
+def _cache_key(path: str, fingerprint: Tuple[int, int]) -> tuple:
+    return (os.path.abspath(path), *fingerprint, SCHEMA_VERSION)
+
+def load_task_cache(path: str, fingerprint: Optional[Tuple[int, int]]) -> Optional[CachedTasks]:
+    """
+    Read the parsed tasks of a database from its cache.
+
+    Args:
+        path (str): Path of the Excel database.
+        fingerprint (Optional[Tuple[int, int]]): Current modification time and size of the database.
+
+    Returns:
+        Optional[CachedTasks]: The cached content, None if there is no cache or it does not
+        match the path, fingerprint or schema of the database.
+    """
+    if fingerprint is None:
+        return None
+    try:
+        with open(cache_path(path), "rb") as cache_file:
+            key, content = pickle.load(cache_file)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+        return None
+    if key != _cache_key(path, fingerprint):
+        return None
+    return CachedTasks(*content)
+
+def save_task_cache(path: str, fingerprint: Optional[Tuple[int, int]], content: CachedTasks):
+    """
+    Write the parsed tasks of a database to its cache.
+
+    Args:
+        path (str): Path of the Excel database.
+        fingerprint (Optional[Tuple[int, int]]): Modification time and size of the database the content was read from.
+        content (CachedTasks): Row numbers, field values in INTERNAL_COLUMN order, task IDs
+            and compacted journal sequence.
+    """
+    if fingerprint is None:
+        return
+    tmp_path = cache_path(path) + ".tmp"
+    try:
+        with open(tmp_path, "wb") as cache_file:
+            pickle.dump((_cache_key(path, fingerprint), tuple(content)), cache_file,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path(path))
+    except OSError as e:
+        # The cache only speeds up the next start, the application works without it
+        print(f"Failed to write the cache of {path}: {e}")
@@ -0,0 +1,93 @@
+from difflib import SequenceMatcher
+from task import Task
+from typing import List, Optional, Tuple
+import os
+
+def file_fingerprint(path: str) -> Optional[Tuple[int, int]]:
+    """
+    Return a cheap fingerprint telling whether a file changed.
+
+    Args:
+        path (str): Path of the file.
+
+    Returns:
+        Optional[Tuple[int, int]]: Modification time in nanoseconds and size, None if the file is missing.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def row_hash(task_item: Task) -> int:
+    """
+    Return the content hash of a task.
+
+    Args:
+        task_item (Task): The task record.
+
+    Returns:
+        int: Hash of all the field values.
+    """
+    return hash(tuple(task_item.values()))
+
+class TaskDiff:
+    """Tasks changed, added and removed between two versions of the task list."""
+
+    def __init__(self):
+        self.changed: List[Task] = []
+        self.added: List[Task] = []
+        self.removed: List[Task] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.changed or self.added or self.removed)
+
+    def __repr__(self) -> str:
+        return f"TaskDiff(changed={len(self.changed)}, added={len(self.added)}, removed={len(self.removed)})"
+
+def merge_task_lists(old: List[Task], new: List[Task]) -> Tuple[List[Task], TaskDiff]:
+    """
+    Merge a freshly read task list into the current one.
+
+    Rows are matched by their content hash, so unchanged tasks keep their record
+    objects. A changed task, recognized by its ID, or by its name when the row has no
+    ID, among the rows that differ, keeps its record too, updated in place with the
+    new values.
+
+    Args:
+        old (List[Task]): The current task list.
+        new (List[Task]): The task list read from disk.
+
+    Returns:
+        Tuple[List[Task], TaskDiff]: The merged task list, in the order of the new one,
+        and the differences to the current task list.
+    """
+    matcher = SequenceMatcher(None, [row_hash(task_item) for task_item in old],
+                              [row_hash(task_item) for task_item in new], autojunk=False)
+    merged: List[Task] = []
+    diff = TaskDiff()
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            merged.extend(old[i1:i2])
+            continue
+        # Rows of a replaced block holding the same task ID, or the same task name when
+        # the new row has no ID, are changes of that task; the other rows are insertions
+        # or deletions
+        unmatched = {id(old_task): old_task for old_task in old[i1:i2]}
+        by_id = {old_task.id: old_task for old_task in old[i1:i2] if old_task.id is not None}
+        for new_task in new[j1:j2]:
+            if new_task.id is not None:
+                old_task = by_id.get(new_task.id)
+            else:
+                old_task = next((task_item for task_item in unmatched.values()
+                                 if task_item.task == new_task.task), None)
+            if old_task is not None and id(old_task) in unmatched:
+                del unmatched[id(old_task)]
+                old_task.update(new_task)
+                merged.append(old_task)
+                diff.changed.append(old_task)
+            else:
+                merged.append(new_task)
+                diff.added.append(new_task)
+        diff.removed.extend(unmatched.values())
+    return merged, diff
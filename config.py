@@ -0,0 +1,47 @@
+"""
+Settings of the application, shared by the GUI and the command line tools.
+
+The defaults below are used until a data file is saved from the setting page.
+"""
+import json
+import os
+
+TASK_DATA_PATH = "./data.json"
+CONFIG_DATA = {}
+CONFIG_DATA["database"] = "./Test.xlsx"
+CONFIG_DATA["category"] = ["Category 1", "Category 2", "Category 3", "Category 4",
+                           "Category 5", "Category 6", "Category 7", "Category 8",
+                           "Category 9"]
+CONFIG_DATA["assigner"] = ["Person 1", "Person 2", "Person 3", "Person 4",
+                           "Person 5", "Person 6", "Person 7", "Person 8",
+                           "Person 9"]
+CONFIG_DATA["status"] = ["TO DO", "IN PROGRESS", "DONE", "BLOCK", "CANCELED"]
+# Storage backend, one of BACKENDS: "excel" works on the database directly,
+# "sqlite" keeps the tasks in a SQLite database and uses the Excel file for import/export
+CONFIG_DATA["backend"] = "excel"
+# Write-behind policy: flush after this many changes or seconds since the first pending change
+CONFIG_DATA["flush_changes"] = 20
+CONFIG_DATA["flush_interval"] = 30
+# Record the timings of the slow operations in a log next to the database, see perf.py.
+# Turned on from the diagnostics page or with the --diagnostics flag of gui.py
+CONFIG_DATA["diagnostics"] = False
+# Seconds the window may stay frozen before the watchdog reports it, 0 disables the watchdog
+CONFIG_DATA["stall_threshold"] = 0.5
+# DONE and CANCELED tasks older than this many days are moved to the monthly archives, 0 never archives
+CONFIG_DATA["archive_days"] = 0
+# Search and report on the archived tasks too, see archive.py
+CONFIG_DATA["include_archive"] = False
+# Statuses that need a reason
+REASON_STATUS = ["BLOCK", "CANCELED"]
+
+def load_environment(path: str = TASK_DATA_PATH):
+    # If no data file is found use the constant in source file
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'r') as task_data_file:
+        # Keep the defaults of settings missing from older data files
+        CONFIG_DATA.update(json.load(task_data_file))
+
+def save_environment(path: str = TASK_DATA_PATH):
+    with open(path, 'w') as task_data_file:
+        json.dump(CONFIG_DATA, task_data_file)
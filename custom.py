@@ -1,23 +1,121 @@
-from PySide6.QtCore import Signal
-from PySide6.QtWidgets import QDialog, QListWidget, QListWidgetItem, QLineEdit, QPushButton, QVBoxLayout, QHBoxLayout, QWidget, QMessageBox, QFileDialog
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt, QTimer, Signal
+from PySide6.QtWidgets import QDialog, QListView, QLineEdit, QPushButton, QVBoxLayout, QHBoxLayout, QWidget, QMessageBox, QFileDialog
 from PySide6.QtGui import QIcon
+from perf import span
+from search_index import SEARCH_LIMIT, SearchIndex
 import os
 
 # CONSTANTS
 ICON_SIZE = (24, 24)
+# Milliseconds without typing before the search runs
+SEARCH_DELAY = 150
+
+class SearchResultModel(QAbstractListModel):
+    """List model showing the items found by a search, in result order."""
+
+    def __init__(self, names, parent=None):
+        """
+        Initialize the SearchResultModel.
+
+        Args:
+            names (dict): Name of every item by its key, shared with the search dialog.
+            parent (QObject, optional): The parent object. Defaults to None.
+        """
+        super().__init__(parent)
+        self.names = names
+        self.results = list(names)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.results)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if index.isValid() and role == Qt.ItemDataRole.DisplayRole:
+            return str(self.names.get(self.results[index.row()], ""))
+        return None
+
+    def setResults(self, results):
+        """
+        Show other search results.
+
+        Args:
+            results (list): Keys of the found items.
+        """
+        self.beginResetModel()
+        self.results = results
+        self.endResetModel()
+
+    def itemKey(self, row):
+        """
+        Return the key of the item shown in a row.
+
+        Args:
+            row (int): Row of the result.
+
+        Returns:
+            Key of the item.
+        """
+        return self.results[row]
+
+    def appendResult(self, key):
+        """
+        Show one more item at the end of the results.
+
+        Args:
+            key: Key of the item.
+        """
+        row = len(self.results)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.results.append(key)
+        self.endInsertRows()
+
+    def removeResult(self, key):
+        """
+        Stop showing an item.
+
+        Args:
+            key: Key of the item.
+        """
+        try:
+            row = self.results.index(key)
+        except ValueError:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.results[row]
+        self.endRemoveRows()
+
+    def updateResult(self, key):
+        """
+        Show the new name of an item.
+
+        Args:
+            key: Key of the item.
+        """
+        try:
+            row = self.results.index(key)
+        except ValueError:
+            return
+        self.dataChanged.emit(self.index(row), self.index(row))
 
 class SearchDialog(QDialog):
     def __init__(self, parent=None, items=None):
         """
         Initialize the SearchDialog.
 
+        The dialog is meant to be kept and opened again: the items are then changed with
+        setItems, insertItem, updateItem and removeItem, which update the search index and
+        the shown results in place.
+
         Args:
             parent (QWidget, optional): The parent widget. Defaults to None.
-            items (list[str], optional): List of items to search from. Defaults to an empty list if None.
+            items (list[str] or dict, optional): List of items to search from, or the name of
+                every item by its key. Defaults to an empty list if None.
         """
         super().__init__(parent)
-        self.items = items or []
+        self.names = dict(items) if isinstance(items, dict) else dict(enumerate(items or []))
+        self.index = SearchIndex(self.names.items())
         self.selected_index = None
+        # The items changed while the dialog was hidden, the search runs again when it is shown
+        self.stale = False
         self.setupUI()
 
     def setupUI(self):
@@ -25,54 +123,148 @@ class SearchDialog(QDialog):
         self.setWindowTitle("Search Task")
         layout = QVBoxLayout(self)
 
-        # Create and set up the search bar
+        # Create and set up the search bar, searching once the typing pauses
         self.search_bar = QLineEdit(self)
         self.search_bar.setPlaceholderText("Search task...")
-        self.search_bar.textChanged.connect(self.filterTasks)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY)
+        self.search_timer.timeout.connect(self.filterTasks)
+        self.search_bar.textChanged.connect(self.search_timer.start)
         layout.addWidget(self.search_bar)
 
-        # Create and set up the list widget to display tasks
-        self.list_widget = QListWidget(self)
-        self.list_widget.setSelectionMode(QListWidget.SingleSelection)
-        self.populateTaskList(self.items)
-        layout.addWidget(self.list_widget)
+        # Create and set up the list view to display tasks, only the shown rows are built
+        self.list_view = QListView(self)
+        self.list_view.setSelectionMode(QListView.SingleSelection)
+        self.list_view.setUniformItemSizes(True)
+        self.result_model = SearchResultModel(self.names, self)
+        self.list_view.setModel(self.result_model)
+        self.list_view.doubleClicked.connect(self.selectTask)
+        layout.addWidget(self.list_view)
 
         # Create and set up the select button
         self.select_btn = QPushButton("Select Task", self)
         self.select_btn.clicked.connect(self.selectTask)
         layout.addWidget(self.select_btn)
 
-    def populateTaskList(self, tasks):
+    def showEvent(self, event):
+        """Start a new selection, keeping the last search ready to be typed over."""
+        super().showEvent(event)
+        self.selected_index = None
+        if self.stale:
+            self.filterTasks()
+        self.search_bar.selectAll()
+        self.search_bar.setFocus()
+
+    def setItems(self, items):
         """
-        Populate the list widget with the provided tasks.
+        Replace the items.
+
+        Only the differences to the current items are applied, unless most of them changed.
 
         Args:
-            tasks (list[str]): List of tasks to display.
+            items (dict): Name of every item by its key.
+        """
+        items = dict(items)
+        removed = [key for key in self.names if key not in items]
+        changed = [key for key, name in items.items() if self.names.get(key) != name]
+        if len(removed) + len(changed) > len(items) // 4:
+            self.names.clear()
+            self.names.update(items)
+            self.index = SearchIndex(self.names.items())
+            if self.isVisible():
+                self.filterTasks()
+            else:
+                self.stale = True
+            return
+        for key in removed:
+            self.removeItem(key)
+        for key in changed:
+            self.updateItem(key, items[key])
+
+    def insertItem(self, key, name):
         """
-        self.list_widget.clear()
-        self.list_widget.addItems(tasks)
+        Add an item.
+
+        Args:
+            key: Key of the item.
+            name (str): Name of the item.
+        """
+        self.names[key] = name
+        self.index.insert(key, name)
+        if self.search_bar.text().strip():
+            self.refreshResults()
+        else:
+            self.result_model.appendResult(key)
+
+    def updateItem(self, key, name):
+        """
+        Change the name of an item, or add it if it is not there yet.
+
+        Args:
+            key: Key of the item.
+            name (str): New name of the item.
+        """
+        if key not in self.names:
+            self.insertItem(key, name)
+            return
+        if self.names[key] == name:
+            return
+        self.names[key] = name
+        self.index.insert(key, name)
+        if self.search_bar.text().strip():
+            self.refreshResults()
+        else:
+            self.result_model.updateResult(key)
+
+    def removeItem(self, key):
+        """
+        Remove an item.
+
+        Args:
+            key: Key of the item.
+        """
+        if self.names.pop(key, None) is None:
+            return
+        self.index.remove(key)
+        self.result_model.removeResult(key)
+
+    def refreshResults(self):
+        """Search again once the items changed, right away only if the dialog is shown."""
+        if self.isVisible():
+            self.search_timer.start()
+        else:
+            self.stale = True
 
     def filterTasks(self):
-        """Filter the tasks in the list based on the search text."""
-        search_text = self.search_bar.text().lower()
-        for i in range(self.list_widget.count()):
-            item = self.list_widget.item(i)
-            item.setHidden(search_text not in item.text().lower())
+        """Show the best matches of the search text."""
+        self.stale = False
+        text = self.search_bar.text()
+        # All the items in their order when there is nothing to look for
+        with span("search.filter", rows=len(self.names)):
+            results = self.index.search(text, SEARCH_LIMIT) if text.strip() else list(self.names)
+            self.result_model.setResults(results)
+        if self.result_model.rowCount():
+            self.list_view.setCurrentIndex(self.result_model.index(0))
 
     def getSelected(self):
         """
-        Return the index of the selected item.
+        Return the key of the selected item.
 
         Returns:
-            int or None: Index of the selected item, or None if no item is selected.
+            The key of the selected item, its index for a list of items, or None if no item is selected.
         """
         return self.selected_index
 
     def selectTask(self):
         """Handle the task selection and close the dialog."""
-        selected_index = self.list_widget.currentRow()
-        if selected_index != -1:
-            self.selected_index = selected_index
+        # The results may be out of date while the typing pauses
+        if self.search_timer.isActive():
+            self.search_timer.stop()
+            self.filterTasks()
+        current = self.list_view.currentIndex()
+        if current.isValid():
+            self.selected_index = self.result_model.itemKey(current.row())
             self.accept()
         else:
             QMessageBox.warning(self, "No Selection", "Please select a task from the list.")
@@ -89,7 +281,9 @@ class FieldSearchBox(QWidget):
             parent (QWidget, optional): The parent widget. Defaults to None.
         """
         super().__init__(parent)
-        self.items = list(item_list) if item_list is not None else []
+        self.items = dict(enumerate(item_list)) if item_list is not None else {}
+        # Created on the first search and kept, the item changes are passed to it
+        self.dialog = None
         self.setup_ui()
 
     def setup_ui(self):
@@ -121,12 +315,62 @@ class FieldSearchBox(QWidget):
 
     def setItemList(self, items):
         """
-        Set the list of items for the search box.
+        Set the list of items for the search box, item_selected reports their index.
 
         Args:
             items (list[str]): List of items to search from.
         """
-        self.items = items
+        self.setItems(dict(enumerate(items)))
+
+    def setItems(self, items):
+        """
+        Set the items of the search box, item_selected reports their key.
+
+        Args:
+            items (dict): Name of every item by its key, e.g. the task names by task ID.
+        """
+        if self.dialog is None:
+            self.items = dict(items)
+        else:
+            self.dialog.setItems(items)
+
+    def insertItem(self, key, name):
+        """
+        Add an item to the search box.
+
+        Args:
+            key (int): Key of the item.
+            name (str): Name of the item.
+        """
+        if self.dialog is None:
+            self.items[key] = name
+        else:
+            self.dialog.insertItem(key, name)
+
+    def updateItem(self, key, name):
+        """
+        Change the name of an item of the search box.
+
+        Args:
+            key (int): Key of the item.
+            name (str): New name of the item.
+        """
+        if self.dialog is None:
+            self.items[key] = name
+        else:
+            self.dialog.updateItem(key, name)
+
+    def removeItem(self, key):
+        """
+        Remove an item from the search box.
+
+        Args:
+            key (int): Key of the item.
+        """
+        if self.dialog is None:
+            self.items.pop(key, None)
+        else:
+            self.dialog.removeItem(key)
 
     def text(self):
         """
@@ -143,12 +387,15 @@ class FieldSearchBox(QWidget):
 
     def show_search_box(self):
         """Show the search dialog and handle item selection."""
-        dialog = SearchDialog(self, self.items)
-        if dialog.exec() == QDialog.Accepted:
-            selected_idx = dialog.getSelected()
-            if selected_idx is not None:
-                self.item_field.setText(self.items[selected_idx])
-                self.item_selected.emit(selected_idx)
+        if self.dialog is None:
+            self.dialog = SearchDialog(self, self.items)
+            # The dialog keeps the items from now on
+            self.items = self.dialog.names
+        if self.dialog.exec() == QDialog.Accepted:
+            selected_key = self.dialog.getSelected()
+            if selected_key is not None:
+                self.item_field.setText(str(self.items[selected_key]))
+                self.item_selected.emit(selected_key)
 
 class FieldBrowseFileBox(QWidget):
     path_seleted = Signal(int)
@@ -1,12 +1,23 @@
 from PySide6.QtCore import *
 from PySide6.QtWidgets import *
 from PySide6.QtGui import QIcon, QDoubleValidator, QCloseEvent, QFont
+from analytics import TaskAnalytics
+from archive import TaskArchive, archive_tasks
+from changes import TaskDiff
+from config import CONFIG_DATA, REASON_STATUS, load_environment, save_environment
 from custom import FieldSearchBox, FieldBrowseFileBox
-from task import add_new_task_item, load_task_list, edit_task_item, delete_task_item
+from perf import span
+from store import BACKENDS, TaskStore, open_task_store
+from task import Task
+from task_index import TaskIndex
+from watchdog import UiWatchdog, report_path_for
+from worker import TaskWriter
 from datetime import datetime
+from typing import Optional
+import argparse
+import perf
 import sys
 import os
-import json
 
 # Constants
 USERNAME = "DeeDee2804"
@@ -14,25 +25,16 @@ WINDOW_TITLE = "Task Tracking"
 WINDOW_HEIGHT = 100
 WINDOW_WIDTH = 400
 ICON_SIZE = (24, 24)
-CONFIG_DATA = {}
-CONFIG_DATA["database"] = "./Test.xlsx"
-CONFIG_DATA["category"] = ["Category 1", "Category 2", "Category 3", "Category 4",
-                           "Category 5", "Category 6", "Category 7", "Category 8",
-                           "Category 9"]
-CONFIG_DATA["assigner"] = ["Person 1", "Person 2", "Person 3", "Person 4",
-                           "Person 5", "Person 6", "Person 7", "Person 8",
-                           "Person 9"]
-CONFIG_DATA["status"] = ["TO DO", "IN PROGRESS", "DONE", "BLOCK", "CANCELED"]
-REASON_STATUS = ["BLOCK", "CANCELED"]
 FIXED_FIELD_WIDTH = 200
 BUTTON_HEIGHT = 40
 BUTTON_WIDTH = 100
-TASK_DATA_PATH = "./data.json"
 BOSCHPURPLE_COLOR = "#9E2896"
 BOSCHBLUE_COLOR = '#007BC0'
 BOSCHTURQUOISE_COLOR = '#18837E'
 BOSCHGRAY_COLOR = '#2E3033'
 DIALOG_WAIT_TIME = 3000
+# Delay to let an external program finish writing the database before re-reading it
+RELOAD_DELAY = 1000
 
 class ComboxWithoutScrolling(QComboBox):
     def __init__(self, parent=None):
@@ -283,21 +285,37 @@ class StartPage(QWidget):
         super().__init__(parent)
         self.parent = parent
         #TODO: Add validation for the database
-        self.tasks = load_task_list(CONFIG_DATA['database'])
-        self.create_page = CreateTaskPage()
-        self.create_page.task_created.connect(self.updateTaskList)
-        self.update_page = UpdateTaskPage(self.tasks)
-        self.setting_page = SettingPage()
-        self.setting_page.configuration_changed.connect(self.updateDatabase)
+        # Saves run in the writer thread so the window never waits for the workbook
+        self.writer = TaskWriter(self)
+        self.writer.job_started.connect(self.updateSaveStatus)
+        self.writer.job_finished.connect(self.onJobFinished)
+        self.writer.job_failed.connect(self.onJobFailed)
+        self.save_error = ''
+        # The tasks are loaded in the background and the pages are built on first use,
+        # so the window shows up without waiting for the database
+        self.store: Optional[TaskStore] = None
+        self.tasks = []
+        # Status and date lookups for the today page, kept up to date with the store
+        self.task_index = TaskIndex()
+        # Effort reports, computed again only after the tasks change
+        self.analytics = TaskAnalytics()
+        # Closed tasks moved out of the database, only read when a search or a report includes them
+        self.archive: Optional[TaskArchive] = None
+        self.create_page: Optional[CreateTaskPage] = None
+        self.update_page: Optional[UpdateTaskPage] = None
+        self.setting_page: Optional[SettingPage] = None
+        self.diagnostics_page: Optional[DiagnosticsPage] = None
+        self.reports_page: Optional[ReportsPage] = None
         self.layout = QVBoxLayout()
         self.setLayout(self.layout)
-        self.setFixedSize(600, 200)
+        self.setFixedSize(600, 270)
         # Add heading label
         heading_label = QLabel("<b>Task Tracking</b>")
         heading_label.setStyleSheet("font-size: 16pt")
         self.layout.addWidget(heading_label, stretch=-1,alignment=Qt.AlignmentFlag.AlignHCenter)
         
-        # Add setting button that place on top of heading label to enable change the database
+        # Add setting button that place on top of heading label to enable change the database,
+        # shift-click opens the diagnostics page
         self.setting_btn = QPushButton(self)
         self.setting_btn.setIcon(QIcon("./resources/settings.png"))
         self.setting_btn.setGeometry(560, 10, 30, 30)
@@ -319,13 +337,17 @@ class StartPage(QWidget):
         self.update_task_btn.setFixedHeight(BUTTON_HEIGHT)
         self.update_task_btn.clicked.connect(self.showUpdatePage)
         self.update_task_btn.setStyleSheet(f"background-color: {BOSCHBLUE_COLOR}; color: white")
-        self.update_task_btn.clicked.connect(self.update_page.disableFieldsExceptTask)
         
         self.today_task_btn = QPushButton("TODAY TASK")
         self.today_task_btn.setFixedHeight(BUTTON_HEIGHT)
         self.today_task_btn.setStyleSheet(f"background-color: {BOSCHTURQUOISE_COLOR}; color: white")
         self.today_task_btn.clicked.connect(self.showTodayPage)
         
+        self.reports_btn = QPushButton("REPORTS")
+        self.reports_btn.setFixedHeight(BUTTON_HEIGHT)
+        self.reports_btn.setStyleSheet(f"background-color: {BOSCHTURQUOISE_COLOR}; color: white")
+        self.reports_btn.clicked.connect(self.showReportsPage)
+
         self.raw_data_btn = QPushButton("RAW DATA")
         self.raw_data_btn.setFixedHeight(BUTTON_HEIGHT)
         self.raw_data_btn.setStyleSheet(f"background-color: {BOSCHGRAY_COLOR}; color: white")
@@ -334,32 +356,213 @@ class StartPage(QWidget):
         btn_box.addWidget(self.create_task_btn, 0, 0)
         btn_box.addWidget(self.update_task_btn, 0, 1)
         btn_box.addWidget(self.today_task_btn, 1, 0)
-        btn_box.addWidget(self.raw_data_btn, 1, 1)
+        btn_box.addWidget(self.reports_btn, 1, 1)
+        btn_box.addWidget(self.raw_data_btn, 2, 0, 1, 2)
         
         self.layout.addLayout(btn_box, stretch=1)
+
+        # Show the pending, in-flight and failed saves
+        self.save_status = QLabel()
+        self.layout.addWidget(self.save_status, alignment=Qt.AlignmentFlag.AlignRight)
+        self.setupFileWatcher()
+        self.loadStore()
     
+    def openStore(self) -> TaskStore:
+        store = open_task_store(CONFIG_DATA['database'], CONFIG_DATA['backend'],
+                                flush_changes=CONFIG_DATA['flush_changes'],
+                                flush_interval=CONFIG_DATA['flush_interval'])
+        print(f"Loaded {len(store.tasks)} tasks from {store.load_source} in {store.load_time * 1000:.1f} ms")
+        return store
+
+    def loadStore(self):
+        """Open the task store in the writer thread, the pages are enabled once it is loaded"""
+        self.enableTaskButtons(False)
+        self.writer.submit("load", self.openStore)
+        self.updateSaveStatus()
+
+    def setStore(self, store: TaskStore):
+        self.store = store
+        self.tasks = store.tasks
+        self.writer.attachStore(store)
+        self.task_index.attachStore(store)
+        self.archive = TaskArchive(store.excel_path)
+        self.analytics.attachStore(store, self.archive)
+        self.analytics.include_archive = CONFIG_DATA['include_archive']
+        store.addListener(self.onTaskChanged)
+        if self.create_page is not None:
+            self.create_page.store = store
+        if self.update_page is not None:
+            self.update_page.setStore(store, self.archive)
+        self.watchDatabase()
+        self.enableTaskButtons(True)
+        self.archiveClosedTasks()
+        if CONFIG_DATA['include_archive']:
+            # Read the archives in the writer thread, the update page then finds them read
+            self.writer.submit("archive.read", self.archive.tasks)
+
+    def archiveClosedTasks(self):
+        """Move the old closed tasks to the monthly archives in the writer thread, see archive.py"""
+        # The sqlite backend keeps its tasks out of the Excel database
+        if CONFIG_DATA['archive_days'] and isinstance(self.store, TaskStore):
+            store, days = self.store, CONFIG_DATA['archive_days']
+            self.writer.submit("archive", lambda: archive_tasks(store, days))
+            self.updateSaveStatus()
+
+    def onTaskChanged(self, op, task):
+        # Reloads may happen in the writer thread, whose jobs report through the signals
+        if op != "reload":
+            self.updateSaveStatus()
+
+    def enableTaskButtons(self, enabled: bool):
+        for button in [self.create_task_btn, self.update_task_btn, self.today_task_btn, self.reports_btn, self.raw_data_btn]:
+            button.setEnabled(enabled)
+
+    def updateSaveStatus(self):
+        if self.store is None:
+            if self.save_error:
+                self.save_status.setStyleSheet("color: red")
+                self.save_status.setText(f"Failed to load the tasks: {self.save_error}")
+            else:
+                self.save_status.setStyleSheet("color: gray")
+                self.save_status.setText("Loading tasks...")
+            return
+        pending = self.store.pendingChanges
+        if self.save_error:
+            self.save_status.setStyleSheet("color: red")
+            self.save_status.setText(f"Save failed, {pending} changes kept in the journal: {self.save_error}")
+        elif self.writer.isBusy():
+            self.save_status.setStyleSheet("color: gray")
+            self.save_status.setText("Saving changes...")
+        elif pending:
+            self.save_status.setStyleSheet("color: gray")
+            self.save_status.setText(f"{pending} changes pending")
+        else:
+            self.save_status.setStyleSheet("color: gray")
+            self.save_status.setText("All changes saved")
+
+    def onJobFinished(self, name, result):
+        self.save_error = ''
+        if name == "load":
+            self.setStore(result)
+        elif name == "close":
+            self.loadStore()
+        elif name == "export":
+            os.startfile(os.path.abspath(CONFIG_DATA['database']))
+        elif name == "archive" and result:
+            diff = TaskDiff()
+            diff.removed = [task_item for tasks in result.values() for task_item in tasks]
+            print(f"Archived {len(diff.removed)} closed tasks of {len(result)} months")
+            if self.update_page is not None:
+                self.update_page.applyTaskChanges(diff)
+        self.updateSaveStatus()
+
+    def onJobFailed(self, name, error):
+        print(error)
+        self.save_error = error
+        if name == "close":
+            # The changes left are still in the journal, the new store replays them
+            self.loadStore()
+        self.updateSaveStatus()
+
+    def setupFileWatcher(self):
+        """Watch the database to pick up the changes made outside of the application"""
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(RELOAD_DELAY)
+        self.reload_timer.timeout.connect(self.reloadChangedTasks)
+        self.file_watcher = QFileSystemWatcher(self)
+        self.file_watcher.fileChanged.connect(self.reload_timer.start)
+
+    def watchDatabase(self):
+        if self.file_watcher.files():
+            self.file_watcher.removePaths(self.file_watcher.files())
+        # The Excel database, also with the sqlite backend whose exports can be edited in Excel
+        if self.store.excel_path and os.path.exists(self.store.excel_path):
+            self.file_watcher.addPath(self.store.excel_path)
+
+    def reloadChangedTasks(self):
+        """Apply only the tasks changed on disk, the database is not re-read when it is unchanged"""
+        # Our own save is still running, look again once it is done
+        if self.writer.isBusy():
+            self.reload_timer.start()
+            return
+        if self.store is None:
+            return
+        # Saving by replacing the file drops it from the watcher
+        excel_path = self.store.excel_path
+        if excel_path and excel_path not in self.file_watcher.files() and os.path.exists(excel_path):
+            self.file_watcher.addPath(excel_path)
+        try:
+            diff = self.store.refresh()
+        except RuntimeError as e:
+            # The file may still be written, try again later
+            print(e)
+            self.reload_timer.start()
+            return
+        if diff:
+            print(f"Database changed on disk: {diff}")
+            if self.update_page is not None:
+                self.update_page.applyTaskChanges(diff)
+
     def showSettingPage(self):
+        if QApplication.keyboardModifiers() & Qt.KeyboardModifier.ShiftModifier:
+            self.showDiagnosticsPage()
+            return
+        if self.setting_page is None:
+            with span("page.setting"):
+                self.setting_page = SettingPage()
+            self.setting_page.configuration_changed.connect(self.updateDatabase)
         self.setting_page.show()
+
+    def showDiagnosticsPage(self):
+        if self.diagnostics_page is None:
+            self.diagnostics_page = DiagnosticsPage()
+        self.diagnostics_page.show()
+        self.diagnostics_page.raise_()
         
     def updateDatabase(self):
-        self.tasks = load_task_list(CONFIG_DATA['database'])
-        self.update_page.updateSearchBox(self.tasks)
+        """Close the task store in the writer thread, the new one is opened once it is saved"""
+        for page in [self.create_page, self.update_page]:
+            if page is not None:
+                page.hide()
+        if self.store is None:
+            self.loadStore()
+            return
+        store, self.store = self.store, None
+        store.removeListener(self.onTaskChanged)
+        self.enableTaskButtons(False)
+        self.writer.submit("close", store.close)
+        self.updateSaveStatus()
         
     def openExcelFile(self):
-        os.startfile(os.path.abspath(CONFIG_DATA['database']))
+        # Make sure the latest changes are visible in Excel, the file is opened once written
+        self.writer.submit("export", self.store.exportExcel)
+        self.updateSaveStatus()
         
     def showCreatePage(self):
+        if self.create_page is None:
+            with span("page.create"):
+                self.create_page = CreateTaskPage(self.store)
         self.create_page.show()
 
     def showTodayPage(self):
-        self.today_page = TodayTaskPage(self.tasks)
-        self.today_page.show()
+        with span("page.today") as timing:
+            self.today_page = TodayTaskPage(self.store, self.task_index)
+            self.today_page.show()
+            timing.set(rows=len(self.today_page.tasks))
     
-    def updateTaskList(self, task):
-        self.tasks.append(task)
-        self.update_page.updateSearchBox(self.tasks)
-        
+    def showReportsPage(self):
+        if self.reports_page is None:
+            with span("page.reports"):
+                self.reports_page = ReportsPage(self.analytics)
+        self.reports_page.show()
+        self.reports_page.raise_()
+
     def showUpdatePage(self):
+        if self.update_page is None:
+            with span("page.update", rows=len(self.store.tasks)):
+                self.update_page = UpdateTaskPage(self.store, self.archive)
+        self.update_page.disableFieldsExceptTask()
         self.update_page.show()
           
 class BaseTaskPage(QWidget):
@@ -415,8 +618,8 @@ class BaseTaskPage(QWidget):
         self.task_field.enableSearchBox()
     
     def updateSearchBox(self, item_list):
-        task_list = [item['task'] for item in item_list]
-        self.task_field.setItemList(task_list)
+        # The search box reports the ID of the selected task
+        self.task_field.setItems({item.id: item.task for item in item_list})
         
     def disableSearchBox(self):
         self.task_field.disableSearchBox()
@@ -468,8 +671,9 @@ class BaseTaskPage(QWidget):
 class CreateTaskPage(BaseTaskPage):
     task_created = Signal(dict)
     
-    def __init__(self, parent=None):
+    def __init__(self, store: TaskStore, parent=None):
         super().__init__("Create New Task", parent)
+        self.store = store
         self.setupCreateButton()
         self.disableSearchBox()
     
@@ -485,7 +689,7 @@ class CreateTaskPage(BaseTaskPage):
         """Collect data and create the task."""
         if self.isValidated() == True:
             task_data = self.collectData()
-            add_new_task_item(CONFIG_DATA['database'], task_data)
+            self.store.add(task_data)
             print("Creating Task:", task_data)
             self.cleanAllFields()
             self.task_created.emit(task_data)
@@ -502,19 +706,91 @@ class CreateTaskPage(BaseTaskPage):
 
 # Specific class for updating tasks
 class UpdateTaskPage(BaseTaskPage):
-    def __init__(self, tasks=None, parent=None):
+    # Operation and task record of a change of the task list, see TaskStore.addListener
+    task_changed = Signal(str, object)
+
+    def __init__(self, store: TaskStore, archive: Optional[TaskArchive] = None, parent=None):
         super().__init__("Update Task", parent)
         self.setupAdditionalFields()
         self.setupUpdateButton()
-        self.tasks = tasks if tasks else []
-        self.current_idx = -1
+        self.store = store
+        self.tasks = store.tasks
+        self.archive = archive
+        # Archived tasks in the search box by their key, they can be looked at but not changed;
+        # kept with their items until the fingerprint of the archive changes
+        self.archived = {}
+        self.archived_items = {}
+        self.archived_key = None
+        self.current_id = None
+        self.current_task = None
         self.enableSearchBox()
         self.updateSearchBox(self.tasks)
+        # The search box follows the changes instead of being filled again after each one;
+        # the signal brings the changes made in the writer thread over to the GUI thread
+        self.task_changed.connect(self.onTaskChanged)
+        store.addListener(self.notifyTaskChanged)
         self.task_field.item_selected.connect(self.enableFieldsForEditing)
         self.task_field.item_selected.connect(self.loadTaskItem)
         self.setupConditionalFields()
+        # Form values of the loaded task, to tell the fields changed since
+        self.loaded_data = None
+        self.setupChangeTracking()
         
     
+    def setStore(self, store: TaskStore, archive: Optional[TaskArchive] = None):
+        """Switch to another task store, e.g. after the database is changed"""
+        self.cleanAllFields()
+        self.store.removeListener(self.notifyTaskChanged)
+        self.store = store
+        self.tasks = store.tasks
+        self.archive = archive
+        self.archived_key = None
+        self.updateSearchBox(self.tasks)
+        store.addListener(self.notifyTaskChanged)
+
+    def updateSearchBox(self, item_list):
+        items = {item.id: item.task for item in item_list}
+        if self.archive is not None and CONFIG_DATA['include_archive']:
+            # The archives are only read again once they changed
+            archive_key = self.archive.fingerprint()
+            if archive_key != self.archived_key:
+                # Negative keys never clash with the ID of a task
+                with span("search.archive"):
+                    self.archived = {-key: task_item for key, task_item in enumerate(self.archive.tasks(), start=1)}
+                self.archived_items = {key: f"{task_item.task} (archived)" for key, task_item in self.archived.items()}
+                self.archived_key = archive_key
+            items.update(self.archived_items)
+        else:
+            self.archived, self.archived_items, self.archived_key = {}, {}, None
+        self.task_field.setItems(items)
+
+    def notifyTaskChanged(self, op, task):
+        self.task_changed.emit(op, task)
+
+    def onTaskChanged(self, op, task):
+        """Apply a change of the task list to the search box"""
+        if op == "add":
+            self.task_field.insertItem(task.id, task.task)
+        elif op == "edit":
+            self.task_field.updateItem(task.id, task.task)
+        elif op == "delete":
+            self.task_field.removeItem(task.id)
+        elif op == "reload":
+            self.updateSearchBox(self.tasks)
+    
+    def applyTaskChanges(self, diff):
+        """Follow the tasks changed outside of the application"""
+        if self.current_id is not None:
+            current_task = self.current_task
+            if any(task is current_task for task in diff.removed):
+                self.cleanAllFields()
+                self.disableFieldsExceptTask()
+            else:
+                # The record is kept, but its ID may have been changed in the file
+                self.current_id = current_task.id
+                if any(task is current_task for task in diff.changed):
+                    self.loadTaskItem(self.current_id)
+    
     def setupAdditionalFields(self):
         """Sets up the additional fields specific to updating a task."""
         form_layout: QFormLayout = self.layout.itemAt(1)  # Get the existing form layout
@@ -537,27 +813,69 @@ class UpdateTaskPage(BaseTaskPage):
         self.reason_label.hide()
         self.reason_field.hide()
     
-    def loadTaskItem(self, task_index):
-        """Fill all the field with the task at the corresponding index"""
-        self.current_idx = task_index
-        current_task = self.tasks[task_index]
-        self.do_date_field.setText(current_task["do_date"])
-        self.category_field.selectOption(current_task['category'])
-        self.description_field.setPlainText(current_task['description'])
-        self.assigner_field.selectOption(current_task['assigner'])
-        self.deadline_field.setText(current_task['deadline'])
-        self.status_field.selectOption(current_task['status'])
-        self.estimated_field.setText(str(current_task['estimated_hours']))
-        self.spent_field.setText(str(current_task['spent_hours']))
-        self.result_field.setPlainText(current_task['result'])
-        self.reason_field.setText(current_task['reason'])
+    def loadTaskItem(self, task_id):
+        """Fill all the field with the task selected in the search box"""
+        self.current_id = task_id
+        current_task = self.archived[task_id] if task_id in self.archived else self.store.get(task_id)
+        self.current_task = current_task
+        self.do_date_field.setText(current_task.do_date)
+        self.category_field.selectOption(current_task.category)
+        self.description_field.setPlainText(current_task.description)
+        self.assigner_field.selectOption(current_task.assigner)
+        self.deadline_field.setText(current_task.deadline)
+        self.status_field.selectOption(current_task.status)
+        self.estimated_field.setText(str(current_task.estimated_hours))
+        self.spent_field.setText(str(current_task.spent_hours))
+        self.result_field.setPlainText(current_task.result)
+        self.reason_field.setText(current_task.reason)
+        self.loaded_data = self.collectUpdateData()
+        self.updateDirtyState()
+        # Archived tasks are shown read only
+        if task_id in self.archived:
+            self.disableFieldsExceptTask()
+        self.update_btn.setEnabled(task_id not in self.archived)
+        self.delete_btn.setEnabled(task_id not in self.archived)
     
     def cleanAllFields(self):
         super().cleanAllFields()
-        self.current_idx = -1
+        self.current_id = None
+        self.current_task = None
         self.spent_field.clear()
         self.result_field.clear()
         self.reason_field.clear()
+        self.update_btn.setEnabled(True)
+        self.delete_btn.setEnabled(True)
+        self.loaded_data = None
+        self.updateDirtyState()
+
+    def setupChangeTracking(self):
+        """Count the changed fields on the update button while the task is edited"""
+        for signal in [self.do_date_field.date_input.textChanged, self.category_field.combo_box.currentTextChanged,
+                       self.task_field.item_field.textChanged, self.description_field.textChanged,
+                       self.assigner_field.combo_box.currentTextChanged, self.deadline_field.date_input.textChanged,
+                       self.status_field.combo_box.currentTextChanged, self.estimated_field.textChanged,
+                       self.spent_field.textChanged, self.result_field.textChanged, self.reason_field.textChanged]:
+            signal.connect(self.updateDirtyState)
+        self.updateDirtyState()
+
+    def collectUpdateData(self):
+        """Collect the data of all the fields of the update form."""
+        task_data = self.collectData()
+        task_data["spent_hours"] = self.spent_field.text()
+        task_data["result"] = self.result_field.toPlainText()
+        if self.status_field.currentText() in REASON_STATUS:
+            task_data["reason"] = self.reason_field.text()
+        return task_data
+
+    def changedFields(self):
+        """Fields changed since the task was loaded."""
+        if self.loaded_data is None:
+            return {}
+        return {key: value for key, value in self.collectUpdateData().items() if self.loaded_data.get(key) != value}
+
+    def updateDirtyState(self):
+        changed = len(self.changedFields())
+        self.update_btn.setText(f"UPDATE ({changed})" if changed else "UPDATE")
         
     def closeEvent(self, event: QCloseEvent):
         """Override closeEvent to clear all fields when closing the page."""
@@ -630,19 +948,17 @@ class UpdateTaskPage(BaseTaskPage):
         return is_valid
     
     def updateTask(self):
-        """Collect data and update the task."""
-        task_data = self.collectData()
-        task_data["spent_hours"] = self.spent_field.text()
-        task_data["result"] = self.result_field.toPlainText()
-        if self.status_field.currentText() in REASON_STATUS:
-            task_data["reason"] = self.reason_field.text()
+        """Collect the changed fields and update the task."""
+        # Only the fields changed since the task was loaded are written
+        task_data = self.changedFields()
         
         # Check if the task exists and all mandatory fields are provided
-        if self.current_idx != -1 and self.isValidated():
+        if self.current_id is not None and self.isValidated():
+            if not task_data:
+                self.triggerInfoMessage("No changes", "There is nothing to update.")
+                return
             print("Updating Task:", task_data)
-            edit_task_item(CONFIG_DATA['database'], self.current_idx, task_data)
-            self.tasks[self.current_idx] = task_data
-            self.updateSearchBox(self.tasks)
+            self.store.edit(self.current_id, task_data)
             self.cleanAllFields()
             self.triggerInfoMessage("Success", "Task is updated succesfully!")
             self.disableFieldsExceptTask()
@@ -651,11 +967,9 @@ class UpdateTaskPage(BaseTaskPage):
             
     def deleteTask(self):
         """Delete the current chosen task"""
-        if self.current_idx != -1:
-            print("Deleting Task:", self.tasks[self.current_idx])
-            delete_task_item(CONFIG_DATA['database'], self.current_idx)
-            self.tasks.pop(self.current_idx)
-            self.updateSearchBox(self.tasks)
+        if self.current_id is not None:
+            print("Deleting Task:", self.current_task.to_dict())
+            self.store.delete(self.current_id)
             self.cleanAllFields()
             self.triggerInfoMessage("Success", "Task is deleted succesfully!")
             self.disableFieldsExceptTask()
@@ -663,35 +977,185 @@ class UpdateTaskPage(BaseTaskPage):
             QMessageBox.warning(self, "Delete error", "No task is chosen")
         
 
+class TodayTaskEntry:
+    """A task shown in the today page, with the status, spent hours and reason edited in the page."""
+    __slots__ = ('data', 'status', 'spent_hours', 'reason')
+
+    def __init__(self, data: Task, reason: str = ''):
+        self.data = data
+        self.status = data.status
+        self.spent_hours = str(data.spent_hours)
+        self.reason = reason
+
+    def changes(self):
+        '''Fields edited in the page that differ from the task'''
+        changes = self.data.changed_fields({'status': self.status, 'spent_hours': self.spent_hours})
+        if 'status' in changes and self.status in REASON_STATUS:
+            changes['reason'] = self.reason
+        return changes
+
+class TodayTaskModel(QAbstractTableModel):
+    """
+    Table model of the today tasks.
+
+    The status and spent hours edits are kept in the entries until the page saves
+    them to the store, the other columns are read-only. The rows holding edits are
+    tracked, so a save only looks at them, and the edited cells are shown in bold.
+    """
+    HEADERS = ["Category", "Task", "Status", "Estimated hours", "Spent hours"]
+    STATUS_COLUMN = 2
+    SPENT_HOURS_COLUMN = 4
+    # New text and row of a status changed in the table
+    status_changed = Signal(str, int)
+
+    def __init__(self, tasks, parent=None):
+        super().__init__(parent)
+        self.tasks = tasks
+        self.dirty_rows = set()
+
+    def pendingChanges(self):
+        """Number of edited cells not saved yet."""
+        # The reason goes with the status, it is not a cell of the table
+        return sum(len(self.tasks[row].changes().keys() - {'reason'}) for row in self.dirty_rows)
+
+    def markSaved(self, rows):
+        """Show the given rows as saved."""
+        self.dirty_rows.difference_update(rows)
+        if rows:
+            self.dataChanged.emit(self.index(min(rows), 0), self.index(max(rows), len(self.HEADERS) - 1))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.tasks)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self.tasks[index.row()]
+        column = index.column()
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            if column == 0:
+                return entry.data.category
+            if column == 1:
+                return entry.data.task
+            if column == self.STATUS_COLUMN:
+                return entry.status
+            if column == 3:
+                return str(entry.data.estimated_hours)
+            return entry.spent_hours
+        if role == Qt.ItemDataRole.ToolTipRole and column == 1:
+            return entry.data.description
+        if role == Qt.ItemDataRole.FontRole and index.row() in self.dirty_rows:
+            field = {self.STATUS_COLUMN: 'status', self.SPENT_HOURS_COLUMN: 'spent_hours'}.get(column)
+            if field in entry.changes():
+                font = QFont()
+                font.setBold(True)
+                return font
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.column() in (self.STATUS_COLUMN, self.SPENT_HOURS_COLUMN):
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        entry = self.tasks[index.row()]
+        if index.column() == self.STATUS_COLUMN:
+            if value == entry.status:
+                return False
+            entry.status = value
+            self.dirty_rows.add(index.row())
+            self.dataChanged.emit(index, index)
+            self.status_changed.emit(value, index.row())
+            return True
+        if index.column() == self.SPENT_HOURS_COLUMN:
+            if value == entry.spent_hours:
+                return False
+            entry.spent_hours = value
+            self.dirty_rows.add(index.row())
+            self.dataChanged.emit(index, index)
+            return True
+        return False
+
+class StatusDelegate(QStyledItemDelegate):
+    """Status combobox, created only while a cell is edited."""
+
+    def createEditor(self, parent, option, index):
+        combobox = ComboxWithoutScrolling(parent)
+        combobox.addItems(CONFIG_DATA["status"])
+        # Pass the choice to the model right away, so the reason is asked at once
+        combobox.currentIndexChanged.connect(lambda _: self.commitData.emit(combobox))
+        return combobox
+
+    def setEditorData(self, editor, index):
+        editor.blockSignals(True)
+        editor.setCurrentText(index.data(Qt.ItemDataRole.EditRole))
+        editor.blockSignals(False)
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.currentText())
+
+class SpentHoursDelegate(QStyledItemDelegate):
+    """Spent hours line edit accepting numbers only, created only while a cell is edited."""
+
+    def createEditor(self, parent, option, index):
+        spent_hours = QLineEdit(parent)
+        spent_hours.setStyleSheet("border: none;")
+        double_validator = QDoubleValidator(0.0, 1000.0, 2, spent_hours)
+        double_validator.setNotation(QDoubleValidator.Notation.StandardNotation)
+        spent_hours.setValidator(double_validator)
+        # Pass every keystroke to the model, so the pending change count stays current
+        spent_hours.textEdited.connect(lambda _: self.commitData.emit(spent_hours))
+        return spent_hours
+
+    def setEditorData(self, editor, index):
+        editor.setText(index.data(Qt.ItemDataRole.EditRole))
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.text())
+
 class TodayTaskPage(QWidget):
     layout: QVBoxLayout
     
-    def __init__(self, tasks=None, parent=None):
+    def __init__(self, store: TaskStore, task_index: TaskIndex, parent=None):
         super().__init__(parent)
-        self.tasks = self.filterTasks(tasks)
+        self.store = store
+        self.tasks = self.filterTasks(task_index)
         self.setWindowTitle("Today task")
         self.setupUI()
     
-    def filterTasks(self, tasks):
-        filter_tasks = []
-        for idx, task in enumerate(tasks):
-            if task['status'] == 'IN PROGRESS':
-                filter_tasks.append({'idx': idx, 'data': task, 'reason': ''})
-            elif task['do_date'] != '':
-                task_date = datetime.strptime(task['do_date'], "%Y-%m-%d").date()
-                current_date = datetime.now().date()
-                if task['status'] == 'TO DO' and task_date <= current_date:
-                    filter_tasks.append({'idx': idx, 'data': task, 'reason': ''})
-                elif task_date == current_date:
-                    filter_tasks.append({'idx': idx, 'data': task, 'reason': ''})
-        return filter_tasks
+    def filterTasks(self, task_index: TaskIndex):
+        '''Tasks in progress, to do until today or planned for today, looked up in the index'''
+        with span("today.filter", rows=len(task_index.store.tasks) if task_index.store is not None else 0):
+            return [TodayTaskEntry(task) for task in task_index.todayTasks(datetime.now().date())]
     
     def setupUI(self):
         self.setMinimumSize(700, 300)
-        table_headers = ["Category", "Task", "Status",
-                         "Estimated hours", "Spent hours"]
-        self.table = QTableWidget(len(self.tasks), len(table_headers))
-        self.table.setHorizontalHeaderLabels(table_headers)
+        # The rows are painted from the model and the editors are created only for
+        # the cell being edited, so the page costs the same for any number of tasks
+        with span("today.table_fill", rows=len(self.tasks)):
+            self.model = TodayTaskModel(self.tasks, self)
+        # Queued, so the reason dialog opens once the editor has handed over its value
+        self.model.status_changed.connect(self.checkReasonNeeded, Qt.ConnectionType.QueuedConnection)
+        self.model.dataChanged.connect(self.updateSaveButton)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setItemDelegateForColumn(TodayTaskModel.STATUS_COLUMN, StatusDelegate(self.table))
+        self.table.setItemDelegateForColumn(TodayTaskModel.SPENT_HOURS_COLUMN, SpentHoursDelegate(self.table))
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.CurrentChanged
+                                   | QAbstractItemView.EditTrigger.SelectedClicked
+                                   | QAbstractItemView.EditTrigger.DoubleClicked
+                                   | QAbstractItemView.EditTrigger.EditKeyPressed)
         self.table.horizontalHeader().setStyleSheet("""
             QHeaderView::section {
                 background-color: lightgray;
@@ -700,40 +1164,12 @@ class TodayTaskPage(QWidget):
             }
         """)
         self.table.setWordWrap(True)
-        # Fill some cells with data
-        for row, task in enumerate(self.tasks):
-            self.table.setItem(row, 0, QTableWidgetItem(task['data']['category']))
-            self.table.setItem(row, 1, QTableWidgetItem(task['data']['task']))
-            self.table.item(row, 1).setToolTip(task['data']['description'])
-            for col in range(2):
-                item = self.table.item(row, col)
-                item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-            
-            # Fill the status
-            combobox = ComboxWithoutScrolling()
-            combobox.addItems(CONFIG_DATA["status"])
-            combobox.setCurrentText(task['data']['status'])
-            combobox.currentTextChanged.connect(lambda text, idx=row: self.checkReasonNeeded(text, idx))
-            self.table.setCellWidget(row, 2, combobox)
-            
-            # Fill the estimated hours
-            self.table.setItem(row, 3, QTableWidgetItem(str(task['data']['estimated_hours'])))
-            item = self.table.item(row, 3)
-            item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-            
-            # Fill the spent hours
-            spent_hours = QLineEdit()
-            spent_hours.setStyleSheet("border: none;")
-            spent_hours.setText(str(task['data']['spent_hours']))
-            self.table.setCellWidget(row, 4, spent_hours)
-            double_validator = QDoubleValidator(0.0, 1000.0, 2, self)
-            double_validator.setNotation(QDoubleValidator.Notation.StandardNotation) 
-            spent_hours.setValidator(double_validator)
         
         self.table.horizontalHeader().setStretchLastSection(True)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         # self.table.resizeColumnsToContents()
-        self.table.resizeRowsToContents()
+        # Rows are fitted to their wrapped text as they scroll into view
+        self.table.verticalScrollBar().valueChanged.connect(self.resizeVisibleRows)
         # Create a bold font
         font = QFont()
         font.setBold(True)
@@ -750,29 +1186,71 @@ class TodayTaskPage(QWidget):
         
     def setupSaveButton(self):
         self.save_btn = QPushButton("SAVE")
-        self.save_btn.setStyleSheet(f"background-color: {BOSCHTURQUOISE_COLOR};color: white; font-weight: bold;")
         self.save_btn.setFixedSize(BUTTON_WIDTH, BUTTON_HEIGHT)
         self.save_btn.clicked.connect(self.saveTodayTask)
-        # self.save_btn.setEnabled(True)
-        # self.save_btn.setStyleSheet("""
-        #     QPushButton:disabled {
-        #         background-color: gray;
-        #         color: white;
-        #     }
-        # """)
+        self.save_btn.setStyleSheet(f"""
+            QPushButton {{
+                background-color: {BOSCHTURQUOISE_COLOR};
+                color: white;
+                font-weight: bold;
+            }}
+            QPushButton:disabled {{
+                background-color: gray;
+                color: white;
+            }}
+        """)
         self.layout.addWidget(self.save_btn, alignment=Qt.AlignmentFlag.AlignCenter)
+        self.updateSaveButton()
+
+    def updateSaveButton(self):
+        '''Show the number of edited cells on the save button, which is disabled without any'''
+        pending = self.model.pendingChanges()
+        self.save_btn.setText(f"SAVE ({pending})" if pending else "SAVE")
+        self.save_btn.setEnabled(pending > 0)
     
+    def resizeVisibleRows(self):
+        '''Fit the height of the rows shown in the table to their content'''
+        first_row = self.table.rowAt(0)
+        if first_row < 0:
+            return
+        last_row = self.table.rowAt(self.table.viewport().height())
+        if last_row < 0:
+            last_row = self.model.rowCount() - 1
+        with span("today.resize_rows", rows=last_row - first_row + 1):
+            for row in range(first_row, last_row + 1):
+                self.table.resizeRowToContents(row)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.resizeVisibleRows()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.resizeVisibleRows()
+
     def saveTodayTask(self):
         '''Save today tasks change to the database
         '''
-        for idx, task in enumerate(self.tasks):
-            task['data']['status'] = self.table.cellWidget(idx, 2).currentText()
-            task['data']['spent_hours'] = self.table.cellWidget(idx, 4).text()
-            if task['data']['status'] in REASON_STATUS:
-                task['data']['reason'] = task['reason']
-            print(f"Updating Task: {task['data']}")
-            edit_task_item(CONFIG_DATA['database'], task['idx'], task['data'])
+        # Hand over the value of the cell still being edited
+        current = self.table.currentIndex()
+        editor = self.table.indexWidget(current) if current.isValid() else None
+        if editor is not None:
+            self.table.itemDelegateForIndex(current).setModelData(editor, self.model, current)
+        # Only the edited rows are looked at and only their changed cells are passed on
+        edited_rows = sorted(self.model.dirty_rows)
+        edited = [(self.tasks[row], self.tasks[row].changes()) for row in edited_rows]
+        edited = [(task, changes) for task, changes in edited if changes]
+        # Journaled with a single write
+        self.store.editMany((task.data.id, changes) for task, changes in edited)
+        for task, _ in edited:
+            print(f"Updating Task: {task.data.to_dict()}")
+        saved = len(edited)
+        self.model.markSaved(edited_rows)
+        self.updateSaveButton()
         self.table.clearSelection()
+        if not saved:
+            self.triggerInfoMessage("No changes", "There is nothing to save.")
+            return
         self.triggerInfoMessage("Success", "Today task is updated succesfully!")
     
     def checkReasonNeeded(self, text, index):
@@ -781,17 +1259,16 @@ class TodayTaskPage(QWidget):
         a reason must be provided.
         '''
         if text in REASON_STATUS:
-            current_task = self.tasks[index]['data']
-            dlg = ReasonInputDialog(self, data={'category': current_task['category'],
-                                                'task':  current_task['task'],
-                                                'status': f'<span style="color: red;">{current_task["status"]} -> {text}</span>'})
+            current_task = self.tasks[index].data
+            dlg = ReasonInputDialog(self, data={'category': current_task.category,
+                                                'task':  current_task.task,
+                                                'status': f'<span style="color: red;">{current_task.status} -> {text}</span>'})
             # If the dialog is closed without the reason is provided
             # then revert the status back to its original state
             if dlg.exec() == QDialog.DialogCode.Rejected:
-                combobox: QComboBox = self.table.cellWidget(index, 2)
-                combobox.setCurrentText(current_task["status"])
+                self.model.setData(self.model.index(index, TodayTaskModel.STATUS_COLUMN), current_task.status)
             else:
-                self.tasks[index]['reason'] = dlg.getReason()
+                self.tasks[index].reason = dlg.getReason()
     
     def triggerInfoMessage(self, title, text):
         dialog = QMessageBox(self)
@@ -801,6 +1278,104 @@ class TodayTaskPage(QWidget):
         dialog.show()
         QTimer.singleShot(DIALOG_WAIT_TIME, dialog.close)
 
+class ReportsPage(QWidget):
+    """Estimated against spent hours per category, per assigner and per week, see analytics.py"""
+    layout: QVBoxLayout
+    # Report columns and their headers, the group is the first column
+    COLUMNS = {
+        "tasks": "Tasks",
+        "estimated": "Estimated (h)",
+        "spent": "Spent (h)",
+        "done": "Done",
+        "done_per_week": "Done / week",
+        "accuracy": "Estimate accuracy",
+        "overrun_p50": "Overrun p50 (%)",
+        "overrun_p90": "Overrun p90 (%)",
+    }
+    NUMBER_FORMATS = {"estimated": "{:.1f}", "spent": "{:.1f}", "done_per_week": "{:.1f}",
+                      "accuracy": "{:.2f}", "overrun_p50": "{:+.0f}", "overrun_p90": "{:+.0f}"}
+
+    def __init__(self, analytics: TaskAnalytics, parent=None):
+        super().__init__(parent)
+        self.analytics = analytics
+        # Data key of the report shown, it is only filled again after a change
+        self.shown_key = None
+        self.setWindowTitle("Reports")
+        self.setMinimumSize(900, 500)
+        self.setupUI()
+
+    def setupUI(self):
+        self.layout = QVBoxLayout()
+        heading_label = QLabel("<b>Effort reports</b>")
+        heading_label.setStyleSheet("font-size: 16px;")
+        self.layout.addWidget(heading_label, alignment=Qt.AlignmentFlag.AlignCenter)
+        option_box = QHBoxLayout()
+        self.archive_field = QCheckBox("Include archive")
+        self.archive_field.setChecked(self.analytics.include_archive)
+        self.archive_field.toggled.connect(self.setIncludeArchive)
+        option_box.addWidget(self.archive_field)
+        self.summary_label = QLabel()
+        option_box.addWidget(self.summary_label, stretch=1)
+        refresh_btn = QPushButton("REFRESH")
+        refresh_btn.clicked.connect(self.refresh)
+        option_box.addWidget(refresh_btn)
+        self.layout.addLayout(option_box)
+        self.tabs = QTabWidget()
+        self.category_table = self.createTable("Category")
+        self.assigner_table = self.createTable("Assigning person")
+        self.week_table = self.createTable("Week of")
+        self.tabs.addTab(self.category_table, "By category")
+        self.tabs.addTab(self.assigner_table, "By assigning person")
+        self.tabs.addTab(self.week_table, "By week")
+        self.layout.addWidget(self.tabs, stretch=1)
+        self.setLayout(self.layout)
+
+    def createTable(self, group: str) -> QTableWidget:
+        table = QTableWidget(0, len(self.COLUMNS) + 1)
+        table.setHorizontalHeaderLabels([group] + list(self.COLUMNS.values()))
+        table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setStretchLastSection(True)
+        return table
+
+    def fillTable(self, table: QTableWidget, summary, label=str):
+        table.setRowCount(len(summary))
+        for row, (group, values) in enumerate(zip(summary.index, summary[list(self.COLUMNS)].itertuples(index=False))):
+            table.setItem(row, 0, QTableWidgetItem(label(group)))
+            for column, (name, value) in enumerate(zip(self.COLUMNS, values), start=1):
+                # NaN when nothing was measured, e.g. no done task with spent hours
+                text = "" if value != value else self.NUMBER_FORMATS.get(name, "{:.0f}").format(value)
+                item = QTableWidgetItem(text)
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                table.setItem(row, column, item)
+        table.resizeColumnsToContents()
+
+    def setIncludeArchive(self, included: bool):
+        self.analytics.include_archive = included
+        CONFIG_DATA["include_archive"] = included
+        save_environment()
+        self.refresh()
+
+    def refresh(self):
+        """Show the reports of the current tasks, computed again only if they changed."""
+        key = self.analytics.dataKey()
+        if self.shown_key == key:
+            return
+        report = self.analytics.report()
+        self.shown_key = key
+        archived = f" ({report.archived} archived)" if report.archived else ""
+        self.summary_label.setText(f"{report.tasks} tasks{archived}, the accuracy is measured on "
+                                   f"{report.measured} done tasks with estimated and spent hours")
+        self.fillTable(self.category_table, report.by_category)
+        self.fillTable(self.assigner_table, report.by_assigner)
+        self.fillTable(self.week_table, report.by_week, lambda week: f"{week:%Y-%m-%d}")
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # The setting page may have changed it
+        self.archive_field.setChecked(self.analytics.include_archive)
+        self.refresh()
+
 class SettingPage(QWidget):
     layout: QVBoxLayout
     configuration_changed = Signal()
@@ -808,7 +1383,7 @@ class SettingPage(QWidget):
         super().__init__(parent)
         self.setWindowTitle("Task Tracking")
         self.setMinimumWidth(700)
-        self.setFixedHeight(120)
+        self.setFixedHeight(210)
         if os.path.exists(CONFIG_DATA['database']):
             self.path = os.path.abspath(CONFIG_DATA['database'])
         else:
@@ -822,6 +1397,19 @@ class SettingPage(QWidget):
         config_box = QFormLayout()
         self.database_field = FieldBrowseFileBox(self.path, self)
         config_box.addRow("Database path", self.database_field)
+        self.backend_field = QComboBox()
+        self.backend_field.addItems(BACKENDS)
+        self.backend_field.setCurrentText(CONFIG_DATA['backend'])
+        config_box.addRow("Storage", self.backend_field)
+        self.archive_days_field = QSpinBox()
+        self.archive_days_field.setRange(0, 3650)
+        self.archive_days_field.setSuffix(" days")
+        self.archive_days_field.setSpecialValueText("Never")
+        self.archive_days_field.setValue(CONFIG_DATA['archive_days'])
+        config_box.addRow("Archive closed tasks after", self.archive_days_field)
+        self.include_archive_field = QCheckBox("Search and report on the archived tasks")
+        self.include_archive_field.setChecked(CONFIG_DATA['include_archive'])
+        config_box.addRow("Archive", self.include_archive_field)
         self.layout.addWidget(heading_label, alignment=Qt.AlignmentFlag.AlignCenter)
         self.layout.addLayout(config_box)
         self.setupSaveButton()
@@ -836,10 +1424,118 @@ class SettingPage(QWidget):
     
     def saveConfiguration(self):
         CONFIG_DATA['database'] = self.database_field.getPath()
+        CONFIG_DATA['backend'] = self.backend_field.currentText()
+        CONFIG_DATA['archive_days'] = self.archive_days_field.value()
+        CONFIG_DATA['include_archive'] = self.include_archive_field.isChecked()
         save_environment()
         self.configuration_changed.emit()
         self.hide()
      
+def format_size(size) -> str:
+    """Human readable size of a file, empty when unknown."""
+    if size is None:
+        return ""
+    for unit in ["B", "KiB", "MiB"]:
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+class DiagnosticsPage(QWidget):
+    """Hidden page with the recent timed operations and their p50/p95, see perf.py"""
+    layout: QVBoxLayout
+    RECENT_HEADERS = ["Time", "Operation", "Duration (ms)", "Rows", "File size", "Thread", "Details"]
+    STATS_HEADERS = ["Operation", "Count", "p50 (ms)", "p95 (ms)", "Max (ms)"]
+    # Fields shown in their own column, the others go to the details
+    SHOWN_FIELDS = {"time", "name", "ms", "rows", "size", "thread"}
+    REFRESH_INTERVAL = 2000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Diagnostics")
+        self.setMinimumSize(900, 500)
+        self.setupUI()
+        # Only refreshed while the page is shown
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(self.REFRESH_INTERVAL)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def setupUI(self):
+        self.layout = QVBoxLayout()
+        heading_label = QLabel("<b>Diagnostics</b>")
+        heading_label.setStyleSheet("font-size: 16px;")
+        self.layout.addWidget(heading_label, alignment=Qt.AlignmentFlag.AlignCenter)
+        option_box = QHBoxLayout()
+        self.record_field = QCheckBox("Record timings")
+        self.record_field.setChecked(perf.is_enabled())
+        self.record_field.toggled.connect(self.setRecording)
+        option_box.addWidget(self.record_field)
+        self.log_label = QLabel()
+        option_box.addWidget(self.log_label, stretch=1)
+        refresh_btn = QPushButton("REFRESH")
+        refresh_btn.clicked.connect(self.refresh)
+        option_box.addWidget(refresh_btn)
+        self.layout.addLayout(option_box)
+        self.stats_table = self.createTable(self.STATS_HEADERS)
+        self.recent_table = self.createTable(self.RECENT_HEADERS)
+        self.layout.addWidget(QLabel("Operations"))
+        self.layout.addWidget(self.stats_table, stretch=1)
+        self.layout.addWidget(QLabel("Recent operations"))
+        self.layout.addWidget(self.recent_table, stretch=2)
+        self.setLayout(self.layout)
+
+    def createTable(self, headers) -> QTableWidget:
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setStretchLastSection(True)
+        return table
+
+    def setRecording(self, enabled: bool):
+        if enabled:
+            perf.enable(perf.log_path_for(CONFIG_DATA['database']))
+        else:
+            perf.disable()
+        CONFIG_DATA["diagnostics"] = enabled
+        save_environment()
+        self.refresh()
+
+    def fillTable(self, table: QTableWidget, rows):
+        table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column and value.replace(".", "", 1).isdigit():
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                table.setItem(row, column, item)
+
+    def refresh(self):
+        """Show the latest spans and aggregates."""
+        if not perf.is_enabled():
+            self.log_label.setText("Timings are not recorded")
+        else:
+            self.log_label.setText(f"Log: {perf.log_path() or 'in memory only'}")
+        self.fillTable(self.stats_table, [
+            [name, str(values["count"]), f"{values['p50']:.1f}", f"{values['p95']:.1f}", f"{values['max']:.1f}"]
+            for name, values in sorted(perf.stats().items(), key=lambda item: -item[1]["p95"])])
+        self.fillTable(self.recent_table, [
+            [datetime.fromtimestamp(entry["time"]).strftime("%H:%M:%S.%f")[:-3], entry["name"], f"{entry['ms']:.1f}",
+             str(entry.get("rows", "")), format_size(entry.get("size")), entry["thread"],
+             ", ".join(f"{key}={value}" for key, value in entry.items() if key not in self.SHOWN_FIELDS)]
+            for entry in perf.recent()])
+        self.stats_table.resizeColumnsToContents()
+        self.recent_table.resizeColumnsToContents()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.refresh_timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.refresh_timer.stop()
+
 class TaskTracking(QMainWindow):
     
     def __init__(self):
@@ -853,6 +1549,13 @@ class TaskTracking(QMainWindow):
         self.start_page = StartPage(self)
         self.setCentralWidget(self.start_page)
         self._move2center()
+
+    def closeEvent(self, event: QCloseEvent):
+        """Write the pending changes to the database before quitting."""
+        self.start_page.writer.stop()
+        if self.start_page.store is not None:
+            self.start_page.store.close()
+        event.accept()
          
     def _move2center(self):
          # Get the screen's geometry
@@ -868,23 +1571,21 @@ class TaskTracking(QMainWindow):
         # Move the window to the calculated position
         self.move(x, y)
 
-def load_environment():
-    global CONFIG_DATA
-    # If no data file is found use the constant in source file
-    if not os.path.exists(TASK_DATA_PATH):
-        return 0
-    with open(TASK_DATA_PATH, 'r') as task_data_file:
-        CONFIG_DATA = json.load(task_data_file)
-
-def save_environment():
-    global CONFIG_DATA
-    with open(TASK_DATA_PATH, 'w') as task_data_file:
-        json.dump(CONFIG_DATA, task_data_file)
-
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Track the tasks of an Excel database.")
+    parser.add_argument("--diagnostics", action="store_true",
+                        help="record the timings of the slow operations, see perf.py")
+    args = parser.parse_args()
     load_environment()
+    if CONFIG_DATA["diagnostics"] or args.diagnostics:
+        perf.enable(perf.log_path_for(CONFIG_DATA['database']))
     app = QApplication()
     app.setWindowIcon(QIcon('./resources/app_icon.png'))
     main_window = TaskTracking()
     main_window.show()
+    if CONFIG_DATA["stall_threshold"]:
+        # Reports where the window froze, see watchdog.py
+        watchdog = UiWatchdog(CONFIG_DATA["stall_threshold"], report_path_for(CONFIG_DATA['database']))
+        watchdog.start()
+        app.aboutToQuit.connect(watchdog.stop)
     sys.exit(app.exec())
\ No newline at end of file
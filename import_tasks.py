@@ -0,0 +1,283 @@
+"""
+Bulk import of tasks from CSV or JSON lines files, without the GUI.
+
+Run `python import_tasks.py tasks.csv` to add the tasks of a file to the database of
+the settings, or pass --database for another one. The columns are the headers of the
+database ("Do Date", "Category task", ...) or the field names ("do_date", "category",
+...). Every row is checked like the create and update pages do and against the
+categories, assigners and statuses of the settings. The valid rows are added with a
+single save of the database, the rejected ones are reported with their line number.
+
+Close the application before importing, its store would not see the new tasks.
+"""
+from config import CONFIG_DATA, REASON_STATUS, TASK_DATA_PATH, load_environment
+from store import BACKENDS, open_task_store
+from task import COLUMN_MAPPING, ID_FIELD, ID_HEADER, INTERNAL_COLUMN
+from task_index import parse_date
+from typing import Dict, Iterator, List, Optional, Tuple
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+FORMATS = ["csv", "jsonl"]
+# Fields the create page requires
+MANDATORY_FIELDS = ["do_date", "task", "estimated_hours"]
+# Input columns for every task field: the database headers and the field names
+FIELD_OF_COLUMN = {**COLUMN_MAPPING, **{field: field for field in INTERNAL_COLUMN}}
+# Task IDs are given by the store, ID columns of the input are ignored
+IGNORED_COLUMNS = {ID_HEADER, ID_FIELD}
+# Same range as the hour fields of the GUI
+MAX_HOURS = 1000.0
+# Rejected rows printed by the command, all of them go to --rejects
+REPORTED_REJECTS = 20
+
+def detect_format(path: str) -> str:
+    """
+    Guess the format of an input file from its extension.
+
+    Args:
+        path (str): Path of the input file.
+
+    Returns:
+        str: One of FORMATS, "jsonl" for .jsonl, .ndjson and .json files, "csv" otherwise.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    return "jsonl" if extension in (".jsonl", ".ndjson", ".json") else "csv"
+
+def read_csv_rows(path: str) -> Iterator[Tuple[int, Optional[Dict]]]:
+    """
+    Stream the rows of a CSV file with a header line.
+
+    Args:
+        path (str): Path of the CSV file.
+
+    Returns:
+        Iterator[Tuple[int, Optional[Dict]]]: Line number and values by column of every row.
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as csv_file:
+        reader = csv.DictReader(csv_file)
+        for row in reader:
+            # Cells past the header end up under None
+            row.pop(None, None)
+            yield reader.line_num, row
+
+def read_jsonl_rows(path: str) -> Iterator[Tuple[int, Optional[Dict]]]:
+    """
+    Stream the objects of a JSON lines file, one task per line.
+
+    Args:
+        path (str): Path of the JSON lines file.
+
+    Returns:
+        Iterator[Tuple[int, Optional[Dict]]]: Line number and values by column of every
+        non-empty line, None for the lines that are not a JSON object.
+    """
+    with open(path, "r", encoding="utf-8-sig") as json_file:
+        for line_num, line in enumerate(json_file, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                row = None
+            yield line_num, row if isinstance(row, dict) else None
+
+READERS = {"csv": read_csv_rows, "jsonl": read_jsonl_rows}
+
+def _hours(value) -> float:
+    # Hours as written by the GUI, raises ValueError for other values
+    hours = float(value)
+    if not 0 <= hours <= MAX_HOURS:
+        raise ValueError(value)
+    return int(hours) if hours.is_integer() else hours
+
+def normalize_row(row: Dict) -> Tuple[Dict[str, Optional[str]], List[str]]:
+    """
+    Map the columns of an input row to task fields.
+
+    Text is stripped, missing fields are empty like in the create page.
+
+    Args:
+        row (Dict): Values by column.
+
+    Returns:
+        Tuple[Dict[str, Optional[str]], List[str]]: The task data and the unknown columns.
+    """
+    data = {field: "" for field in INTERNAL_COLUMN}
+    unknown = []
+    for column, value in row.items():
+        field = FIELD_OF_COLUMN.get(str(column).strip())
+        if field is None:
+            if column not in IGNORED_COLUMNS:
+                unknown.append(column)
+            continue
+        data[field] = "" if value is None else str(value).strip()
+    return data, unknown
+
+def validate_task(data: Dict[str, Optional[str]], config: Dict = CONFIG_DATA) -> List[str]:
+    """
+    Check task data with the rules of the create and update pages and normalize it.
+
+    Dates become "%Y-%m-%d" text, hours become numbers and an empty status becomes the
+    first status of the settings.
+
+    Args:
+        data (Dict[str, Optional[str]]): The task data, updated in place.
+        config (Dict): The settings holding the allowed categories, assigners and statuses.
+
+    Returns:
+        List[str]: The problems of the task, empty if it can be added.
+    """
+    errors = [f"missing {field}" for field in MANDATORY_FIELDS if not data.get(field)]
+    for field in ("do_date", "deadline"):
+        if data.get(field):
+            day = parse_date(data[field])
+            if day is None:
+                errors.append(f"{field} is not a date: {data[field]}")
+            else:
+                data[field] = day.isoformat()
+    for field in ("estimated_hours", "spent_hours"):
+        if data.get(field):
+            try:
+                data[field] = _hours(data[field])
+            except ValueError:
+                errors.append(f"{field} is not a number of hours: {data[field]}")
+    if not data.get("status"):
+        data["status"] = config["status"][0]
+    for field in ("category", "assigner", "status"):
+        if data.get(field) and data[field] not in config[field]:
+            errors.append(f"unknown {field}: {data[field]}")
+    if data["status"] == "DONE" and data.get("spent_hours") in ("", None):
+        errors.append("missing spent_hours for a DONE task")
+    if data["status"] in REASON_STATUS and not data.get("reason"):
+        errors.append(f"missing reason for a {data['status']} task")
+    return errors
+
+class ImportReport:
+    """Outcome of an import: the added tasks, the rejected rows and the time spent."""
+
+    def __init__(self):
+        self.rows = 0
+        self.task_ids: List[int] = []
+        # Line number, input row and problems of every rejected row
+        self.rejected: List[Tuple[int, Optional[Dict], List[str]]] = []
+        self.unknown_columns: List[str] = []
+        self.read_time = 0.0
+        self.write_time = 0.0
+
+    @property
+    def rowsPerSecond(self) -> float:
+        total = self.read_time + self.write_time
+        return self.rows / total if total else 0.0
+
+    def __repr__(self) -> str:
+        return f"ImportReport(rows={self.rows}, imported={len(self.task_ids)}, rejected={len(self.rejected)})"
+
+def import_tasks(path: str, store, fmt: Optional[str] = None, config: Dict = CONFIG_DATA,
+                 dry_run: bool = False) -> ImportReport:
+    """
+    Add the valid tasks of an input file to a task store and write them in one pass.
+
+    Args:
+        path (str): Path of the CSV or JSON lines file.
+        store (TaskStore or SqliteTaskStore): The opened task store, None for a dry run.
+        fmt (Optional[str]): One of FORMATS, guessed from the extension by default.
+        config (Dict): The settings holding the allowed categories, assigners and statuses.
+        dry_run (bool): Only check the rows, the store is left untouched.
+
+    Returns:
+        ImportReport: The added task IDs and the rejected rows.
+    """
+    report = ImportReport()
+    accepted = []
+    unknown_columns = {}
+    start = time.perf_counter()
+    for line_num, row in READERS[fmt or detect_format(path)](path):
+        report.rows += 1
+        if row is None:
+            report.rejected.append((line_num, None, ["not a JSON object"]))
+            continue
+        data, unknown = normalize_row(row)
+        unknown_columns.update(dict.fromkeys(unknown))
+        errors = validate_task(data, config)
+        if errors:
+            report.rejected.append((line_num, row, errors))
+        else:
+            accepted.append(data)
+    report.unknown_columns = list(unknown_columns)
+    report.read_time = time.perf_counter() - start
+    if dry_run or not accepted:
+        return report
+
+    start = time.perf_counter()
+    report.task_ids = store.addMany(accepted)
+    store.flush()
+    report.write_time = time.perf_counter() - start
+    return report
+
+def write_rejects(path: str, report: ImportReport):
+    """
+    Write the rejected rows as JSON lines, with their line number and problems.
+
+    Args:
+        path (str): Path of the output file.
+        report (ImportReport): The import report.
+    """
+    with open(path, "w", encoding="utf-8") as rejects_file:
+        for line_num, row, errors in report.rejected:
+            rejects_file.write(json.dumps({"line": line_num, "errors": errors, "row": row}, default=str) + "\n")
+
+def print_report(report: ImportReport, dry_run: bool = False):
+    for line_num, _, errors in report.rejected[:REPORTED_REJECTS]:
+        print(f"  line {line_num}: {'; '.join(errors)}")
+    if len(report.rejected) > REPORTED_REJECTS:
+        print(f"  ... {len(report.rejected) - REPORTED_REJECTS} more rejected rows")
+    if report.unknown_columns:
+        print(f"Ignored unknown columns: {', '.join(map(str, report.unknown_columns))}")
+    action = "Checked" if dry_run else f"Imported {len(report.task_ids)} of"
+    print(f"{action} {report.rows} rows, {len(report.rejected)} rejected, "
+          f"read {report.read_time:.2f} s, write {report.write_time:.2f} s, "
+          f"{report.rowsPerSecond:.0f} rows/s")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Import tasks from a CSV or JSON lines file")
+    parser.add_argument("input", help="CSV or JSON lines file, one task per row")
+    parser.add_argument("--format", choices=FORMATS, help="Input format, guessed from the extension by default")
+    parser.add_argument("--settings", default=TASK_DATA_PATH, help="Data file of the application settings")
+    parser.add_argument("--database", help="Excel database, the one of the settings by default")
+    parser.add_argument("--backend", choices=BACKENDS, help="Storage backend, the one of the settings by default")
+    parser.add_argument("--rejects", help="Write the rejected rows to this JSON lines file")
+    parser.add_argument("--dry-run", action="store_true", help="Only check the rows")
+    args = parser.parse_args(argv)
+
+    load_environment(args.settings)
+    database = args.database or CONFIG_DATA["database"]
+    if not os.path.exists(args.input):
+        parser.error(f"No such input file: {args.input}")
+    if not os.path.exists(database):
+        parser.error(f"No such database: {database}")
+
+    if args.dry_run:
+        # Only the input is read, opening the store would write the IDs and the cache of the database
+        report = import_tasks(args.input, None, args.format, dry_run=True)
+    else:
+        # Written once at the end, no timer or threshold flushes in between
+        store = open_task_store(database, args.backend or CONFIG_DATA["backend"],
+                                flush_changes=0, flush_interval=None)
+        try:
+            report = import_tasks(args.input, store, args.format)
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            return 1
+        finally:
+            store.close()
+    if args.rejects:
+        write_rejects(args.rejects, report)
+    print_report(report, args.dry_run)
+    return 1 if report.rejected else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+from perf import span
+from typing import Dict, List, Optional, Tuple
+from xlsx_reader import read_custom_properties
+import json
+import os
+import threading
+
+JOURNAL_SUFFIX = ".journal"
+# Custom document property of the workbook holding the last journal entry compacted into it
+SEQ_PROPERTY = "task_journal_seq"
+
+def journal_path(path: str) -> str:
+    """
+    Return the path of the journal belonging to a database.
+
+    Args:
+        path (str): Path of the Excel database.
+
+    Returns:
+        str: Path of the journal file next to the database.
+    """
+    return path + JOURNAL_SUFFIX
+
+def get_compacted_seq(wb) -> int:
+    """
+    Return the sequence number of the last journal entry already saved in the workbook.
+
+    Args:
+        wb (Workbook): The opened workbook.
+
+    Returns:
+        int: The sequence number, 0 if the workbook never received journal entries.
+    """
+    if SEQ_PROPERTY in wb.custom_doc_props.names:
+        return int(wb.custom_doc_props[SEQ_PROPERTY].value)
+    return 0
+
+def read_compacted_seq(path: str) -> int:
+    """
+    Return the sequence number of the last journal entry saved in a workbook file,
+    without loading the workbook.
+
+    Args:
+        path (str): Path of the Excel database.
+
+    Returns:
+        int: The sequence number, 0 if the workbook never received journal entries.
+    """
+    return int(read_custom_properties(path).get(SEQ_PROPERTY) or 0)
+
+def set_compacted_seq(wb, seq: int):
+    """
+    Record in the workbook the sequence number of the last journal entry saved in it.
+
+    Args:
+        wb (Workbook): The opened workbook.
+        seq (int): The sequence number.
+    """
+    from openpyxl.packaging.custom import IntProperty
+    if SEQ_PROPERTY in wb.custom_doc_props.names:
+        wb.custom_doc_props[SEQ_PROPERTY].value = seq
+    else:
+        wb.custom_doc_props.append(IntProperty(name=SEQ_PROPERTY, value=seq))
+
+def save_workbook_atomic(wb, path: str):
+    """
+    Save the workbook to a temporary file and move it over the database in one step,
+    so a crash never leaves a half written database behind.
+
+    Args:
+        wb (Workbook): The workbook to save.
+        path (str): Path of the Excel database.
+    """
+    tmp_path = path + ".tmp"
+    with span("workbook.save", path=tmp_path):
+        wb.save(tmp_path)
+    os.replace(tmp_path, path)
+
+class TaskJournal:
+    """
+    Append-only journal of task changes stored as JSON lines next to the database.
+
+    Every entry holds a sequence number, the operation ("add", "edit" or "delete"),
+    the ID of the task it applies to and the changed fields. Entries are written and
+    synced to disk one by one, so a change is durable as soon as append returns.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open the journal, reading the sequence number of its last entry.
+
+        Args:
+            path (str): Path of the journal file.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._repair()
+        entries = self.entries()
+        self.seq = entries[-1]["seq"] if entries else 0
+
+    def _repair(self):
+        """Cut off a last line left incomplete by a crash, so new entries start on a fresh line."""
+        if not os.path.exists(self.path):
+            return
+        valid_length = 0
+        with open(self.path, "rb") as journal_file:
+            for line in journal_file:
+                try:
+                    json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                valid_length += len(line)
+        if valid_length < os.path.getsize(self.path):
+            os.truncate(self.path, valid_length)
+
+    def entries(self, after_seq: int = 0) -> List[Dict]:
+        """
+        Read the journal entries.
+
+        Reading stops at a line cut off by a crash while appending.
+
+        Args:
+            after_seq (int): Only return the entries with a greater sequence number.
+
+        Returns:
+            List[Dict]: The journal entries in order.
+        """
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with open(self.path, "r", encoding="utf-8") as journal_file:
+            for line in journal_file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if entry["seq"] > after_seq:
+                    entries.append(entry)
+        return entries
+
+    def append(self, op: str, task_id: int, data: Optional[Dict] = None) -> int:
+        """
+        Append a change to the journal.
+
+        Args:
+            op (str): The operation, "add", "edit" or "delete".
+            task_id (int): ID of the task item.
+            data (Optional[Dict]): The fields of the task item for "add" and "edit".
+
+        Returns:
+            int: Sequence number of the entry.
+        """
+        with self._lock:
+            self.seq += 1
+            entry = {"seq": self.seq, "op": op, "id": task_id, "data": data}
+            line = json.dumps(entry, default=str) + "\n"
+            with open(self.path, "a", encoding="utf-8") as journal_file:
+                journal_file.write(line)
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+            return self.seq
+
+    def extend(self, op: str, changes: List[Tuple[int, Optional[Dict]]]) -> int:
+        """
+        Append several changes of the same operation, written and synced to disk once.
+
+        Args:
+            op (str): The operation, "add", "edit" or "delete".
+            changes (List[Tuple[int, Optional[Dict]]]): ID of the task item and its fields
+                of every change.
+
+        Returns:
+            int: Sequence number of the last entry.
+        """
+        with self._lock:
+            lines = []
+            for task_id, data in changes:
+                self.seq += 1
+                lines.append(json.dumps({"seq": self.seq, "op": op, "id": task_id, "data": data}, default=str) + "\n")
+            with open(self.path, "a", encoding="utf-8") as journal_file:
+                journal_file.writelines(lines)
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+            return self.seq
+
+    def truncate(self, upto_seq: int):
+        """
+        Drop the entries already compacted into the database.
+
+        Args:
+            upto_seq (int): Sequence number of the last compacted entry.
+        """
+        with self._lock:
+            remaining = self.entries(after_seq=upto_seq)
+            if not remaining:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+                return
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as journal_file:
+                for entry in remaining:
+                    journal_file.write(json.dumps(entry, default=str) + "\n")
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,243 @@
+"""
+Timing spans of the slow operations, to find out what made the application freeze.
+
+Wrap an operation in `with span("workbook.save", path=path):` or decorate it with
+`@timed("store.load")`. While recording is enabled every span is appended to a
+rotating JSON lines log and kept in memory for the diagnostics window, together with
+p50/p95 aggregates per operation. A span given the path of a file records its size.
+While recording is disabled span returns a shared do-nothing object, so the
+instrumented code pays a function call and nothing else.
+"""
+from collections import deque
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+from typing import Callable, Deque, Dict, List, Optional
+import json
+import logging
+import os
+import threading
+import time
+
+# Name of the log, written next to the database, see log_path_for
+PERF_LOG_NAME = "perf.jsonl"
+# The log is rotated at this size, keeping this many older files
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+# Spans kept in memory for the diagnostics window
+RECENT_SPANS = 500
+# Durations kept per operation for the aggregates
+STATS_WINDOW = 200
+
+_enabled = False
+_logger = logging.getLogger("tasktracking.perf")
+_logger.propagate = False
+_lock = threading.Lock()
+_recent: Deque[Dict] = deque(maxlen=RECENT_SPANS)
+_durations: Dict[str, Deque[float]] = {}
+_counts: Dict[str, int] = {}
+
+class Span:
+    """A timed operation, recorded when the with block is left."""
+    __slots__ = ("name", "fields", "start")
+
+    def __init__(self, name: str, fields: Dict):
+        self.name = name
+        self.fields = fields
+        self.start = 0.0
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.fields["error"] = exc_type.__name__
+        record(self.name, duration, self.fields)
+        return False
+
+    def set(self, **fields):
+        """Add fields only known once the operation ran, e.g. the number of rows."""
+        self.fields.update(fields)
+
+class _NullSpan:
+    # Returned while recording is disabled
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def set(self, **fields):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+def span(name: str, **fields):
+    """
+    Time the operation of a with block.
+
+    Args:
+        name (str): Name of the operation, e.g. "workbook.load".
+        **fields: Details recorded with the duration, a path also records the file size.
+
+    Returns:
+        Span: The span, with a set method to add fields while it runs.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name, fields)
+
+def timed(name: str) -> Callable:
+    """
+    Decorate a function to time every call with a span.
+
+    Args:
+        name (str): Name of the operation.
+
+    Returns:
+        Callable: The decorator.
+    """
+    def decorate(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with Span(name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def record(name: str, duration: float, fields: Optional[Dict] = None):
+    """
+    Record the duration of an operation timed elsewhere.
+
+    Args:
+        name (str): Name of the operation.
+        duration (float): Duration in seconds.
+        fields (Optional[Dict]): Details of the operation.
+    """
+    if not _enabled:
+        return
+    entry = {"time": time.time(), "name": name, "ms": round(duration * 1000, 3),
+             "thread": threading.current_thread().name}
+    if fields:
+        entry.update(fields)
+        path = fields.get("path")
+        if path:
+            try:
+                entry["size"] = os.path.getsize(path)
+            except OSError:
+                pass
+    with _lock:
+        _recent.append(entry)
+        if name not in _durations:
+            _durations[name] = deque(maxlen=STATS_WINDOW)
+        _durations[name].append(duration)
+        _counts[name] = _counts.get(name, 0) + 1
+    if _logger.handlers:
+        _logger.info(json.dumps(entry, default=str))
+
+def log_path_for(database: str) -> str:
+    """
+    Return the path of the log of a database, in the folder of the database.
+
+    Args:
+        database (str): Path of the database.
+
+    Returns:
+        str: Path of the JSON lines log.
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(database)), PERF_LOG_NAME)
+
+def enable(path: Optional[str] = None, max_bytes: int = LOG_MAX_BYTES, backups: int = LOG_BACKUPS):
+    """
+    Start recording the spans.
+
+    Args:
+        path (Optional[str]): Path of the JSON lines log, None to keep the spans in memory only.
+        max_bytes (int): Size at which the log is rotated.
+        backups (int): Number of rotated logs to keep.
+    """
+    global _enabled
+    for handler in list(_logger.handlers):
+        _logger.removeHandler(handler)
+        handler.close()
+    if path:
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _logger.addHandler(handler)
+        _logger.setLevel(logging.INFO)
+    _enabled = True
+
+def disable():
+    """Stop recording the spans, the ones recorded so far stay available."""
+    global _enabled
+    _enabled = False
+    for handler in list(_logger.handlers):
+        _logger.removeHandler(handler)
+        handler.close()
+
+def is_enabled() -> bool:
+    return _enabled
+
+def log_path() -> Optional[str]:
+    """Return the path of the log, None when the spans are not written to a file."""
+    handler = next(iter(_logger.handlers), None)
+    return handler.baseFilename if handler is not None else None
+
+def recent(limit: Optional[int] = None) -> List[Dict]:
+    """
+    Return the last recorded spans.
+
+    Args:
+        limit (Optional[int]): Maximum number of spans, all the kept ones by default.
+
+    Returns:
+        List[Dict]: The spans, newest first.
+    """
+    with _lock:
+        entries = list(_recent)
+    entries.reverse()
+    return entries[:limit] if limit is not None else entries
+
+def percentile(values: List[float], fraction: float) -> float:
+    """
+    Return a percentile of values, the nearest rank.
+
+    Args:
+        values (List[float]): The values, sorted.
+        fraction (float): The percentile between 0 and 1, e.g. 0.95.
+
+    Returns:
+        float: The value, 0 without values.
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, round(fraction * len(values) + 0.5) - 1))]
+
+def stats() -> Dict[str, Dict[str, float]]:
+    """
+    Return the aggregates of every operation over its last STATS_WINDOW spans.
+
+    Returns:
+        Dict[str, Dict[str, float]]: By operation name, the number of spans recorded
+        and the p50, p95 and max durations in milliseconds.
+    """
+    with _lock:
+        windows = {name: sorted(durations) for name, durations in _durations.items()}
+        counts = dict(_counts)
+    return {name: {"count": counts[name],
+                   "p50": percentile(durations, 0.5) * 1000,
+                   "p95": percentile(durations, 0.95) * 1000,
+                   "max": durations[-1] * 1000}
+            for name, durations in sorted(windows.items())}
+
+def reset():
+    """Forget the spans kept in memory."""
+    with _lock:
+        _recent.clear()
+        _durations.clear()
+        _counts.clear()
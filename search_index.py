@@ -0,0 +1,206 @@
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from heapq import nsmallest
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+import re
+
+# Maximum number of results of a search
+SEARCH_LIMIT = 200
+# Similarity (difflib ratio) of a word to a query word for a fuzzy match
+FUZZY_RATIO = 0.75
+_WORD_RE = re.compile(r"\w+")
+# Sorts after any text starting with the same characters
+_TEXT_END = "\U0010ffff"
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Return the three character sequences of a text.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        Set[str]: The trigrams, empty for texts shorter than three characters.
+    """
+    return {text[idx:idx + 3] for idx in range(len(text) - 2)}
+
+class SearchIndex:
+    """
+    Inverted index over item names, e.g. the task names of a search box.
+
+    Items are identified by a sortable key, like their position in the item list,
+    which also orders the results of equal rank. A query is matched in four ranks:
+    names starting with it, names holding a word starting with it, names holding it
+    and, to forgive typos, names holding for every query word a word close to it. The
+    ranks come from sorted name and word lists and trigram indexes of the names and of
+    their words, so a search only looks at the matching names.
+    """
+
+    def __init__(self, names: Iterable[Tuple[Hashable, str]] = ()):
+        """
+        Build the index.
+
+        Args:
+            names (Iterable[Tuple[Hashable, str]]): Key and name of every item.
+        """
+        self._lowered: Dict[Hashable, str] = {}
+        for key, name in names:
+            self._lowered[key] = str(name).lower()
+        # Sorted (text, key) pairs of the names and of their words, for prefix lookups
+        self._prefixes: List[Tuple[str, Hashable]] = sorted((text, key) for key, text in self._lowered.items())
+        self._words: List[Tuple[str, Hashable]] = sorted((word, key) for key, text in self._lowered.items()
+                                                         for word in set(_WORD_RE.findall(text)))
+        postings = defaultdict(set)
+        for key, text in self._lowered.items():
+            for gram in trigrams(text):
+                postings[gram].add(key)
+        self._trigrams: Dict[str, Set[Hashable]] = dict(postings)
+        # Number of names holding every word and trigrams of the words, for the fuzzy matches
+        self._vocabulary: Dict[str, int] = dict(Counter(word for word, _ in self._words))
+        self._word_grams: Dict[str, Set[str]] = {}
+        for word in self._vocabulary:
+            if not word.isdigit():
+                for gram in trigrams(f" {word} "):
+                    self._word_grams.setdefault(gram, set()).add(word)
+
+    def __len__(self) -> int:
+        return len(self._lowered)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._lowered
+
+    def insert(self, key: Hashable, name: str):
+        """
+        Add an item, or replace the name of an item already in the index.
+
+        Args:
+            key (Hashable): Key of the item.
+            name (str): Name of the item.
+        """
+        if key in self._lowered:
+            self.remove(key)
+        text = str(name).lower()
+        self._lowered[key] = text
+        insort(self._prefixes, (text, key))
+        for word in set(_WORD_RE.findall(text)):
+            insort(self._words, (word, key))
+            self._addWord(word)
+        for gram in trigrams(text):
+            self._trigrams.setdefault(gram, set()).add(key)
+
+    def remove(self, key: Hashable):
+        """
+        Remove an item.
+
+        Args:
+            key (Hashable): Key of the item.
+        """
+        text = self._lowered.pop(key, None)
+        if text is None:
+            return
+        del self._prefixes[bisect_left(self._prefixes, (text, key))]
+        for word in set(_WORD_RE.findall(text)):
+            del self._words[bisect_left(self._words, (word, key))]
+            self._removeWord(word)
+        for gram in trigrams(text):
+            postings = self._trigrams[gram]
+            postings.discard(key)
+            if not postings:
+                del self._trigrams[gram]
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT) -> List[Hashable]:
+        """
+        Find the items matching a query.
+
+        Args:
+            query (str): The text to look for, case insensitive.
+            limit (int): Maximum number of results.
+
+        Returns:
+            List[Hashable]: Keys of the matching items, best first. All the keys in
+            order for an empty query.
+        """
+        text = query.strip().lower()
+        if not text:
+            return sorted(self._lowered)
+        found: Dict[Hashable, None] = {}
+
+        def take(keys: Iterable[Hashable]) -> bool:
+            # Adds the best keys of a rank, tells whether the results are complete
+            for key in nsmallest(limit, keys):
+                found.setdefault(key, None)
+                if len(found) >= limit:
+                    return True
+            return False
+
+        if take(key for _, key in self._prefixRange(self._prefixes, text)):
+            return list(found)
+        if take(key for _, key in self._prefixRange(self._words, text)):
+            return list(found)
+        grams = trigrams(text)
+        if grams:
+            postings = sorted((self._trigrams.get(gram, set()) for gram in grams), key=len)
+            candidates = set.intersection(*postings)
+            substring = (key for key in candidates if text in self._lowered[key])
+        else:
+            # Too short for the trigram index
+            substring = (key for key, name in self._lowered.items() if text in name)
+        if take(substring) or not grams:
+            return list(found)
+        take(self._fuzzyMatches(text))
+        return list(found)
+
+    def _fuzzyMatches(self, text: str) -> Set[Hashable]:
+        # Names holding, for every query word, a word starting with it or close to it
+        matches = None
+        for query_word in _WORD_RE.findall(text):
+            keys = {key for _, key in self._prefixRange(self._words, query_word)}
+            for word in self._similarWords(query_word):
+                keys.update(key for _, key in self._wordRange(word))
+            matches = keys if matches is None else matches & keys
+            if not matches:
+                return set()
+        return matches or set()
+
+    def _similarWords(self, query_word: str) -> List[str]:
+        # Indexed words close to a query word, numbers must match exactly
+        if query_word.isdigit() or len(query_word) < 3:
+            return []
+        candidates = set()
+        for gram in trigrams(f" {query_word} "):
+            candidates.update(self._word_grams.get(gram, ()))
+        matcher = SequenceMatcher(None, b=query_word)
+        similar = []
+        for word in candidates:
+            matcher.set_seq1(word)
+            if matcher.real_quick_ratio() >= FUZZY_RATIO and matcher.ratio() >= FUZZY_RATIO:
+                similar.append(word)
+        return similar
+
+    def _addWord(self, word: str):
+        count = self._vocabulary.get(word, 0)
+        self._vocabulary[word] = count + 1
+        if count == 0 and not word.isdigit():
+            for gram in trigrams(f" {word} "):
+                self._word_grams.setdefault(gram, set()).add(word)
+
+    def _removeWord(self, word: str):
+        count = self._vocabulary.pop(word) - 1
+        if count:
+            self._vocabulary[word] = count
+        elif not word.isdigit():
+            for gram in trigrams(f" {word} "):
+                words = self._word_grams[gram]
+                words.discard(word)
+                if not words:
+                    del self._word_grams[gram]
+
+    @staticmethod
+    def _prefixRange(pairs: List[Tuple[str, Hashable]], text: str) -> List[Tuple[str, Hashable]]:
+        # Pairs whose text starts with the given text
+        return pairs[bisect_left(pairs, (text,)):bisect_left(pairs, (text + _TEXT_END,))]
+
+    def _wordRange(self, word: str) -> List[Tuple[str, Hashable]]:
+        # Pairs of the names holding exactly this word
+        return self._words[bisect_left(self._words, (word,)):bisect_left(self._words, (word + "\0",))]
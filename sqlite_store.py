@@ -0,0 +1,482 @@
+from changes import TaskDiff, file_fingerprint, row_hash
+from openpyxl import Workbook, load_workbook
+from perf import record
+from task import (COLUMN_MAPPING, ID_FIELD, ID_HEADER, INTERNAL_COLUMN, Task, append_task_row, id_column, iter_task_list,
+                  last_data_row)
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import os
+import sqlite3
+import threading
+import time
+
+TABLE_NAME = "tasks"
+INDEXED_COLUMNS = ["status", "do_date", "deadline", "assigner", "category"]
+# Fingerprint of the Excel database when it was last imported or exported, in the meta table
+META_TABLE = "meta"
+EXCEL_FINGERPRINT_KEY = "excel_fingerprint"
+# IDs of the tasks changed in the SQLite database since the Excel database was last exported
+CHANGED_TABLE = "changed_tasks"
+
+def connect(path: str) -> sqlite3.Connection:
+    """
+    Open a SQLite task database, creating the table and its indexes when missing.
+
+    Args:
+        path (str): Path of the SQLite database.
+
+    Returns:
+        sqlite3.Connection: The opened connection.
+    """
+    conn = sqlite3.connect(path, check_same_thread=False)
+    columns = ", ".join(INTERNAL_COLUMN)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {TABLE_NAME} (id INTEGER PRIMARY KEY, {columns})")
+    for column in INDEXED_COLUMNS:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE_NAME}_{column} ON {TABLE_NAME} ({column})")
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {META_TABLE} (key TEXT PRIMARY KEY, value TEXT)")
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {CHANGED_TABLE} (id INTEGER PRIMARY KEY)")
+    conn.commit()
+    return conn
+
+def read_excel_fingerprint(conn: sqlite3.Connection) -> Optional[Tuple[int, int]]:
+    """
+    Return the fingerprint of the Excel database when it was last imported or exported.
+
+    Args:
+        conn (sqlite3.Connection): The opened SQLite database.
+
+    Returns:
+        Optional[Tuple[int, int]]: The fingerprint of file_fingerprint, None if it was never recorded.
+    """
+    row = conn.execute(f"SELECT value FROM {META_TABLE} WHERE key = ?", (EXCEL_FINGERPRINT_KEY,)).fetchone()
+    if row is None:
+        return None
+    mtime_ns, size = map(int, row[0].split())
+    return mtime_ns, size
+
+def record_excel_fingerprint(conn: sqlite3.Connection, excel_path: str, exported: bool = True):
+    """
+    Record the fingerprint of the Excel database, in the transaction of the caller.
+
+    Args:
+        conn (sqlite3.Connection): The opened SQLite database.
+        excel_path (str): Path of the Excel database.
+        exported (bool): The workbook holds every task of the SQLite database, which
+            forgets the tasks changed since the last export.
+    """
+    fingerprint = file_fingerprint(excel_path)
+    if fingerprint is not None:
+        conn.execute(f"INSERT OR REPLACE INTO {META_TABLE} (key, value) VALUES (?, ?)",
+                     (EXCEL_FINGERPRINT_KEY, f"{fingerprint[0]} {fingerprint[1]}"))
+    if exported:
+        conn.execute(f"DELETE FROM {CHANGED_TABLE}")
+
+def import_excel(excel_path: str, db_path: str) -> int:
+    """
+    Replace the content of the SQLite database with the tasks of an Excel database.
+
+    The task IDs of the workbook are kept, tasks without one get the next free ID.
+
+    Args:
+        excel_path (str): Path of the Excel database in the Test.xlsx layout.
+        db_path (str): Path of the SQLite database.
+
+    Returns:
+        int: Number of imported tasks.
+    """
+    # The empty rows between the tasks are not imported
+    task_list = [task_item for task_item in iter_task_list(excel_path)
+                 if task_item.id is not None or any(value != "" for value in task_item.values())]
+    seen = set()
+    for task_item in task_list:
+        if task_item.id in seen:
+            task_item.id = None
+        seen.add(task_item.id)
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.execute(f"DELETE FROM {TABLE_NAME}")
+            conn.executemany(
+                f"INSERT INTO {TABLE_NAME} (id, {', '.join(INTERNAL_COLUMN)}) "
+                f"VALUES (?, {', '.join('?' * len(INTERNAL_COLUMN))})",
+                ([task_item.id] + task_item.values() for task_item in task_list))
+            record_excel_fingerprint(conn, excel_path)
+    except sqlite3.Error as e:
+        raise RuntimeError(f"Failed to import {excel_path}: {e}")
+    finally:
+        conn.close()
+    return len(task_list)
+
+def export_excel(db_path: str, excel_path: str) -> int:
+    """
+    Write the tasks of the SQLite database to an Excel database in the Test.xlsx layout.
+
+    An existing workbook keeps its header and formatting, new rows copy the formatting
+    of the previous row.
+
+    Args:
+        db_path (str): Path of the SQLite database.
+        excel_path (str): Path of the Excel database.
+
+    Returns:
+        int: Number of exported tasks.
+    """
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(f"SELECT id, {', '.join(INTERNAL_COLUMN)} FROM {TABLE_NAME} ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+    try:
+        if os.path.exists(excel_path):
+            wb = load_workbook(excel_path)
+            ws = wb.active
+        else:
+            wb = Workbook()
+            ws = wb.active
+            ws.append(list(COLUMN_MAPPING.keys()) + [ID_HEADER])
+
+        # Overwrite the existing rows in place to keep their formatting; ws.max_row also
+        # counts the formatted empty rows below the tasks
+        id_col = id_column(ws, create=True)
+        existing_rows = last_data_row(ws) - 1
+        for row_num, (task_id, *values) in enumerate(rows[:existing_rows], start=2):
+            for col_num, value in enumerate(values, start=1):
+                ws.cell(row=row_num, column=col_num, value=value)
+            ws.cell(row=row_num, column=id_col, value=task_id)
+        if existing_rows > len(rows):
+            ws.delete_rows(len(rows) + 2, existing_rows - len(rows))
+        for task_id, *values in rows[existing_rows:]:
+            append_task_row(ws, dict(zip(INTERNAL_COLUMN, values), **{ID_FIELD: task_id}))
+        wb.save(excel_path)
+        # Changes made in the workbook from now on are imported by SqliteTaskStore.refresh
+        conn = connect(db_path)
+        try:
+            with conn:
+                record_excel_fingerprint(conn, excel_path)
+        finally:
+            conn.close()
+    except Exception as e:
+        raise RuntimeError(f"Failed to export to {excel_path}: {e}")
+    return len(rows)
+
+class SqliteTaskStore:
+    """
+    Task store backed by a SQLite database, with the same interface as TaskStore.
+
+    Every change is committed right away, so there is nothing to flush. The Excel
+    database is imported when the SQLite database does not exist yet and exported on
+    request. The changes made to the workbook since it was last imported or exported
+    are imported again by refresh, before every export too, so editing the exported
+    workbook in Excel does not lose anything. The task ID is the primary key of the
+    table.
+    """
+
+    def __init__(self, path: str, excel_path: Optional[str] = None):
+        """
+        Open the SQLite database and load the task list.
+
+        Args:
+            path (str): Path of the SQLite database.
+            excel_path (Optional[str]): Path of the Excel database used for import and export.
+        """
+        self.path = path
+        self.excel_path = excel_path
+        self.tasks: List[Task] = []
+        self.load_source = "sqlite"
+        self.load_time = 0.0
+        self._lock = threading.RLock()
+        # Unused, the changes are committed right away
+        self.flush_requested: Optional[Callable[[], None]] = None
+        self._listeners: List[Callable[[str, Task], None]] = []
+        if not os.path.exists(path) and excel_path and os.path.exists(excel_path):
+            import_excel(excel_path, path)
+            # Writes the IDs of the tasks to the workbook, so its changes can be imported by ID
+            export_excel(path, excel_path)
+        self._conn = connect(path)
+        self.load()
+
+    def load(self):
+        """Load the task list from the database."""
+        start = time.perf_counter()
+        with self._lock:
+            cursor = self._conn.execute(f"SELECT id, {', '.join(INTERNAL_COLUMN)} FROM {TABLE_NAME} ORDER BY id")
+            self.tasks[:] = [Task(**dict(zip(INTERNAL_COLUMN, row[1:])), id=row[0]) for row in cursor]
+            self._by_id: Dict[int, Task] = {task_item.id: task_item for task_item in self.tasks}
+        self.load_time = time.perf_counter() - start
+        record("store.load", self.load_time, {"path": self.path, "source": self.load_source, "rows": len(self.tasks)})
+
+    @property
+    def pendingChanges(self) -> int:
+        """Number of changes not yet written to disk, always 0 as changes are committed at once."""
+        return 0
+
+    def _execute(self, sql: str, parameters=(), task_id: Optional[int] = None):
+        # Runs a change of a task, the inserted one when task_id is None
+        try:
+            with self._conn:
+                cursor = self._conn.execute(sql, parameters)
+                self._markChanged([cursor.lastrowid if task_id is None else task_id])
+                return cursor
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Failed to save task changes: {e}")
+
+    def _markChanged(self, task_ids: Iterable[int]):
+        # Remembers the tasks the Excel database does not hold yet, in the transaction of the change
+        self._conn.executemany(f"INSERT OR IGNORE INTO {CHANGED_TABLE} (id) VALUES (?)",
+                               [(task_id,) for task_id in task_ids])
+
+    def get(self, task_id: int) -> Optional[Task]:
+        """
+        Return the task with the given ID.
+
+        Args:
+            task_id (int): ID of the task item.
+
+        Returns:
+            Optional[Task]: The task record, None if there is no such task.
+        """
+        return self._by_id.get(task_id)
+
+    def add(self, data: Dict[str, Optional[str]]) -> int:
+        """
+        Add a new task item.
+
+        Args:
+            data (Dict[str, Optional[str]]): Dictionary of data to add as a new task item.
+
+        Returns:
+            int: ID of the new task item.
+        """
+        with self._lock:
+            task_item = Task.from_dict(data)
+            cursor = self._execute(
+                f"INSERT INTO {TABLE_NAME} ({', '.join(INTERNAL_COLUMN)}) "
+                f"VALUES ({', '.join('?' * len(INTERNAL_COLUMN))})", task_item.values())
+            task_item.id = cursor.lastrowid
+            self.tasks.append(task_item)
+            self._by_id[task_item.id] = task_item
+        self._notify("add", task_item)
+        return task_item.id
+
+    def addMany(self, rows: Iterable[Dict[str, Optional[str]]]) -> List[int]:
+        """
+        Add several new task items in one transaction.
+
+        Args:
+            rows (Iterable[Dict[str, Optional[str]]]): Data of every new task item.
+
+        Returns:
+            List[int]: IDs of the new task items.
+        """
+        with self._lock:
+            task_items = [Task.from_dict(data) for data in rows]
+            try:
+                with self._conn:
+                    for task_item in task_items:
+                        cursor = self._conn.execute(
+                            f"INSERT INTO {TABLE_NAME} ({', '.join(INTERNAL_COLUMN)}) "
+                            f"VALUES ({', '.join('?' * len(INTERNAL_COLUMN))})", task_item.values())
+                        task_item.id = cursor.lastrowid
+                    self._markChanged(task_item.id for task_item in task_items)
+            except sqlite3.Error as e:
+                raise RuntimeError(f"Failed to save task changes: {e}")
+            self.tasks.extend(task_items)
+            self._by_id.update((task_item.id, task_item) for task_item in task_items)
+        for task_item in task_items:
+            self._notify("add", task_item)
+        return [task_item.id for task_item in task_items]
+
+    def edit(self, task_id: int, data: Dict[str, Optional[str]]):
+        """
+        Edit an existing task item. Only the given fields whose value differs are
+        written, an edit changing nothing does not touch the database.
+
+        Args:
+            task_id (int): ID of the task item.
+            data (Dict[str, Optional[str]]): Fields to update the task item with.
+        """
+        with self._lock:
+            if task_id not in self._by_id:
+                raise KeyError(f"No task with ID {task_id}")
+            data = self._by_id[task_id].changed_fields(data)
+            if not data:
+                return
+            columns = [key for key in data if key in INTERNAL_COLUMN]
+            if columns:
+                self._execute(
+                    f"UPDATE {TABLE_NAME} SET {', '.join(f'{key} = ?' for key in columns)} WHERE id = ?",
+                    [data[key] for key in columns] + [task_id], task_id)
+            task_item = self._by_id[task_id]
+            task_item.update(data)
+        self._notify("edit", task_item)
+
+    def editMany(self, changes: Iterable[Tuple[int, Dict[str, Optional[str]]]]):
+        """
+        Edit several task items in one transaction. Only the given fields whose value
+        differs are written.
+
+        Args:
+            changes (Iterable[Tuple[int, Dict[str, Optional[str]]]]): ID of every task item
+                and the fields to update it with.
+        """
+        with self._lock:
+            edited = []
+            for task_id, data in changes:
+                if task_id not in self._by_id:
+                    raise KeyError(f"No task with ID {task_id}")
+                data = self._by_id[task_id].changed_fields(data)
+                if data:
+                    edited.append((task_id, data))
+            try:
+                with self._conn:
+                    for task_id, data in edited:
+                        columns = [key for key in data if key in INTERNAL_COLUMN]
+                        if columns:
+                            self._conn.execute(
+                                f"UPDATE {TABLE_NAME} SET {', '.join(f'{key} = ?' for key in columns)} WHERE id = ?",
+                                [data[key] for key in columns] + [task_id])
+                    self._markChanged(task_id for task_id, _ in edited)
+            except sqlite3.Error as e:
+                raise RuntimeError(f"Failed to save task changes: {e}")
+            task_items = [self._by_id[task_id] for task_id, _ in edited]
+            for task_item, (_, data) in zip(task_items, edited):
+                task_item.update(data)
+        for task_item in task_items:
+            self._notify("edit", task_item)
+
+    def delete(self, task_id: int):
+        """
+        Delete an existing task item.
+
+        Args:
+            task_id (int): ID of the task item.
+        """
+        with self._lock:
+            if task_id not in self._by_id:
+                raise KeyError(f"No task with ID {task_id}")
+            self._execute(f"DELETE FROM {TABLE_NAME} WHERE id = ?", (task_id,), task_id)
+            task_item = self._by_id.pop(task_id)
+            self.tasks.pop(next(idx for idx, item in enumerate(self.tasks) if item is task_item))
+        self._notify("delete", task_item)
+
+    def addListener(self, callback: Callable[[str, Task], None]):
+        """
+        Call a function after every change of the task list.
+
+        Args:
+            callback (Callable[[str, Task], None]): Called with the operation ("add", "edit"
+                or "delete") and the task record, in the thread that made the change.
+        """
+        self._listeners.append(callback)
+
+    def removeListener(self, callback: Callable[[str, Task], None]):
+        """
+        Stop calling a function added with addListener.
+
+        Args:
+            callback (Callable[[str, Task], None]): The function.
+        """
+        self._listeners.remove(callback)
+
+    def _notify(self, op: str, task_item: Task):
+        for callback in list(self._listeners):
+            callback(op, task_item)
+
+    def refresh(self) -> Optional[TaskDiff]:
+        """
+        Import the changes made to the Excel database since it was last imported or exported.
+
+        The file fingerprint is checked first, so an unchanged workbook costs a single stat
+        call. Otherwise the tasks of the workbook are merged by ID: the tasks changed in
+        the workbook are updated, tasks without ID are added and the tasks missing from it
+        are deleted. A task also changed, added or deleted in the application since the
+        last export keeps the version of the application.
+
+        Returns:
+            Optional[TaskDiff]: The changed, added and removed tasks, None if the workbook did not change.
+        """
+        if not self.excel_path:
+            return None
+        fingerprint = file_fingerprint(self.excel_path)
+        with self._lock:
+            known = read_excel_fingerprint(self._conn)
+            if fingerprint is None or fingerprint == known:
+                return None
+            diff = TaskDiff()
+            if known is not None:
+                diff = self._importChanges()
+            try:
+                with self._conn:
+                    record_excel_fingerprint(self._conn, self.excel_path, exported=False)
+            except sqlite3.Error as e:
+                raise RuntimeError(f"Failed to import {self.excel_path}: {e}")
+        if diff:
+            self._notify("reload", None)
+        return diff
+
+    def _importChanges(self) -> TaskDiff:
+        # Merges the tasks of the workbook into the database and the task list, see refresh
+        excel_tasks = [task_item for task_item in iter_task_list(self.excel_path)
+                       if task_item.id is not None or any(value != "" for value in task_item.values())]
+        changed_here = {task_id for task_id, in self._conn.execute(f"SELECT id FROM {CHANGED_TABLE}")}
+        # Rows without ID imported before still have none until the next export
+        imported_rows = {row_hash(task_item) for task_item in self.tasks if task_item.id in changed_here}
+        diff = TaskDiff()
+        in_excel = set()
+        updates, inserts = [], []
+        for excel_task in excel_tasks:
+            in_excel.add(excel_task.id)
+            if excel_task.id in changed_here or (excel_task.id is None and row_hash(excel_task) in imported_rows):
+                continue
+            task_item = self._by_id.get(excel_task.id) if excel_task.id is not None else None
+            if task_item is None:
+                inserts.append(excel_task)
+            elif task_item.changed_fields(excel_task.to_dict()):
+                updates.append((task_item, excel_task))
+        removed = [task_item for task_item in self.tasks
+                   if task_item.id not in in_excel and task_item.id not in changed_here]
+        try:
+            with self._conn:
+                for task_item, excel_task in updates:
+                    self._conn.execute(
+                        f"UPDATE {TABLE_NAME} SET {', '.join(f'{key} = ?' for key in INTERNAL_COLUMN)} WHERE id = ?",
+                        excel_task.values() + [task_item.id])
+                for excel_task in inserts:
+                    cursor = self._conn.execute(
+                        f"INSERT INTO {TABLE_NAME} (id, {', '.join(INTERNAL_COLUMN)}) "
+                        f"VALUES (?, {', '.join('?' * len(INTERNAL_COLUMN))})", [excel_task.id] + excel_task.values())
+                    excel_task.id = cursor.lastrowid
+                self._conn.executemany(f"DELETE FROM {TABLE_NAME} WHERE id = ?",
+                                       [(task_item.id,) for task_item in removed])
+                # Rows without ID get theirs with the next export
+                self._markChanged(excel_task.id for excel_task in inserts)
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Failed to import {self.excel_path}: {e}")
+        for task_item, excel_task in updates:
+            task_item.update(excel_task.to_dict())
+            diff.changed.append(task_item)
+        for excel_task in inserts:
+            self.tasks.append(excel_task)
+            self._by_id[excel_task.id] = excel_task
+            diff.added.append(excel_task)
+        removed_ids = {task_item.id for task_item in removed}
+        self.tasks[:] = [task_item for task_item in self.tasks if task_item.id not in removed_ids]
+        for task_id in removed_ids:
+            del self._by_id[task_id]
+        diff.removed = removed
+        return diff
+
+    def flush(self) -> int:
+        """Nothing to write, every change is already committed."""
+        return 0
+
+    def exportExcel(self):
+        """Write the tasks to the Excel database, once the changes made to it are imported."""
+        if self.excel_path:
+            self.refresh()
+            export_excel(self.path, self.excel_path)
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
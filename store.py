@@ -0,0 +1,690 @@
+from changes import TaskDiff, file_fingerprint, merge_task_lists
+from cache import CachedTasks, load_task_cache, save_task_cache
+from perf import record, span
+from journal import TaskJournal, get_compacted_seq, journal_path, read_compacted_seq, save_workbook_atomic, set_compacted_seq
+from task import ID_FIELD, INTERNAL_COLUMN, Task, TaskBatch, id_column, read_task_rows, read_xlsx_task_rows
+from xlsx_reader import XLSX_READ_ERRORS
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+import json
+import os
+import threading
+import time
+
+# Default write-behind policy
+FLUSH_CHANGES = 20
+FLUSH_INTERVAL = 30.0
+BACKENDS = ["excel", "sqlite"]
+# Next task ID kept next to the database, so the IDs of the tasks moved out of it,
+# e.g. by archive.py, are never given again
+NEXT_ID_SUFFIX = ".ids"
+
+def open_task_store(path: str, backend: str = "excel", **policy):
+    """
+    Open the task store of the Excel database with the selected storage backend.
+
+    With the sqlite backend the tasks live in a SQLite database next to the Excel
+    database, which is imported on first use and exported on request.
+
+    Args:
+        path (str): Path of the Excel database.
+        backend (str): One of BACKENDS.
+        **policy: Write-behind policy of the excel backend, see TaskStore.
+
+    Returns:
+        TaskStore or SqliteTaskStore: The opened store.
+    """
+    if backend == "sqlite":
+        from sqlite_store import SqliteTaskStore
+        return SqliteTaskStore(os.path.splitext(path)[0] + ".db", excel_path=path)
+    if backend != "excel":
+        raise ValueError(f"Unknown storage backend: {backend}")
+    return TaskStore(path, **policy)
+
+def read_database(path: str) -> Tuple[List[Tuple[int, Dict[str, Optional[str]]]], int]:
+    """
+    Read the task rows and the compacted journal sequence of the Excel database.
+
+    The native xlsx reader is used, openpyxl only for files it cannot read.
+
+    Args:
+        path (str): Path of the Excel database.
+
+    Returns:
+        Tuple[List[Tuple[int, Dict[str, Optional[str]]]], int]: The rows as returned by
+        read_task_rows and the sequence number of the last compacted journal entry.
+    """
+    try:
+        return list(read_xlsx_task_rows(path)), read_compacted_seq(path)
+    except XLSX_READ_ERRORS:
+        pass
+    except OSError as e:
+        raise RuntimeError(f"Failed to load data from {path}: {e}")
+    from openpyxl import load_workbook
+    try:
+        wb = load_workbook(path, read_only=True)
+        try:
+            return list(read_task_rows(wb.active)), get_compacted_seq(wb)
+        finally:
+            wb.close()
+    except Exception as e:
+        raise RuntimeError(f"Failed to load data from {path}: {e}")
+
+def read_next_id(path: str) -> int:
+    """
+    Return the lowest task ID never given to a task moved out of the database.
+
+    Args:
+        path (str): Path of the Excel database.
+
+    Returns:
+        int: The ID, 0 when no task was moved out.
+    """
+    try:
+        with open(path + NEXT_ID_SUFFIX, "r", encoding="utf-8") as ids_file:
+            return int(json.load(ids_file).get("next_id", 0))
+    except (OSError, ValueError):
+        return 0
+
+def save_next_id(path: str, next_id: int):
+    """
+    Record the lowest task ID never given to a task moved out of the database.
+
+    Args:
+        path (str): Path of the Excel database.
+        next_id (int): The ID.
+    """
+    ids_path = path + NEXT_ID_SUFFIX
+    tmp_path = ids_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as ids_file:
+        json.dump({"next_id": next_id}, ids_file)
+    os.replace(tmp_path, ids_path)
+
+class TaskStore:
+    """
+    Long-lived access to the Excel database.
+
+    The workbook is loaded once and kept in memory together with the task list.
+    Mutations are applied to the task list immediately and recorded in an append-only
+    journal next to the database, so they survive a crash. They are compacted into the
+    workbook on the next flush, which happens after a number of changes, after a delay
+    or when the store is closed.
+
+    Tasks are addressed by a persistent ID kept in an ID column of the workbook. The
+    store indexes every ID to its record and worksheet row, so lookups, edits and
+    deletions never depend on positions in the task list.
+
+    A flush only holds the store lock to take the pending changes and to update the
+    row index afterwards; the workbook is written outside of it, so the task list can
+    keep changing while it is saved. Set flush_requested to run the flushes elsewhere,
+    e.g. in a TaskWriter thread.
+    """
+
+    def __init__(self, path: str, flush_changes: int = FLUSH_CHANGES,
+                 flush_interval: Optional[float] = FLUSH_INTERVAL, journal: bool = True,
+                 cache: bool = True):
+        """
+        Load the database and initialize the store.
+
+        Args:
+            path (str): Path of the Excel database.
+            flush_changes (int): Number of pending changes that triggers a flush. 0 disables it.
+            flush_interval (Optional[float]): Seconds after the first pending change before
+                the changes are flushed. None disables the timer.
+            journal (bool): Record the pending changes in a journal next to the database.
+            cache (bool): Keep the parsed tasks in a cache next to the database to skip
+                parsing the workbook while it is unchanged.
+        """
+        self.path = path
+        self.excel_path = path
+        self.flush_changes = flush_changes
+        self.flush_interval = flush_interval
+        self.tasks: List[Task] = []
+        self._journal: Optional[TaskJournal] = None
+        self._use_journal = journal
+        self._use_cache = cache
+        self.load_source = ""
+        self.load_time = 0.0
+        self._lock = threading.RLock()
+        # Held for a whole flush or refresh, always taken before _lock
+        self._flush_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self.flush_requested: Optional[Callable[[], None]] = None
+        self._listeners: List[Callable[[str, Task], None]] = []
+        self.load()
+
+    def load(self):
+        """
+        Load the workbook and the task list from disk.
+
+        The parsed tasks come from the cache when it matches the workbook, otherwise the
+        sheet is read with the native xlsx reader. The workbook itself is only loaded
+        when there is something to write. Tasks without an ID get
+        one, written with the next flush. Journal entries not yet compacted into the
+        workbook are replayed over the task list and become pending changes again.
+        """
+        start = time.perf_counter()
+        fingerprint = file_fingerprint(self.path)
+        cached = load_task_cache(self.path, fingerprint) if self._use_cache else None
+        if cached is not None:
+            self.load_source = "cache"
+        else:
+            rows, compacted_seq = read_database(self.path)
+            cached = CachedTasks([row_num for row_num, _ in rows],
+                                 [tuple(task_item[key] for key in INTERNAL_COLUMN) for _, task_item in rows],
+                                 [task_item.get(ID_FIELD) for _, task_item in rows],
+                                 compacted_seq)
+            if self._use_cache:
+                save_task_cache(self.path, fingerprint, cached)
+            self.load_source = "workbook"
+        with self._lock:
+            self._cancelTimer()
+            # The workbook is only loaded when there is something to write
+            self._wb = None
+            self._fingerprint = fingerprint
+            self._clearPending()
+            self.tasks[:] = [Task(**dict(zip(INTERNAL_COLUMN, values)), id=task_id)
+                             for values, task_id in zip(cached.values, cached.ids)]
+            self._indexRows(zip(cached.rows, cached.ids, self.tasks))
+
+            if self._use_journal:
+                compacted_seq = cached.compacted_seq
+                self._journal = TaskJournal(journal_path(self.path))
+                self._journal.seq = max(self._journal.seq, compacted_seq)
+                entries = self._journal.entries()
+                pending_entries = [entry for entry in entries if entry["seq"] > compacted_seq]
+                if len(pending_entries) < len(entries):
+                    # Left over by a crash right after the last compaction
+                    self._journal.truncate(compacted_seq)
+                self._replay(pending_entries)
+            if self._changes:
+                self._scheduleFlush()
+        self.load_time = time.perf_counter() - start
+        record("store.load", self.load_time, {"path": self.path, "source": self.load_source, "rows": len(self.tasks)})
+
+    def _replay(self, entries: Iterable[Dict]):
+        """
+        Apply changes over the task list as pending changes.
+
+        Args:
+            entries (Iterable[Dict]): The changes, as journal entries. Edits and deletions
+                of tasks no longer in the task list are skipped.
+        """
+        for entry in entries:
+            if entry["op"] == "add":
+                self._add(entry["data"])
+            elif entry["id"] not in self._by_id:
+                # Deleted on disk meanwhile
+                continue
+            elif entry["op"] == "edit":
+                self._edit(entry["id"], entry["data"])
+            elif entry["op"] == "delete":
+                self._delete(entry["id"])
+            self._changes += 1
+
+    def _pendingEntries(self) -> List[Dict]:
+        """
+        Return the pending changes as journal entries, to apply them again with _replay.
+
+        Returns:
+            List[Dict]: The edits, deletions and additions. The task IDs queued to be written
+            to their rows are left out, the rows get them again when they are indexed.
+        """
+        entries = []
+        for task_id, data in self._edited.items():
+            data = {key: value for key, value in data.items() if key != ID_FIELD}
+            if data:
+                entries.append({"op": "edit", "id": task_id, "data": data})
+        entries.extend({"op": "delete", "id": task_id, "data": None} for task_id in self._deleted)
+        entries.extend({"op": "add", "id": task_item.id, "data": dict(task_item.to_dict(), id=task_item.id)}
+                       for task_item in self._added.values())
+        return entries
+
+    def _indexRows(self, rows: Iterable[Tuple[int, Optional[int], Task]]):
+        """
+        Build the ID indexes from the worksheet rows.
+
+        Tasks without an ID, or sharing one with a previous row, get a new ID, never one of
+        an archived task. The rows whose ID cell differs from their task are queued to be
+        written with the next flush.
+
+        Args:
+            rows (Iterable[Tuple[int, Optional[int], Task]]): Row number, ID read from the
+                worksheet and task record of every row.
+        """
+        rows = list(rows)
+        self._next_id = max([row_id for _, row_id, _ in rows if row_id is not None] +
+                            [task_item.id for _, _, task_item in rows if task_item.id is not None],
+                            default=0) + 1
+        self._next_id = max(self._next_id, read_next_id(self.path))
+        self._by_id: Dict[int, Task] = {}
+        self._row_of: Dict[int, int] = {}
+        for row_num, row_id, task_item in rows:
+            if task_item.id is None or task_item.id in self._by_id:
+                task_item.id = self._newId()
+            if task_item.id != row_id:
+                self._edited.setdefault(task_item.id, {})[ID_FIELD] = task_item.id
+            self._by_id[task_item.id] = task_item
+            self._row_of[task_item.id] = row_num
+        if self._edited:
+            self._changes += 1
+
+    def _newId(self) -> int:
+        task_id = self._next_id
+        self._next_id += 1
+        return task_id
+
+    def _clearPending(self):
+        # Pending changes are keyed by task ID
+        self._edited: Dict[int, Dict[str, Optional[str]]] = {}
+        self._deleted: Set[int] = set()
+        self._added: Dict[int, Task] = {}
+        self._changes = 0
+
+    @property
+    def pendingChanges(self) -> int:
+        """Number of changes not yet written to the database."""
+        return self._changes
+
+    def get(self, task_id: int) -> Optional[Task]:
+        """
+        Return the task with the given ID.
+
+        Args:
+            task_id (int): ID of the task item.
+
+        Returns:
+            Optional[Task]: The task record, None if there is no such task.
+        """
+        return self._by_id.get(task_id)
+
+    def add(self, data: Dict[str, Optional[str]]) -> int:
+        """
+        Add a new task item.
+
+        Args:
+            data (Dict[str, Optional[str]]): Dictionary of data to add as a new task item.
+
+        Returns:
+            int: ID of the new task item.
+        """
+        with self._lock:
+            task_data = dict(data)
+            task_data[ID_FIELD] = self._newId()
+            if self._journal:
+                self._journal.append("add", task_data[ID_FIELD], task_data)
+            task_id = self._add(task_data)
+            task_item = self._by_id[task_id]
+            due = self._changed()
+        self._notify("add", task_item, due)
+        return task_id
+
+    def addMany(self, rows: Iterable[Dict[str, Optional[str]]]) -> List[int]:
+        """
+        Add several new task items, recorded in the journal with a single write.
+
+        Unlike add, reaching the flush_changes threshold does not flush on its own,
+        call flush to write all of them in one pass.
+
+        Args:
+            rows (Iterable[Dict[str, Optional[str]]]): Data of every new task item.
+
+        Returns:
+            List[int]: IDs of the new task items.
+        """
+        with self._lock:
+            added = []
+            for data in rows:
+                task_data = dict(data)
+                task_data[ID_FIELD] = self._newId()
+                added.append(task_data)
+            if not added:
+                return []
+            if self._journal:
+                self._journal.extend("add", [(task_data[ID_FIELD], task_data) for task_data in added])
+            task_items = [self._by_id[self._add(task_data)] for task_data in added]
+            self._changes += len(task_items)
+            self._scheduleFlush()
+        for task_item in task_items:
+            self._notify("add", task_item)
+        return [task_item.id for task_item in task_items]
+
+    def _add(self, data: Dict[str, Optional[str]]) -> int:
+        task_item = Task.from_dict(data)
+        self._next_id = max(self._next_id, task_item.id + 1)
+        self.tasks.append(task_item)
+        self._by_id[task_item.id] = task_item
+        self._added[task_item.id] = task_item
+        return task_item.id
+
+    def edit(self, task_id: int, data: Dict[str, Optional[str]]):
+        """
+        Edit an existing task item. Only the given fields are changed, and only the
+        ones whose value differs are recorded: an edit changing nothing does not
+        touch the journal nor count as a pending change.
+
+        Args:
+            task_id (int): ID of the task item.
+            data (Dict[str, Optional[str]]): Fields to update the task item with.
+        """
+        with self._lock:
+            if task_id not in self._by_id:
+                raise KeyError(f"No task with ID {task_id}")
+            data = self._by_id[task_id].changed_fields(data)
+            if not data:
+                return
+            if self._journal:
+                self._journal.append("edit", task_id, dict(data))
+            self._edit(task_id, data)
+            task_item = self._by_id[task_id]
+            due = self._changed()
+        self._notify("edit", task_item, due)
+
+    def editMany(self, changes: Iterable[Tuple[int, Dict[str, Optional[str]]]]):
+        """
+        Edit several task items, recorded in the journal with a single write.
+
+        As with edit, only the fields whose value differs are recorded. Reaching the
+        flush_changes threshold requests a single flush once all of them are made.
+
+        Args:
+            changes (Iterable[Tuple[int, Dict[str, Optional[str]]]]): ID of every task item
+                and the fields to update it with.
+        """
+        with self._lock:
+            edited = []
+            for task_id, data in changes:
+                if task_id not in self._by_id:
+                    raise KeyError(f"No task with ID {task_id}")
+                data = self._by_id[task_id].changed_fields(data)
+                if data:
+                    edited.append((task_id, dict(data)))
+            if not edited:
+                return
+            if self._journal:
+                self._journal.extend("edit", edited)
+            for task_id, data in edited:
+                self._edit(task_id, data)
+            task_items = [self._by_id[task_id] for task_id, _ in edited]
+            self._changes += len(edited) - 1
+            due = self._changed()
+        for task_item in task_items[:-1]:
+            self._notify("edit", task_item)
+        self._notify("edit", task_items[-1], due)
+
+    def _edit(self, task_id: int, data: Dict[str, Optional[str]]):
+        self._by_id[task_id].update(data)
+        # New task items are written with their current values when flushed
+        if task_id not in self._added:
+            self._edited.setdefault(task_id, {}).update(data)
+
+    def delete(self, task_id: int):
+        """
+        Delete an existing task item.
+
+        Args:
+            task_id (int): ID of the task item.
+        """
+        with self._lock:
+            if task_id not in self._by_id:
+                raise KeyError(f"No task with ID {task_id}")
+            if self._journal:
+                self._journal.append("delete", task_id)
+            task_item = self._by_id[task_id]
+            self._delete(task_id)
+            due = self._changed()
+        self._notify("delete", task_item, due)
+
+    def deleteMany(self, task_ids: Iterable[int]):
+        """
+        Delete several task items, recorded in the journal with a single write.
+
+        Unlike delete, reaching the flush_changes threshold does not flush on its own,
+        call flush to remove all of them in one pass. The listeners are called once
+        with "reload" instead of once per task.
+
+        Args:
+            task_ids (Iterable[int]): IDs of the task items.
+        """
+        with self._lock:
+            task_ids = list(dict.fromkeys(task_ids))
+            missing = [task_id for task_id in task_ids if task_id not in self._by_id]
+            if missing:
+                raise KeyError(f"No task with ID {missing[0]}")
+            if not task_ids:
+                return
+            if self._journal:
+                self._journal.extend("delete", [(task_id, None) for task_id in task_ids])
+            deleted = set(task_ids)
+            self.tasks[:] = [task_item for task_item in self.tasks if task_item.id not in deleted]
+            for task_id in task_ids:
+                self._forget(task_id)
+            self._changes += len(task_ids)
+            self._scheduleFlush()
+        self._notify("reload", None)
+
+    def _delete(self, task_id: int):
+        task_item = self._by_id[task_id]
+        self.tasks.pop(next(idx for idx, item in enumerate(self.tasks) if item is task_item))
+        self._forget(task_id)
+
+    def _forget(self, task_id: int):
+        # Drops the task from the ID index, its row is deleted with the next flush
+        self._by_id.pop(task_id)
+        if self._added.pop(task_id, None) is None:
+            # The row stays in the workbook until the next flush, so the other rows keep their numbers
+            self._edited.pop(task_id, None)
+            self._deleted.add(task_id)
+
+    def _changed(self) -> bool:
+        # Returns whether the changes are due to be flushed, which happens after
+        # releasing the lock
+        self._changes += 1
+        if self.flush_changes and self._changes >= self.flush_changes:
+            return True
+        self._scheduleFlush()
+        return False
+
+    def addListener(self, callback: Callable[[str, Task], None]):
+        """
+        Call a function after every change of the task list.
+
+        Args:
+            callback (Callable[[str, Task], None]): Called with the operation ("add", "edit"
+                or "delete") and the task record, in the thread that made the change. After
+                the task list was re-read from disk it is called with "reload" and None.
+        """
+        self._listeners.append(callback)
+
+    def removeListener(self, callback: Callable[[str, Task], None]):
+        """
+        Stop calling a function added with addListener.
+
+        Args:
+            callback (Callable[[str, Task], None]): The function.
+        """
+        self._listeners.remove(callback)
+
+    def _notify(self, op: str, task_item: Optional[Task], due: bool = False):
+        for callback in list(self._listeners):
+            callback(op, task_item)
+        if due:
+            self._requestFlush()
+
+    def _requestFlush(self):
+        if self.flush_requested is not None:
+            self.flush_requested()
+        else:
+            self.flush()
+
+    def _scheduleFlush(self):
+        if self._timer is None and self.flush_interval is not None:
+            self._timer = threading.Timer(self.flush_interval, self._flushOnTimer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flushOnTimer(self):
+        try:
+            self._requestFlush()
+        except RuntimeError as e:
+            print(e)
+
+    def _cancelTimer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def flush(self) -> int:
+        """
+        Compact the pending changes into the workbook and save it once.
+
+        The workbook is replaced atomically together with the sequence number of the
+        last compacted journal entry, so replaying the journal after a crash at any
+        point never applies a change twice. Changes made while the workbook is saved
+        stay pending for the next flush.
+
+        Returns:
+            int: Number of saved changes.
+        """
+        with self._flush_lock:
+            fingerprint = file_fingerprint(self.path)
+            if fingerprint is not None and fingerprint != self._fingerprint:
+                # Changed on disk since it was read or last saved, the cached workbook is out of
+                # date: take in the new rows, dropping it, before writing to them
+                self._wb = None
+                self._reload(fingerprint)
+                self._notify("reload", None)
+            with self._lock:
+                self._cancelTimer()
+                changes = self._changes
+                if changes == 0:
+                    return 0
+                batch = TaskBatch(self.path)
+                for task_id, data in self._edited.items():
+                    batch.edit(self._row_of[task_id] - 2, dict(data))
+                for task_id in self._deleted:
+                    batch.delete(self._row_of[task_id] - 2)
+                for task_item in self._added.values():
+                    batch.add(task_item)
+                seq = self._journal.seq if self._journal else 0
+                self._clearPending()
+            start = time.perf_counter()
+            try:
+                ws = self._workbook().active
+                batch.apply(ws)
+                if self._journal:
+                    set_compacted_seq(self._wb, seq)
+                save_workbook_atomic(self._wb, self.path)
+            except Exception as e:
+                # The in-memory workbook may be half updated, so start over from disk
+                # and the journal, which still holds every pending change
+                self.load()
+                self._notify("reload", None)
+                raise RuntimeError(f"Failed to save task changes: {e}")
+            if self._journal:
+                self._journal.truncate(seq)
+            with self._lock:
+                self._fingerprint = file_fingerprint(self.path)
+                # Deleted rows shifted the ones below, read the new row of every ID
+                id_col = id_column(ws)
+                self._row_of = {task_id: row_num for row_num, (task_id,) in
+                                enumerate(ws.iter_rows(min_row=2, min_col=id_col, max_col=id_col, values_only=True), start=2)
+                                if task_id is not None}
+                self._saveCache()
+            record("store.flush", time.perf_counter() - start, {"path": self.path, "changes": changes})
+            return changes
+
+    def _saveCache(self):
+        if self._use_cache and not self._changes:
+            save_task_cache(self.path, self._fingerprint,
+                            CachedTasks([self._row_of[task_item.id] for task_item in self.tasks],
+                                        [tuple(task_item.values()) for task_item in self.tasks],
+                                        [task_item.id for task_item in self.tasks],
+                                        self._journal.seq if self._journal else 0))
+
+    def _workbook(self):
+        # The workbook is dropped when the database is re-read after an external change
+        # and only loaded again when there is something to write
+        if self._wb is None:
+            from openpyxl import load_workbook
+            with span("workbook.load", path=self.path):
+                self._wb = load_workbook(self.path)
+        return self._wb
+
+    def worksheet(self):
+        """
+        Return the worksheet of the database as it was last saved, to read rows with their formatting.
+
+        The workbook is the one the flushes write to, loaded on first use, so it must
+        not be changed.
+
+        Returns:
+            Worksheet: The worksheet holding the task items.
+        """
+        with self._flush_lock:
+            return self._workbook().active
+
+    def refresh(self) -> Optional[TaskDiff]:
+        """
+        Re-read the database if another program changed it since it was last loaded or saved.
+
+        The file fingerprint (modification time and size) is checked first, so an unchanged
+        database costs a single stat call. Otherwise the sheet is read again and merged
+        into the task list by task ID and row content hashes: unchanged tasks keep their
+        records and changed tasks are updated in place.
+
+        Returns:
+            Optional[TaskDiff]: The changed, added and removed tasks, None if the file did not change.
+        """
+        fingerprint = file_fingerprint(self.path)
+        with self._flush_lock, self._lock:
+            if fingerprint is None or fingerprint == self._fingerprint:
+                return None
+            diff = self._reload(fingerprint)
+        self._notify("reload", None)
+        return diff
+
+    def _reload(self, fingerprint: Tuple[int, int]) -> TaskDiff:
+        with self._lock:
+            old_tasks = list(self.tasks)
+            if self._changes:
+                if self._use_journal:
+                    # Replay the pending changes from the journal on top of the new content
+                    self.load()
+                else:
+                    # The pending changes are only kept in memory, apply them again on top
+                    # of the new content
+                    entries = self._pendingEntries()
+                    self.load()
+                    self._replay(entries)
+                    self._scheduleFlush()
+                new_tasks = list(self.tasks)
+                merged, diff = merge_task_lists(old_tasks, new_tasks)
+                # The indexes were built on the reloaded records, move their IDs to the kept ones
+                for merged_task, new_task in zip(merged, new_tasks):
+                    merged_task.id = new_task.id
+                self._by_id = {task_item.id: task_item for task_item in merged}
+                self._added = {task_id: self._by_id[task_id] for task_id in self._added}
+            else:
+                rows, _ = read_database(self.path)
+                self._wb = None
+                new_tasks = [Task.from_dict(task_item) for _, task_item in rows]
+                merged, diff = merge_task_lists(old_tasks, new_tasks)
+                # The IDs in the file win, a kept record matched to a row without ID keeps its own
+                for merged_task, new_task in zip(merged, new_tasks):
+                    if new_task.id is not None:
+                        merged_task.id = new_task.id
+                self._indexRows((row_num, task_item.get(ID_FIELD), merged_task)
+                                for (row_num, task_item), merged_task in zip(rows, merged))
+            self.tasks[:] = merged
+            self._fingerprint = fingerprint
+            self._saveCache()
+            return diff
+
+    def exportExcel(self):
+        """Make the Excel database up to date, which only needs a flush."""
+        self.flush()
+
+    def close(self):
+        """Flush the pending changes and stop the write-behind timer."""
+        self.flush()
+        self._cancelTimer()
@@ -1,8 +1,18 @@
-import pandas as pd
-from openpyxl import load_workbook
-from openpyxl.styles import Alignment, Font, PatternFill, Border
+# pandas and openpyxl are imported where they are used, they take most of the
+# startup time and are not needed before the task list is loaded
+from bisect import bisect_right
+from copy import copy
 from datetime import datetime
-from typing import Dict, List, Optional
+from itertools import chain, islice
+from perf import span
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+from weakref import WeakKeyDictionary
+from xlsx_reader import XLSX_READ_ERRORS, iter_sheet_rows
+import re
+import sys
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 COLUMN_MAPPING = {
@@ -45,74 +55,649 @@ def swap_key_dict(input_dict: Dict[str, str]) -> Dict[str, str]:
     return {value: key for key, value in input_dict.items()}
 
 CONVERTED_COLUMN = swap_key_dict(COLUMN_MAPPING)
+# Cell text pd.read_excel reads as NaN, or as numbers and booleans
+NA_STRINGS = {"", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+              "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"}
+BOOL_STRINGS = {"True": True, "TRUE": True, "true": True, "False": False, "FALSE": False, "false": False}
+_INT_RE = re.compile(r"^\s*[+-]?\d+\s*$")
+_FLOAT_RE = re.compile(r"^\s*[+-]?(\d+\.?\d*([eE][+-]?\d+)?|\.\d+([eE][+-]?\d+)?|inf|infinity)\s*$", re.I)
+COLUMN_INDEX = {name: col_num for col_num, name in enumerate(INTERNAL_COLUMN, start=1)}
+# Persistent task ID, kept in an extra column after the ones of COLUMN_MAPPING
+ID_HEADER = "ID"
+ID_FIELD = "id"
+# openpyxl versions whose private cell storage delete_worksheet_rows rewrites, "major.minor"
+OPENPYXL_CELL_STORE_VERSIONS = ("3.0", "3.1")
+
+# Fields with a small set of repeated values, interned to share a single string object
+INTERNED_FIELDS = ("category", "assigner", "status")
+
+def intern_value(key: str, value):
+    """
+    Intern the value of a repetitive string field.
+
+    Args:
+        key (str): Internal column name of the value.
+        value: The field value.
+
+    Returns:
+        The interned string for INTERNED_FIELDS, otherwise the value itself.
+    """
+    if key in INTERNED_FIELDS and type(value) is str:
+        return sys.intern(value)
+    return value
+
+class Task:
+    """
+    Compact task record with one slot per field of INTERNAL_COLUMN.
+
+    Fields are read as attributes (task.status) or like a dictionary (task['status']),
+    so a Task can be used wherever a task dictionary from load_task_list is expected.
+    The persistent ID is available as task.id but is not one of the dictionary keys.
+    """
+    __slots__ = tuple(INTERNAL_COLUMN) + (ID_FIELD,)
+
+    def __init__(self, **fields):
+        for key in INTERNAL_COLUMN:
+            setattr(self, key, intern_value(key, fields.get(key, "")))
+        self.id: Optional[int] = fields.get(ID_FIELD)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Optional[str]]) -> "Task":
+        """
+        Create a task record from a task dictionary.
+
+        Args:
+            data (Dict[str, Optional[str]]): Task dictionary, e.g. from load_task_list.
+
+        Returns:
+            Task: The new task record.
+        """
+        return cls(**data)
+
+    def __getitem__(self, key: str):
+        if key not in COLUMN_INDEX and key != ID_FIELD:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value):
+        if key not in COLUMN_INDEX and key != ID_FIELD:
+            raise KeyError(key)
+        setattr(self, key, intern_value(key, value))
+
+    def __iter__(self):
+        return iter(INTERNAL_COLUMN)
+
+    def __len__(self) -> int:
+        return len(INTERNAL_COLUMN)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (Task, dict)):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"Task({self.to_dict()!r})"
+
+    def keys(self) -> List[str]:
+        return list(INTERNAL_COLUMN)
+
+    def values(self) -> list:
+        return [getattr(self, key) for key in INTERNAL_COLUMN]
+
+    def items(self) -> List[Tuple[str, Optional[str]]]:
+        return [(key, getattr(self, key)) for key in INTERNAL_COLUMN]
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in COLUMN_INDEX or key == ID_FIELD else default
+
+    def update(self, data: Dict[str, Optional[str]]):
+        """Update the given fields of the task."""
+        for key, value in data.items():
+            self[key] = value
+
+    def changed_fields(self, data: Dict[str, Optional[str]]) -> Dict[str, Optional[str]]:
+        """
+        Return the given fields whose value differs from the task.
+
+        Numbers are edited as text in the pages, so a text holding the same value as a
+        number, like "3" for 3, is not a change.
+
+        Args:
+            data (Dict[str, Optional[str]]): Fields to compare with the task.
+
+        Returns:
+            Dict[str, Optional[str]]: The fields that would change the task.
+        """
+        changes = {}
+        for key, value in data.items():
+            current = self.get(key)
+            if current != value and (current is None or value is None or str(current) != str(value)):
+                changes[key] = value
+        return changes
+
+    def to_dict(self) -> Dict[str, Optional[str]]:
+        """Return the task as a task dictionary."""
+        return {key: getattr(self, key) for key in INTERNAL_COLUMN}
+
+class TaskTable:
+    """
+    Column-oriented container of tasks: one list per field instead of one object per task.
+
+    Rows are accessed through lightweight TaskRowView objects that read and write the
+    columns in place. A view addresses its row by position, so views taken before a
+    deletion point to the following task afterwards.
+    """
+
+    def __init__(self, tasks: Iterable[Dict[str, Optional[str]]] = ()):
+        self.columns: Dict[str, list] = {key: [] for key in INTERNAL_COLUMN}
+        for task_item in tasks:
+            self.append(task_item)
+
+    def __len__(self) -> int:
+        return len(self.columns["task"])
+
+    def __getitem__(self, index: int) -> "TaskRowView":
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("task index out of range")
+        return TaskRowView(self, index)
+
+    def __iter__(self) -> Iterator["TaskRowView"]:
+        return (TaskRowView(self, index) for index in range(len(self)))
+
+    def append(self, data: Dict[str, Optional[str]]):
+        """Append a task given as a dictionary or a record."""
+        for key in INTERNAL_COLUMN:
+            self.columns[key].append(intern_value(key, data.get(key, "")))
+
+    def pop(self, index: int) -> Task:
+        """Remove the task at the given position and return it as a record."""
+        return Task(**{key: column.pop(index) for key, column in self.columns.items()})
+
+class TaskRowView:
+    """Dictionary-like view on one row of a TaskTable."""
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: TaskTable, index: int):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, key: str):
+        return self._table.columns[key][self._index]
+
+    def __setitem__(self, key: str, value):
+        self._table.columns[key][self._index] = intern_value(key, value)
+
+    def __getattr__(self, key: str):
+        try:
+            return self._table.columns[key][self._index]
+        except KeyError:
+            raise AttributeError(key)
+
+    def __iter__(self):
+        return iter(INTERNAL_COLUMN)
+
+    def keys(self) -> List[str]:
+        return list(INTERNAL_COLUMN)
+
+    def get(self, key: str, default=None):
+        return self[key] if key in COLUMN_INDEX else default
+
+    def update(self, data: Dict[str, Optional[str]]):
+        """Update the given fields of the row."""
+        for key, value in data.items():
+            self[key] = value
+
+    def to_dict(self) -> Dict[str, Optional[str]]:
+        """Return the row as a task dictionary."""
+        return {key: self[key] for key in INTERNAL_COLUMN}
 
 def load_task_list(path) -> List[Dict[str, Optional[str]]]:
     """
     Load tasks from the Excel database and return as a list of dictionaries.
 
+    The sheet is read with the native xlsx reader; pandas is only used for files
+    it cannot read.
+
     Returns:
         List[Dict[str, Optional[str]]]: List of task dictionaries with formatted dates and NaN values replaced.
     """
     try:
-        data = pd.read_excel(path, usecols=COLUMN_MAPPING.keys())
-    except Exception as e:
+        with span("task.load", path=path) as timing:
+            task_list = sheet_rows_to_task_list(iter_sheet_rows(path))
+            timing.set(rows=len(task_list))
+        return task_list
+    except XLSX_READ_ERRORS:
+        pass
+    except OSError as e:
         raise RuntimeError(f"Failed to load data from {path}: {e}")
 
-    data.rename(columns=COLUMN_MAPPING, inplace=True)
+    import pandas as pd
+    with span("pandas.parse", path=path) as timing:
+        try:
+            data = pd.read_excel(path, usecols=COLUMN_MAPPING.keys())
+        except Exception as e:
+            raise RuntimeError(f"Failed to load data from {path}: {e}")
 
-    task_list = []
-    for _, row in data.iterrows():
-        task_item = row.to_dict()
-        # Format dates if present
-        for date_field in ['do_date', 'deadline']:
-            if type(task_item[date_field]) == datetime or type(task_item[date_field]) == pd.Timestamp:
-                task_item[date_field] = task_item[date_field].strftime('%Y-%m-%d')
+        data.rename(columns=COLUMN_MAPPING, inplace=True)
+        task_list = frame_to_task_list(data)
+        timing.set(rows=len(task_list))
+    return task_list
 
-        # Replace NaN values with empty strings
-        task_item = {key: ("" if (pd.isna(value)) else value)
-                     for key, value in task_item.items()}
+def _parse_number(value):
+    # Number, or bool, a cell value stands for in pandas type inference, None if it is text
+    if isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        if _INT_RE.match(value):
+            return int(value)
+        if _FLOAT_RE.match(value):
+            return float(value)
+        if value in BOOL_STRINGS:
+            return BOOL_STRINGS[value]
+    return None
 
-        task_list.append(task_item)
+def infer_column(column: List) -> List:
+    """
+    Convert the cell values of a column like the type inference of pd.read_excel.
 
-    return task_list
+    Text in NA_STRINGS is empty. A column holding only numbers, booleans and text
+    spelling them becomes a numeric column: floats when a cell is empty or holds
+    a decimal, ints otherwise. Only a full column of booleans stays boolean.
+    Any other column keeps its values.
+
+    Args:
+        column (List): The cell values, None for empty cells.
+
+    Returns:
+        List: The converted values, None for empty cells.
+    """
+    column = [None if isinstance(value, str) and value in NA_STRINGS else value for value in column]
+    parsed = [_parse_number(value) for value in column if value is not None]
+    if not parsed or any(value is None for value in parsed):
+        return column
+    has_empty = len(parsed) < len(column)
+    if all(type(value) is bool for value in parsed):
+        if not has_empty:
+            return [_parse_number(value) for value in column]
+    elif not has_empty and all(type(value) is not float for value in parsed):
+        return [int(_parse_number(value)) for value in column]
+    return [float(_parse_number(value)) if value is not None else None for value in column]
+
+def sheet_rows_to_task_list(rows: Iterable[Tuple[int, Sequence]]) -> List[Dict[str, Optional[str]]]:
+    """
+    Convert the rows of a sheet to task dictionaries exactly like pd.read_excel and frame_to_task_list.
+
+    As with pandas, empty rows between tasks are kept as empty tasks, and a numeric
+    column holding empty cells or decimals gives floats only.
+
+    Args:
+        rows (Iterable[Tuple[int, Sequence]]): Row number and cell values of the rows, from iter_sheet_rows.
+
+    Returns:
+        List[Dict[str, Optional[str]]]: List of task dictionaries with formatted dates and NaN values replaced.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    header = first[1] if first is not None and first[0] == 1 else []
+    columns = [(col_num, COLUMN_MAPPING[name]) for col_num, name in enumerate(header)
+               if name in COLUMN_MAPPING]
+    if len({key for _, key in columns}) < len(COLUMN_MAPPING):
+        raise ValueError("Columns of COLUMN_MAPPING missing from the header")
+
+    records = []
+    last_row = 1
+    for row_num, values in rows:
+        record = [values[col_num] if col_num < len(values) else None for col_num, _ in columns]
+        if all(value is None or value == "" for value in record):
+            continue
+        records.extend([[None] * len(columns) for _ in range(row_num - last_row - 1)])
+        records.append(record)
+        last_row = row_num
+
+    data = {}
+    for position, (_, key) in enumerate(columns):
+        column = infer_column([record[position] for record in records])
+        if key in ('do_date', 'deadline'):
+            column = [value.strftime('%Y-%m-%d') if isinstance(value, datetime) else value for value in column]
+        data[key] = ["" if value is None else value for value in column]
+    keys = list(data)
+    return [dict(zip(keys, values)) for values in zip(*data.values())] if keys else []
+
+def frame_to_task_list(data: "pd.DataFrame") -> List[Dict[str, Optional[str]]]:
+    """
+    Convert a DataFrame with internal column names to a list of task dictionaries.
+
+    The conversion works column by column: dates are formatted in bulk and NaN values
+    are replaced per column before the rows are turned into dictionaries.
+
+    Args:
+        data (pd.DataFrame): Task data with the columns renamed through COLUMN_MAPPING.
+
+    Returns:
+        List[Dict[str, Optional[str]]]: List of task dictionaries with formatted dates and NaN values replaced.
+    """
+    import pandas as pd
+    data = data.copy()
+    # Format dates if present
+    for date_field in ['do_date', 'deadline']:
+        column = data[date_field]
+        if pd.api.types.is_datetime64_any_dtype(column):
+            data[date_field] = column.dt.strftime('%Y-%m-%d').astype(object)
+        elif column.dtype == object:
+            is_date = column.map(type).isin((datetime, pd.Timestamp))
+            if is_date.any():
+                formatted = pd.to_datetime(column[is_date]).dt.strftime('%Y-%m-%d')
+                data[date_field] = column.where(~is_date, formatted)
+
+    # Replace NaN values with empty strings
+    for key in data.columns:
+        column = data[key]
+        is_missing = column.isna()
+        if is_missing.any():
+            data[key] = column.astype(object).where(~is_missing, "")
+
+    return data.to_dict('records')
+
+class TaskBatch:
+    """
+    Unit of work that gathers edits, additions and deletions of task items and
+    applies all of them to the Excel database with a single load and save.
+
+    Indices are the positions returned by load_task_list at the time the batch
+    is created, so they stay valid no matter in which order operations are queued.
+    The batch can be used as a context manager, committing on a clean exit.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize an empty batch for the given database.
+
+        Args:
+            path (str): Path of the Excel database.
+        """
+        self.path = path
+        self.edits: Dict[int, Dict[str, Optional[str]]] = {}
+        self.deletes: Set[int] = set()
+        self.adds: List[Dict[str, Optional[str]]] = []
+
+    def __len__(self) -> int:
+        return len(self.edits) + len(self.deletes) + len(self.adds)
+
+    def __enter__(self) -> "TaskBatch":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+
+    def edit(self, index: int, data: Dict[str, Optional[str]]):
+        """
+        Queue an edit of an existing task item. Only the given fields are written.
+
+        Args:
+            index (int): Index of the task item (0-based, as returned by load_task_list).
+            data (Dict[str, Optional[str]]): Fields to update the task item with.
+        """
+        if index in self.deletes:
+            return
+        self.edits.setdefault(index, {}).update(data)
+
+    def delete(self, index: int):
+        """
+        Queue the deletion of an existing task item.
+
+        Args:
+            index (int): Index of the task item (0-based, as returned by load_task_list).
+        """
+        self.edits.pop(index, None)
+        self.deletes.add(index)
+
+    def add(self, data: Dict[str, Optional[str]]):
+        """
+        Queue a new task item to append at the end of the database.
+
+        Args:
+            data (Dict[str, Optional[str]]): Dictionary of data to add as a new task item.
+        """
+        task_item = dict(data)
+        if data.get(ID_FIELD) is not None:
+            task_item[ID_FIELD] = data[ID_FIELD]
+        self.adds.append(task_item)
+
+    def apply(self, ws):
+        """
+        Apply all queued operations to an opened worksheet.
+
+        Edits are written first while the original row positions are still valid,
+        then deletions run from the bottom up, and new items are appended last.
+
+        Args:
+            ws (Worksheet): The worksheet holding the task items.
+        """
+        id_col = None
+        for index, data in self.edits.items():
+            for key, value in data.items():
+                if key == ID_FIELD:
+                    id_col = id_col or id_column(ws, create=True)
+                    col_num = id_col
+                else:
+                    col_num = COLUMN_INDEX[key]
+                # Adjust row index for 1-based and not count the header row
+                ws.cell(row=index + 2, column=col_num, value=value)
+
+        rows = sorted(index + 2 for index in self.deletes)
+        if rows:
+            with span("task.delete_rows", rows=len(rows)):
+                delete_worksheet_rows(ws, rows)
+                if ws in _row_style_templates:
+                    _row_style_templates[ws].rows_deleted(rows)
+
+        if self.adds:
+            # New rows copy the formatting of the row style template
+            with span("task.append_rows", rows=len(self.adds)):
+                for data in self.adds:
+                    append_task_row(ws, data)
+
+    def commit(self):
+        """Load the database once, apply every queued operation and save it once."""
+        from openpyxl import load_workbook
+        if len(self) == 0:
+            return
+        try:
+            with span("workbook.load", path=self.path):
+                wb = load_workbook(self.path)
+            self.apply(wb.active)
+            with span("workbook.save", path=self.path):
+                wb.save(self.path)
+        except Exception as e:
+            raise RuntimeError(f"Failed to save task changes: {e}")
+        self.edits.clear()
+        self.deletes.clear()
+        self.adds.clear()
+
+def format_cell_value(value):
+    """
+    Convert a raw worksheet value to the representation used in task dictionaries.
+
+    Args:
+        value: Value read from a worksheet cell.
+
+    Returns:
+        The date formatted as 'YYYY-MM-DD', an empty string for empty cells, or the value itself.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+def read_task_rows(ws) -> Iterator[Tuple[int, Dict[str, Optional[str]]]]:
+    """
+    Read the task items of an opened worksheet, mapping the header through COLUMN_MAPPING.
+    Rows are read lazily, so read-only worksheets are streamed.
+
+    Args:
+        ws (Worksheet): The worksheet holding the task items.
+
+    Returns:
+        Iterator[Tuple[int, Dict[str, Optional[str]]]]: Worksheet row number and task dictionary
+        of every non-empty row, in the same format as load_task_list plus the task ID
+        when the worksheet has an ID column.
+    """
+    return parse_task_rows(enumerate(ws.iter_rows(values_only=True), start=1))
+
+def read_xlsx_task_rows(path: str) -> Iterator[Tuple[int, Dict[str, Optional[str]]]]:
+    """
+    Read the task items of the active sheet of an xlsx file with the native reader.
+
+    Args:
+        path (str): Path of the Excel database.
+
+    Returns:
+        Iterator[Tuple[int, Dict[str, Optional[str]]]]: Same rows as read_task_rows.
+    """
+    return parse_task_rows(iter_sheet_rows(path))
+
+def parse_task_rows(rows: Iterable[Tuple[int, Sequence]]) -> Iterator[Tuple[int, Dict[str, Optional[str]]]]:
+    """
+    Map the cell values of a sheet to task dictionaries through the header row.
+
+    Args:
+        rows (Iterable[Tuple[int, Sequence]]): Row number and cell values of the rows, the header in row 1.
+
+    Returns:
+        Iterator[Tuple[int, Dict[str, Optional[str]]]]: Row number and task dictionary of every non-empty row.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return
+    header = first[1] if first[0] == 1 else ()
+    columns = [(col_num, COLUMN_MAPPING[name]) for col_num, name in enumerate(header)
+               if name in COLUMN_MAPPING]
+    id_col = header.index(ID_HEADER) if ID_HEADER in header else None
+    if first[0] != 1:
+        rows = chain([first], rows)
+    for row_num, values in rows:
+        if all(value is None for value in values):
+            continue
+        task_item = {key: format_cell_value(values[col_num] if col_num < len(values) else None)
+                     for col_num, key in columns}
+        if id_col is not None:
+            task_item[ID_FIELD] = parse_task_id(values[id_col] if id_col < len(values) else None)
+        yield row_num, task_item
+
+def parse_task_id(value) -> Optional[int]:
+    """
+    Convert the content of an ID cell to a task ID.
+
+    Args:
+        value: The cell value.
+
+    Returns:
+        Optional[int]: The task ID, None if the cell is empty or does not hold a number.
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def id_column(ws, create: bool = False) -> Optional[int]:
+    """
+    Return the column of the worksheet holding the task IDs.
+
+    Args:
+        ws (Worksheet): The worksheet holding the task items.
+        create (bool): Add the ID header after the last header when the column is missing.
+
+    Returns:
+        Optional[int]: The column number, None if there is no ID column and create is False.
+    """
+    header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+    if ID_HEADER in header:
+        return header.index(ID_HEADER) + 1
+    if not create:
+        return None
+    col_num = max((num for num, name in enumerate(header, start=1) if name is not None), default=0) + 1
+    header_cell = ws.cell(row=1, column=col_num, value=ID_HEADER)
+    if col_num > 1:
+        header_cell._style = copy(ws.cell(row=1, column=col_num - 1)._style)
+    return col_num
+
+def iter_task_list(path: str, offset: int = 0, limit: Optional[int] = None) -> Iterator[Task]:
+    """
+    Stream the tasks of the Excel database one by one without loading the whole sheet.
+
+    The workbook is opened read-only, so memory stays flat however many rows it has.
+    A window of tasks can be selected to page through the history. Like load_task_list,
+    empty rows between tasks are kept as empty tasks, so a task has the same position,
+    the index taken by edit_task_item and delete_task_item, in both.
+
+    Args:
+        path (str): Path of the Excel database.
+        offset (int): Number of tasks to skip from the start.
+        limit (Optional[int]): Maximum number of tasks to yield, None for all the remaining ones.
+
+    Returns:
+        Iterator[Task]: Task records in the same format as load_task_list.
+    """
+    from openpyxl import load_workbook
+    try:
+        wb = load_workbook(path, read_only=True)
+    except Exception as e:
+        raise RuntimeError(f"Failed to load data from {path}: {e}")
+    try:
+        stop = None if limit is None else offset + limit
+        yield from islice(fill_blank_rows(read_task_rows(wb.active)), offset, stop)
+    finally:
+        wb.close()
+
+def fill_blank_rows(rows: Iterable[Tuple[int, Dict[str, Optional[str]]]]) -> Iterator[Task]:
+    """
+    Turn the task rows into task records, with an empty task for every empty row between two tasks.
+
+    Args:
+        rows (Iterable[Tuple[int, Dict[str, Optional[str]]]]): Row number and task dictionary
+            of the non-empty rows, as returned by read_task_rows.
+
+    Returns:
+        Iterator[Task]: One task record per row from the first row after the header to the last task.
+    """
+    last_row = 1
+    for row_num, task_item in rows:
+        for _ in range(row_num - last_row - 1):
+            yield Task()
+        yield Task.from_dict(task_item)
+        last_row = row_num
 
 def edit_task_item(path, index: int, data: Dict[str, Optional[str]]):
     """
     Edit an existing task item in the Excel database.
 
     Args:
-        index (int): Index of the row to edit (1-based).
+        index (int): Index of the row to edit (0-based, as returned by load_task_list).
         data (Dict[str, Optional[str]]): Dictionary of data to update the task item with.
     """
     try:
-        wb = load_workbook(path)
-        ws = wb.active
-
-        for col_num in range(1, len(data)+1):
-            # Adjust row index for 1-based and not count the header row
-            ws.cell(row=index + 2, column=col_num, value=data[INTERNAL_COLUMN[col_num-1]])  
-        wb.save(path)
+        with TaskBatch(path) as batch:
+            batch.edit(index, data)
     except Exception as e:
         raise RuntimeError(f"Failed to edit task item: {e}")
 
 def delete_task_item(path:str, index: int):
     """
-    Edit an existing task item in the Excel database.
+    Delete an existing task item from the Excel database.
 
     Args:
-        index (int): Index of the row to edit (1-based).
-        data (Dict[str, Optional[str]]): Dictionary of data to update the task item with.
+        index (int): Index of the row to delete (0-based, as returned by load_task_list).
     """
     try:
-        wb = load_workbook(path)
-        ws = wb.active
-        
-        # Adjust row index for 1-based and not count the header row
-        ws.delete_rows(index + 2)
-        
-        wb.save(path)
+        with TaskBatch(path) as batch:
+            batch.delete(index)
     except Exception as e:
-        raise RuntimeError(f"Failed to edit task item: {e}")
+        raise RuntimeError(f"Failed to delete task item: {e}")
     
 def add_new_task_item(path, data: Dict[str, Optional[str]]):
     """
@@ -122,58 +707,143 @@ def add_new_task_item(path, data: Dict[str, Optional[str]]):
         data (Dict[str, Optional[str]]): Dictionary of data to add as a new task item.
     """
     try:
-        wb = load_workbook(path)
-        ws = wb.active
-
-        last_row = ws.max_row
-        for col_num in range(1, len(data)+1):
-            ws.cell(row=last_row + 1, column=col_num, value=data[INTERNAL_COLUMN[col_num-1]])
-
-        # Copy formatting from the previous row to the new row
-        for col_num in range(1, ws.max_column + 1):
-            prev_cell = ws.cell(row=last_row, column=col_num)
-            new_cell = ws.cell(row=last_row + 1, column=col_num)
-
-            # Copy cell styles
-            if prev_cell.font:
-                new_cell.font = Font(
-                    name=prev_cell.font.name,
-                    bold=prev_cell.font.bold,
-                    italic=prev_cell.font.italic,
-                    vertAlign=prev_cell.font.vertAlign,
-                    underline=prev_cell.font.underline,
-                    strike=prev_cell.font.strike,
-                    color=prev_cell.font.color
-                )
-
-            if prev_cell.fill:
-                new_cell.fill = PatternFill(
-                    fill_type=prev_cell.fill.fill_type,
-                    start_color=prev_cell.fill.start_color,
-                    end_color=prev_cell.fill.end_color
-                )
-
-            if prev_cell.border:
-                new_cell.border = Border(
-                    left=prev_cell.border.left,
-                    right=prev_cell.border.right,
-                    top=prev_cell.border.top,
-                    bottom=prev_cell.border.bottom
-                )
-
-            if prev_cell.alignment:
-                new_cell.alignment = Alignment(
-                    horizontal=prev_cell.alignment.horizontal,
-                    vertical=prev_cell.alignment.vertical,
-                    text_rotation=prev_cell.alignment.text_rotation,
-                    wrap_text=prev_cell.alignment.wrap_text,
-                    shrink_to_fit=prev_cell.alignment.shrink_to_fit,
-                    indent=prev_cell.alignment.indent
-                )
-
-            if prev_cell.number_format:
-                new_cell.number_format = prev_cell.number_format
-
-        wb.save(path)
+        with TaskBatch(path) as batch:
+            batch.add(data)
     except Exception as e:
         raise RuntimeError(f"Failed to add new task item: {e}")
+
+class RowStyleTemplate:
+    """
+    Formatting of a task row, captured once per worksheet and reused for every appended row.
+
+    The styles are kept as openpyxl style-id arrays, so applying them to a new cell only
+    copies a few integers instead of building Font, PatternFill, Border and Alignment
+    objects. The template also tracks the last row holding data, which ws.max_row
+    overestimates when formatted empty rows follow the data.
+    """
+
+    def __init__(self, ws):
+        """
+        Capture the formatting of the last data row of the worksheet.
+
+        Args:
+            ws (Worksheet): The worksheet holding the task items.
+        """
+        self.last_row = last_data_row(ws)
+        self.styles = [copy(ws.cell(row=self.last_row, column=col_num)._style)
+                       for col_num in range(1, ws.max_column + 1)]
+        # Looked up on the first appended row with an ID, ws.max_column scans every cell
+        self.id_col: Optional[int] = None
+
+    def rows_deleted(self, rows: Sequence[int]):
+        """
+        Follow the deletion of rows in the worksheet.
+
+        Args:
+            rows (Sequence[int]): The deleted rows, sorted.
+        """
+        self.last_row -= bisect_right(rows, self.last_row)
+
+# Row style templates of the opened worksheets, dropped together with the worksheet
+_row_style_templates: "WeakKeyDictionary[object, RowStyleTemplate]" = WeakKeyDictionary()
+
+def row_style_template(ws) -> RowStyleTemplate:
+    """
+    Return the row style template of a worksheet, capturing it on first use.
+
+    Args:
+        ws (Worksheet): The worksheet holding the task items.
+
+    Returns:
+        RowStyleTemplate: The template of the worksheet.
+    """
+    template = _row_style_templates.get(ws)
+    if template is None:
+        template = RowStyleTemplate(ws)
+        _row_style_templates[ws] = template
+    return template
+
+def _moves_cells_directly(ws) -> bool:
+    # The single pass of delete_worksheet_rows rewrites private state of openpyxl: the
+    # cell dictionary ws._cells keyed by (row, column) and ws._current_row. Both are
+    # the same throughout the versions listed here, the other ones use ws.delete_rows
+    import openpyxl
+    version = ".".join(openpyxl.__version__.split(".")[:2])
+    return (version in OPENPYXL_CELL_STORE_VERSIONS and isinstance(getattr(ws, "_cells", None), dict)
+            and hasattr(ws, "_current_row"))
+
+def delete_worksheet_rows(ws, rows: Sequence[int]):
+    """
+    Delete rows of the worksheet, moving every cell below them once.
+
+    ws.delete_rows moves all the cells below the deleted rows on every call, so deleting
+    rows scattered over the sheet one group at a time is quadratic. Here the cells of
+    the deleted rows are dropped and every other cell moves up by the number of deleted
+    rows above it, in a single pass. Like ws.delete_rows, the row heights, merged cells
+    and conditional formatting ranges are left where they are. With an openpyxl version
+    not in OPENPYXL_CELL_STORE_VERSIONS, ws.delete_rows deletes every run of
+    consecutive rows instead, from the bottom up.
+
+    Args:
+        ws (Worksheet): The worksheet holding the task items.
+        rows (Sequence[int]): The rows to delete, sorted.
+    """
+    if not rows:
+        return
+    if not _moves_cells_directly(ws):
+        end = len(rows)
+        while end:
+            start = end - 1
+            while start and rows[start - 1] == rows[start] - 1:
+                start -= 1
+            ws.delete_rows(rows[start], end - start)
+            end = start
+        return
+    first_row = rows[0]
+    cells = {}
+    for (row_num, col_num), cell in ws._cells.items():
+        if row_num >= first_row:
+            above = bisect_right(rows, row_num)
+            if rows[above - 1] == row_num:
+                continue
+            cell.row = row_num - above
+        cells[(cell.row, col_num)] = cell
+    ws._cells = cells
+    ws._current_row = ws.max_row if cells else 0
+
+def last_data_row(ws) -> int:
+    """
+    Return the last row of the worksheet holding a value, skipping formatted empty rows.
+
+    Args:
+        ws (Worksheet): The worksheet holding the task items.
+
+    Returns:
+        int: The row number, 1 when only the header is left.
+    """
+    for row_num in range(ws.max_row, 1, -1):
+        values = next(ws.iter_rows(min_row=row_num, max_row=row_num, values_only=True))
+        if any(value is not None for value in values):
+            return row_num
+    return 1
+
+def append_task_row(ws, data: Dict[str, Optional[str]]):
+    """
+    Append a task item after the last data row of the worksheet, with the formatting
+    of the row style template.
+
+    Args:
+        ws (Worksheet): The worksheet holding the task items.
+        data (Dict[str, Optional[str]]): Dictionary of data to add as a new task item.
+    """
+    template = row_style_template(ws)
+    row_num = template.last_row + 1
+    for col_num, key in enumerate(INTERNAL_COLUMN, start=1):
+        ws.cell(row=row_num, column=col_num, value=data[key])
+    for col_num, style in enumerate(template.styles, start=1):
+        ws.cell(row=row_num, column=col_num)._style = copy(style)
+    if data.get(ID_FIELD) is not None:
+        if template.id_col is None:
+            template.id_col = id_column(ws, create=True)
+        ws.cell(row=row_num, column=template.id_col, value=data[ID_FIELD])
+    template.last_row = row_num
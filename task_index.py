@@ -0,0 +1,263 @@
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from itertools import chain
+from operator import itemgetter
+from task import Task
+from typing import Dict, Iterable, List, Optional, Tuple
+import threading
+
+DATE_FIELDS = ("do_date", "deadline")
+# Statuses of the tasks that need no more work
+CLOSED_STATUS = ("DONE", "CANCELED")
+
+def parse_date(value) -> Optional[date]:
+    """
+    Parse a date field of a task.
+
+    Args:
+        value: The field value, a "%Y-%m-%d" string or empty.
+
+    Returns:
+        Optional[date]: The date, None if the field is empty or not a date.
+    """
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        return None
+
+class DateIndex:
+    """Tasks sorted by a date field, for range lookups with bisect."""
+
+    def __init__(self):
+        self._dates: List[date] = []
+        self._tasks: List[Task] = []
+
+    def __len__(self) -> int:
+        return len(self._dates)
+
+    def load(self, items: List[Tuple[date, Task]]):
+        # Sorting once is much faster than inserting the tasks one by one
+        items.sort(key=itemgetter(0))
+        self._dates = [day for day, _ in items]
+        self._tasks = [task_item for _, task_item in items]
+
+    def insert(self, day: date, task_item: Task):
+        position = bisect_right(self._dates, day)
+        self._dates.insert(position, day)
+        self._tasks.insert(position, task_item)
+
+    def remove(self, day: date, task_item: Task):
+        start, end = bisect_left(self._dates, day), bisect_right(self._dates, day)
+        position = next(idx for idx in range(start, end) if self._tasks[idx] is task_item)
+        del self._dates[position]
+        del self._tasks[position]
+
+    def range(self, first: Optional[date] = None, last: Optional[date] = None) -> List[Task]:
+        """
+        Return the tasks dated between two days.
+
+        Args:
+            first (Optional[date]): First day, None for no lower bound.
+            last (Optional[date]): Last day, included, None for no upper bound.
+
+        Returns:
+            List[Task]: The tasks in date order.
+        """
+        start = 0 if first is None else bisect_left(self._dates, first)
+        end = len(self._dates) if last is None else bisect_right(self._dates, last)
+        return self._tasks[start:end]
+
+class TaskIndex:
+    """
+    Secondary indexes of the task list: the tasks bucketed by status and sorted by
+    do date and by deadline.
+
+    Once attached to a task store, the indexes follow every add, edit and delete
+    through the store listeners and are rebuilt when the store re-reads the database,
+    so views like the today tasks are range lookups instead of scans of the whole list.
+    """
+
+    def __init__(self, tasks: Iterable[Task] = ()):
+        """
+        Index a task list.
+
+        Args:
+            tasks (Iterable[Task]): The task records.
+        """
+        self.store = None
+        self._lock = threading.Lock()
+        self.rebuild(tasks)
+
+    def rebuild(self, tasks: Iterable[Task]):
+        """
+        Index a task list from scratch.
+
+        Args:
+            tasks (Iterable[Task]): The task records.
+        """
+        with self._lock:
+            self._status: Dict[str, Dict[int, Task]] = {}
+            # Per date field, for all the tasks (None) and for the tasks of every status
+            self._dates: Dict[Tuple[str, Optional[str]], DateIndex] = {}
+            # Indexed keys of every record, to find it again once it is edited
+            self._keys: Dict[int, Tuple] = {}
+            dated: Dict[Tuple[str, Optional[str]], List[Tuple[date, Task]]] = {}
+            for task_item in tasks:
+                keys = self._taskKeys(task_item)
+                self._keys[id(task_item)] = keys
+                self._status.setdefault(keys[0], {})[id(task_item)] = task_item
+                for field, day in zip(DATE_FIELDS, keys[1:]):
+                    if day is not None:
+                        dated.setdefault((field, None), []).append((day, task_item))
+                        dated.setdefault((field, keys[0]), []).append((day, task_item))
+            for key, items in dated.items():
+                self._dates[key] = DateIndex()
+                self._dates[key].load(items)
+
+    def attachStore(self, store):
+        """
+        Index the tasks of a store and follow its changes.
+
+        Args:
+            store (TaskStore or SqliteTaskStore): The task store.
+        """
+        if self.store is not None:
+            self.store.removeListener(self.onTaskChanged)
+        self.store = store
+        store.addListener(self.onTaskChanged)
+        self.rebuild(store.tasks)
+
+    def onTaskChanged(self, op: str, task_item: Optional[Task]):
+        """
+        Update the indexes after a change of the task list.
+
+        Args:
+            op (str): The operation, "add", "edit", "delete" or "reload".
+            task_item (Optional[Task]): The task record, None for "reload".
+        """
+        if op == "reload":
+            self.rebuild(self.store.tasks if self.store is not None else ())
+            return
+        with self._lock:
+            if op in ("edit", "delete"):
+                self._remove(task_item)
+            if op in ("add", "edit"):
+                self._insert(task_item)
+
+    @staticmethod
+    def _taskKeys(task_item: Task) -> Tuple:
+        # Status and parsed date fields
+        return (task_item.status,) + tuple(parse_date(task_item.get(field)) for field in DATE_FIELDS)
+
+    def _insert(self, task_item: Task):
+        keys = self._taskKeys(task_item)
+        self._keys[id(task_item)] = keys
+        self._status.setdefault(keys[0], {})[id(task_item)] = task_item
+        for field, day in zip(DATE_FIELDS, keys[1:]):
+            if day is not None:
+                for status in (None, keys[0]):
+                    if (field, status) not in self._dates:
+                        self._dates[(field, status)] = DateIndex()
+                    self._dates[(field, status)].insert(day, task_item)
+
+    def _remove(self, task_item: Task):
+        keys = self._keys.pop(id(task_item), None)
+        if keys is None:
+            return
+        self._status[keys[0]].pop(id(task_item), None)
+        for field, day in zip(DATE_FIELDS, keys[1:]):
+            if day is not None:
+                for status in (None, keys[0]):
+                    self._dates[(field, status)].remove(day, task_item)
+
+    def byStatus(self, status: str) -> List[Task]:
+        """
+        Return the tasks with a status.
+
+        Args:
+            status (str): The status.
+
+        Returns:
+            List[Task]: The tasks.
+        """
+        with self._lock:
+            return list(self._status.get(status, {}).values())
+
+    def byDate(self, field: str, first: Optional[date] = None, last: Optional[date] = None,
+               status: Optional[Iterable[str]] = None) -> List[Task]:
+        """
+        Return the tasks whose date field lies between two days.
+
+        Args:
+            field (str): One of DATE_FIELDS.
+            first (Optional[date]): First day, None for no lower bound.
+            last (Optional[date]): Last day, included, None for no upper bound.
+            status (Optional[Iterable[str]]): Only return the tasks with one of these statuses.
+
+        Returns:
+            List[Task]: The tasks in date order, grouped by status when statuses are given.
+        """
+        with self._lock:
+            if status is None:
+                index = self._dates.get((field, None))
+                return index.range(first, last) if index is not None else []
+            tasks = []
+            for name in status:
+                index = self._dates.get((field, name))
+                if index is not None:
+                    tasks.extend(index.range(first, last))
+            return tasks
+
+    def statuses(self) -> List[str]:
+        """Return the statuses of the indexed tasks."""
+        with self._lock:
+            return [status for status, tasks in self._status.items() if tasks]
+
+    def todayTasks(self, today: Optional[date] = None) -> List[Task]:
+        """
+        Return the tasks to work on today: the ones in progress, the ones to do with a
+        do date up to today and all the ones planned for today.
+
+        Args:
+            today (Optional[date]): The day, today by default.
+
+        Returns:
+            List[Task]: The tasks ordered by ID.
+        """
+        today = today or date.today()
+        found: Dict[int, Task] = {}
+        for task_item in chain(self.byStatus("IN PROGRESS"),
+                               self.byDate("do_date", last=today, status=["TO DO"]),
+                               self.byDate("do_date", today, today)):
+            found[id(task_item)] = task_item
+        return sorted(found.values(), key=lambda task_item: task_item.id or 0)
+
+    def weekTasks(self, today: Optional[date] = None) -> List[Task]:
+        """
+        Return the tasks planned for the week of a day, Monday to Sunday.
+
+        Args:
+            today (Optional[date]): A day of the week, today by default.
+
+        Returns:
+            List[Task]: The tasks in do date order.
+        """
+        today = today or date.today()
+        monday = today - timedelta(days=today.weekday())
+        return self.byDate("do_date", monday, monday + timedelta(days=6))
+
+    def overdueTasks(self, today: Optional[date] = None) -> List[Task]:
+        """
+        Return the open tasks whose deadline is over.
+
+        Args:
+            today (Optional[date]): The day, today by default.
+
+        Returns:
+            List[Task]: The tasks in deadline order, grouped by status.
+        """
+        today = today or date.today()
+        open_status = [status for status in self.statuses() if status not in CLOSED_STATUS]
+        return self.byDate("deadline", last=today - timedelta(days=1), status=open_status)
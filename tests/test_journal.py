@@ -0,0 +1,95 @@
+"""
+Crash recovery of the journal: the writer is killed at every step of a compaction,
+the store reopened afterwards must hold every journaled change exactly once.
+"""
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from store import TaskStore  # noqa: E402
+from task import load_task_list  # noqa: E402
+
+# Makes three journaled changes, then flushes them and exits at the given crash point
+WRITER = r'''
+import os, sys
+import journal, store
+
+path, crash_point = sys.argv[1], sys.argv[2]
+task_store = store.TaskStore(path, flush_changes=0, flush_interval=None)
+first, second = task_store.tasks[0], task_store.tasks[1]
+task_store.add({**first.to_dict(), "task": "Added by the journal"})
+task_store.edit(first.id, {"status": "DONE"})
+task_store.delete(second.id)
+if crash_point == "before_compaction":
+    os._exit(1)
+
+save_workbook_atomic = store.save_workbook_atomic
+def save_and_crash(wb, save_path):
+    if crash_point == "before_save":
+        os._exit(1)
+    save_workbook_atomic(wb, save_path)
+    if crash_point == "after_save":
+        os._exit(1)
+store.save_workbook_atomic = save_and_crash
+
+truncate = journal.TaskJournal.truncate
+def truncate_and_crash(self, upto_seq):
+    truncate(self, upto_seq)
+    if crash_point == "after_truncate":
+        os._exit(1)
+journal.TaskJournal.truncate = truncate_and_crash
+
+task_store.flush()
+os._exit(0)
+'''
+
+CRASH_POINTS = ["before_compaction", "before_save", "after_save", "after_truncate", "none"]
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / "Test.xlsx")
+    shutil.copy(os.path.join(REPO_DIR, "Test.xlsx"), path)
+    return path
+
+def run_writer(path: str, crash_point: str) -> int:
+    env = dict(os.environ, PYTHONPATH=REPO_DIR)
+    return subprocess.run([sys.executable, "-c", WRITER, path, crash_point], env=env, timeout=120).returncode
+
+def expected_tasks(path: str):
+    tasks = [(task_item["task"], task_item["status"]) for task_item in load_task_list(path)]
+    first, _, *rest = tasks
+    return [(first[0], "DONE"), *rest, ("Added by the journal", tasks[0][1])]
+
+@pytest.mark.parametrize("crash_point", CRASH_POINTS)
+def test_crash_during_compaction(database, crash_point):
+    expected = expected_tasks(database)
+    returncode = run_writer(database, crash_point)
+    assert returncode == (0 if crash_point == "none" else 1)
+
+    task_store = TaskStore(database, flush_changes=0, flush_interval=None)
+    try:
+        assert [(task_item.task, task_item.status) for task_item in task_store.tasks] == expected
+        ids = [task_item.id for task_item in task_store.tasks]
+        assert len(set(ids)) == len(ids)
+    finally:
+        task_store.close()
+
+    # Compacted once more on close, the workbook now holds every change exactly once
+    assert [(task_item["task"], task_item["status"]) for task_item in load_task_list(database)] == expected
+    assert not os.path.exists(database + ".journal")
+
+@pytest.mark.parametrize("crash_point", CRASH_POINTS)
+def test_reopen_twice_after_crash(database, crash_point):
+    expected = expected_tasks(database)
+    run_writer(database, crash_point)
+
+    # Reopening without flushing replays the journal again, it must not apply it twice
+    for _ in range(2):
+        task_store = TaskStore(database, flush_changes=0, flush_interval=None)
+        assert [(task_item.task, task_item.status) for task_item in task_store.tasks] == expected
@@ -0,0 +1,167 @@
+from PySide6.QtCore import QObject, QTimer
+from logging.handlers import RotatingFileHandler
+from typing import List, Optional, Tuple
+import logging
+import os
+import perf
+import sys
+import threading
+import time
+import traceback
+
+# Name of the report, written next to the database, see report_path_for
+STALL_REPORT_NAME = "stalls.log"
+# Milliseconds between two heartbeats of the event loop
+HEARTBEAT_INTERVAL = 100
+# Seconds without a heartbeat after which the window counts as frozen
+STALL_THRESHOLD = 0.5
+# Seconds between two samples of the stack of a frozen window, and most samples kept
+SAMPLE_INTERVAL = 0.25
+MAX_SAMPLES = 8
+# The report is rotated at this size, keeping one older file
+REPORT_MAX_BYTES = 1024 * 1024
+# Frames of the application, as opposed to Qt, openpyxl or the standard library
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def report_path_for(database: str) -> str:
+    """
+    Return the path of the stall report of a database, in the folder of the database.
+
+    Args:
+        database (str): Path of the database.
+
+    Returns:
+        str: Path of the report.
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(database)), STALL_REPORT_NAME)
+
+class UiWatchdog(QObject):
+    """
+    Detect the stalls of the Qt event loop and report where the GUI thread was stuck.
+
+    A timer in the GUI thread records a heartbeat every HEARTBEAT_INTERVAL ms, which only
+    happens while the event loop runs. A monitor thread checks the age of the last
+    heartbeat; once it exceeds the threshold the GUI thread is blocked in a synchronous
+    call, and its Python stack is sampled with sys._current_frames until the heartbeat
+    comes back. The stall is then written to the report with its duration and the
+    distinct stacks seen, and recorded as a "ui.stall" span for the diagnostics page.
+    """
+
+    def __init__(self, threshold: float = STALL_THRESHOLD, report_path: Optional[str] = None,
+                 interval: int = HEARTBEAT_INTERVAL, parent=None):
+        """
+        Set up the heartbeat, the watchdog starts with start.
+
+        Args:
+            threshold (float): Seconds without a heartbeat reported as a stall.
+            report_path (Optional[str]): Path of the report, None to only record the spans.
+            interval (int): Milliseconds between two heartbeats.
+            parent (QObject): Parent object.
+        """
+        super().__init__(parent)
+        self.threshold = threshold
+        self.interval = interval
+        # Created in the GUI thread, whose stack is sampled
+        self._gui_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stalls = 0
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self.beat)
+        self._logger = logging.getLogger(f"tasktracking.watchdog.{id(self)}")
+        self._logger.propagate = False
+        if report_path:
+            handler = RotatingFileHandler(report_path, maxBytes=REPORT_MAX_BYTES, backupCount=1,
+                                          encoding="utf-8", delay=True)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._logger.addHandler(handler)
+            self._logger.setLevel(logging.INFO)
+
+    def start(self):
+        """Start the heartbeat and the monitor thread."""
+        if self._thread is not None:
+            return
+        self._last_beat = time.monotonic()
+        self._timer.start()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._monitor, name="UiWatchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching, a stall in progress is not reported."""
+        self._timer.stop()
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for handler in list(self._logger.handlers):
+            self._logger.removeHandler(handler)
+            handler.close()
+
+    def beat(self):
+        self._last_beat = time.monotonic()
+
+    def _monitor(self):
+        poll = min(self.threshold / 2, self.interval / 1000)
+        last_check = time.monotonic()
+        while not self._stop.wait(poll):
+            now = time.monotonic()
+            overslept = now - last_check - poll
+            last_check = now
+            if overslept > self.threshold:
+                # The whole process was suspended, e.g. the computer slept, not only the GUI thread
+                continue
+            stalled_since = self._last_beat
+            if now - stalled_since > self.threshold:
+                self._followStall(stalled_since)
+                last_check = time.monotonic()
+
+    def _followStall(self, stalled_since: float):
+        # Samples the stack of the blocked GUI thread until the heartbeat comes back
+        samples: List[Tuple[float, traceback.StackSummary]] = []
+        while self._last_beat == stalled_since and not self._stop.is_set():
+            stack = self._guiStack()
+            if stack is not None and (not samples or not self._sameStack(samples[-1][1], stack)):
+                if len(samples) == MAX_SAMPLES:
+                    # Keep the first stacks and the latest one
+                    samples.pop()
+                samples.append((time.monotonic() - stalled_since, stack))
+            self._stop.wait(SAMPLE_INTERVAL)
+        if self._stop.is_set():
+            return
+        duration = self._last_beat - stalled_since - self.interval / 1000
+        self.stalls += 1
+        self._report(stalled_since, max(duration, self.threshold), samples)
+
+    def _guiStack(self) -> Optional[traceback.StackSummary]:
+        frame = sys._current_frames().get(self._gui_thread)
+        if frame is None:
+            return None
+        return traceback.extract_stack(frame)
+
+    @staticmethod
+    def _sameStack(first: traceback.StackSummary, second: traceback.StackSummary) -> bool:
+        return [(entry.filename, entry.lineno) for entry in first] == [(entry.filename, entry.lineno) for entry in second]
+
+    @staticmethod
+    def _blockingCall(stack: traceback.StackSummary) -> str:
+        # The innermost frame of the application tells which of its calls blocked the window
+        for entry in reversed(stack):
+            if os.path.dirname(os.path.abspath(entry.filename)) == APP_DIR:
+                return f"{os.path.basename(entry.filename)}:{entry.lineno} in {entry.name}"
+        return f"{os.path.basename(stack[-1].filename)}:{stack[-1].lineno} in {stack[-1].name}" if stack else ""
+
+    def _report(self, stalled_since: float, duration: float, samples: List[Tuple[float, traceback.StackSummary]]):
+        where = self._blockingCall(samples[-1][1]) if samples else ""
+        perf.record("ui.stall", duration, {"where": where})
+        print(f"Window froze for {duration:.2f} s at {where}", file=sys.stderr)
+        if not self._logger.handlers:
+            return
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(time.time() - (time.monotonic() - stalled_since)))
+        lines = [f"=== Window froze for {duration:.2f} s at {started}, in {where} ==="]
+        for offset, stack in samples:
+            lines.append(f"GUI thread stack after {offset:.2f} s:")
+            lines.extend(line.rstrip("\n") for line in stack.format())
+        self._logger.info("\n".join(lines) + "\n")
@@ -0,0 +1,85 @@
+from PySide6.QtCore import QObject, Signal
+from typing import Callable, Dict, Optional
+import queue
+import threading
+
+class TaskWriter(QObject):
+    """
+    Single background thread running the database writes one after the other.
+
+    Jobs are queued by name and a job queued again while it still waits runs only
+    once, so a burst of flush requests ends in a single save. The progress is
+    reported through Qt signals, which are delivered in the thread of the receiver,
+    so the pages can connect to them directly.
+    """
+    job_started = Signal(str)
+    job_finished = Signal(str, object)
+    job_failed = Signal(str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._jobs: Dict[str, Callable] = {}
+        self._lock = threading.Lock()
+        self._running: Optional[str] = None
+        self._thread = threading.Thread(target=self._run, name="TaskWriter", daemon=True)
+        self._thread.start()
+
+    def submit(self, name: str, job: Callable):
+        """
+        Queue a job, replacing the waiting job of the same name.
+
+        Args:
+            name (str): Name of the job, reported by the signals.
+            job (Callable): Function to run in the writer thread. Its return value
+                is reported by job_finished.
+        """
+        with self._lock:
+            queued = name in self._jobs
+            self._jobs[name] = job
+        if not queued:
+            self._queue.put(name)
+
+    def attachStore(self, store):
+        """
+        Run the flushes of a task store in the writer thread.
+
+        Args:
+            store (TaskStore or SqliteTaskStore): The task store.
+        """
+        store.flush_requested = lambda: self.submit("flush", store.flush)
+
+    def isBusy(self) -> bool:
+        """Whether a job is running or waiting."""
+        with self._lock:
+            return self._running is not None or bool(self._jobs)
+
+    def wait(self):
+        """Block until every queued job is done."""
+        self._queue.join()
+
+    def stop(self):
+        """Run the queued jobs and stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            name = self._queue.get()
+            if name is None:
+                self._queue.task_done()
+                return
+            with self._lock:
+                job = self._jobs.pop(name)
+                self._running = name
+            self.job_started.emit(name)
+            try:
+                result = job()
+            except Exception as e:
+                self.job_failed.emit(name, str(e))
+            else:
+                self.job_finished.emit(name, result)
+            finally:
+                with self._lock:
+                    self._running = None
+                self._queue.task_done()
@@ -0,0 +1,175 @@
+"""
+Synthetic task databases for benchmarks and load tests.
+
+Run `python workload.py tasks.xlsx --rows 100000` to write a workbook in the
+Test.xlsx layout. The task names and descriptions are drawn from a word list with
+configurable lengths, the statuses follow configurable weights and the dates spread
+over a period ending shortly after today, with the open tasks close to today like in
+a tracker in daily use. The rows are streamed to the file, so a million rows need no
+more memory than a thousand.
+"""
+from config import CONFIG_DATA
+from datetime import date, datetime, timedelta
+from task import COLUMN_MAPPING, ID_HEADER, INTERNAL_COLUMN
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+import argparse
+import random
+import time
+
+WORDS = ["review", "update", "report", "budget", "meeting", "release", "customer", "invoice",
+         "design", "test", "deploy", "migrate", "document", "planning", "support", "training",
+         "backlog", "server", "contract", "audit", "roadmap", "survey", "dashboard", "vendor",
+         "onboarding", "license", "network", "feedback", "schedule", "prototype", "hiring", "quarterly"]
+# Share of the tasks of every status in a tracker in daily use
+STATUS_WEIGHTS = {"TO DO": 15, "IN PROGRESS": 10, "DONE": 55, "BLOCK": 5, "CANCELED": 15}
+# Open tasks are planned within this many days around today
+OPEN_TASK_DAYS = 60
+HEADER_WIDTHS = {"Do Date": 18, "Category task": 18, "Task": 48, "Description": 60, "Assigning person": 18,
+                 "Deadline": 14, "Status": 14, "Estimated (h)": 14, "Spent (h)": 12, "Result": 40, "Reason": 30}
+
+class Workload(NamedTuple):
+    """Shape of a synthetic task database."""
+    rows: int = 10000
+    seed: int = 0
+    # Number of words of the task names and of the descriptions, smallest and largest
+    name_words: Tuple[int, int] = (2, 6)
+    description_words: Tuple[int, int] = (0, 30)
+    # Relative share of every status
+    status_weights: Dict[str, float] = STATUS_WEIGHTS
+    # The do dates spread over this many days, ending this many days after today
+    days: int = 730
+    future_days: int = 30
+    # Largest number of days between the do date and the deadline
+    deadline_days: int = 30
+    # Share of the date cells stored as real dates, the others are text like the GUI writes
+    date_cells: float = 0.5
+    # Write the ID column of the task store
+    ids: bool = True
+    today: Optional[date] = None
+
+def _text(rng: random.Random, lengths: Tuple[int, int]) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(*lengths)))
+
+def generate_tasks(workload: Workload) -> Iterator[Dict]:
+    """
+    Generate the task data of a synthetic database.
+
+    Args:
+        workload (Workload): Shape of the database.
+
+    Returns:
+        Iterator[Dict]: Data of every task, dates as datetime or "%Y-%m-%d" text.
+    """
+    rng = random.Random(workload.seed)
+    today = workload.today or date.today()
+    last_day = datetime.combine(today, datetime.min.time()) + timedelta(days=workload.future_days)
+    statuses = list(workload.status_weights)
+    weights = list(workload.status_weights.values())
+    categories, assigners = CONFIG_DATA["category"], CONFIG_DATA["assigner"]
+    for idx in range(workload.rows):
+        status = rng.choices(statuses, weights)[0]
+        span = workload.days if status in ("DONE", "CANCELED") else min(OPEN_TASK_DAYS, workload.days)
+        do_date = last_day - timedelta(days=rng.randrange(max(span, 1)))
+        deadline = do_date + timedelta(days=rng.randrange(workload.deadline_days + 1))
+        estimated = rng.randint(1, 16) / 2
+        data = {
+            "do_date": do_date if rng.random() < workload.date_cells else do_date.strftime('%Y-%m-%d'),
+            "category": rng.choice(categories),
+            "task": f"{_text(rng, workload.name_words).capitalize()} {idx + 1}",
+            "description": _text(rng, workload.description_words),
+            "assigner": rng.choice(assigners),
+            "deadline": deadline.strftime('%Y-%m-%d') if rng.random() < 0.8 else "",
+            "status": status,
+            "estimated_hours": int(estimated) if estimated.is_integer() else estimated,
+            "spent_hours": "",
+            "result": "",
+            "reason": "",
+        }
+        if status in ("DONE", "IN PROGRESS"):
+            data["spent_hours"] = round(estimated * rng.uniform(0.5, 1.5), 1)
+        if status == "DONE":
+            data["result"] = _text(rng, (3, 12))
+        elif status in ("BLOCK", "CANCELED"):
+            data["reason"] = _text(rng, (2, 8))
+        yield data
+
+def write_workbook(path: str, workload: Workload) -> int:
+    """
+    Write a synthetic database in the Test.xlsx layout.
+
+    Args:
+        path (str): Path of the workbook to create.
+        workload (Workload): Shape of the database.
+
+    Returns:
+        int: Number of written task rows.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    # Write-only workbooks stream the rows to the file instead of keeping them
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Data Dump")
+    headers = list(COLUMN_MAPPING) + ([ID_HEADER] if workload.ids else [])
+    for col_num, header in enumerate(headers, start=1):
+        ws.column_dimensions[get_column_letter(col_num)].width = HEADER_WIDTHS.get(header, 10)
+    header_font = Font(bold=True, size=12, color="FFFFFF")
+    header_fill = PatternFill("solid", start_color="18837E")
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font, cell.fill = header_font, header_fill
+        header_cells.append(cell)
+    ws.append(header_cells)
+    rows = 0
+    for rows, data in enumerate(generate_tasks(workload), start=1):
+        values = [data[key] if data[key] != "" else None for key in INTERNAL_COLUMN]
+        if isinstance(values[0], datetime):
+            cell = WriteOnlyCell(ws, value=values[0])
+            cell.number_format = "yyyy\\-mm\\-dd;@"
+            values[0] = cell
+        ws.append(values + ([rows] if workload.ids else []))
+    wb.save(path)
+    return rows
+
+def _pair(text: str) -> Tuple[int, int]:
+    low, _, high = text.partition("-")
+    return int(low), int(high or low)
+
+def _weights(text: str) -> Dict[str, float]:
+    # "DONE=55,TO DO=15" to {"DONE": 55.0, "TO DO": 15.0}
+    return {name.strip(): float(weight) for name, _, weight in
+            (item.partition("=") for item in text.split(",") if item.strip())}
+
+def main():
+    defaults = Workload()
+    parser = argparse.ArgumentParser(description="Write a synthetic task database")
+    parser.add_argument("output", help="Path of the workbook to create")
+    parser.add_argument("--rows", type=int, default=defaults.rows, help="Number of task rows")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Seed of the random generator")
+    parser.add_argument("--name-words", type=_pair, default=defaults.name_words,
+                        help="Words of the task names, e.g. 2-6")
+    parser.add_argument("--description-words", type=_pair, default=defaults.description_words,
+                        help="Words of the descriptions, e.g. 0-30")
+    parser.add_argument("--status", type=_weights, default=defaults.status_weights,
+                        help='Status weights, e.g. "DONE=55,TO DO=15,IN PROGRESS=10,BLOCK=5,CANCELED=15"')
+    parser.add_argument("--days", type=int, default=defaults.days, help="Days spanned by the do dates")
+    parser.add_argument("--future-days", type=int, default=defaults.future_days,
+                        help="Days after today of the last do date")
+    parser.add_argument("--date-cells", type=float, default=defaults.date_cells,
+                        help="Share of the do dates stored as real dates instead of text")
+    parser.add_argument("--no-ids", action="store_true", help="Leave out the ID column, like a new database")
+    args = parser.parse_args()
+
+    workload = Workload(rows=args.rows, seed=args.seed, name_words=args.name_words,
+                        description_words=args.description_words, status_weights=args.status,
+                        days=args.days, future_days=args.future_days, date_cells=args.date_cells,
+                        ids=not args.no_ids)
+    start = time.perf_counter()
+    rows = write_workbook(args.output, workload)
+    print(f"Wrote {rows} tasks to {args.output} in {time.perf_counter() - start:.1f} s")
+
+if __name__ == "__main__":
+    main()
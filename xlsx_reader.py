@@ -0,0 +1,269 @@
+"""
+Lean reader for the cell values of an xlsx workbook.
+
+The sheet XML is streamed straight out of the zip archive, so reading the task
+list needs neither pandas nor openpyxl. Values come out like openpyxl reads them:
+shared and inline strings, int or float numbers, booleans and dates for numbers
+with a date format.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Set, Tuple
+import posixpath
+import re
+import xml.etree.ElementTree as ET
+import zipfile
+
+MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PACKAGE_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+CUSTOM_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/custom-properties}"
+# Raised for files the reader cannot handle, callers fall back to a full parser
+XLSX_READ_ERRORS = (zipfile.BadZipFile, KeyError, ValueError, IndexError, ET.ParseError)
+
+WINDOWS_EPOCH = datetime(1899, 12, 30)
+MAC_EPOCH = datetime(1904, 1, 1)
+# Built-in number formats holding dates or times, the others are plain numbers
+BUILTIN_DATE_FORMATS = {
+    14: 'mm-dd-yy', 15: 'd-mmm-yy', 16: 'd-mmm', 17: 'mmm-yy', 18: 'h:mm AM/PM',
+    19: 'h:mm:ss AM/PM', 20: 'h:mm', 21: 'h:mm:ss', 22: 'm/d/yy h:mm',
+    45: 'mm:ss', 46: '[h]:mm:ss', 47: 'mmss.0',
+}
+# Same rules as openpyxl to tell date and duration formats
+_STRIP_RE = re.compile(r'".*?"|\[(?!hh?\]|mm?\]|ss?\])[^\]]*\]')
+_DATE_RE = re.compile(r"(?<![_\\])[dmhysDMHYS]")
+_TIMEDELTA_RE = re.compile(r'\[hh?\](:mm(:ss(\.0*)?)?)?|\[mm?\](:ss(\.0*)?)?|\[ss?\](\.0*)?', re.I)
+_ESCAPED_RE = re.compile(r"_x([0-9A-Fa-f]{4})_")
+
+_SHEET_DATA = MAIN_NS + "sheetData"
+_ROW = MAIN_NS + "row"
+_CELL = MAIN_NS + "c"
+_VALUE = MAIN_NS + "v"
+_INLINE = MAIN_NS + "is"
+_TEXT = MAIN_NS + "t"
+_RUN = MAIN_NS + "r"
+
+def is_date_format(fmt: str) -> bool:
+    """
+    Tell whether a number format displays a date or a time.
+
+    Args:
+        fmt (str): The number format code.
+
+    Returns:
+        bool: True for date and time formats.
+    """
+    fmt = _STRIP_RE.sub("", fmt.split(";")[0])
+    return _DATE_RE.search(fmt) is not None
+
+def from_excel(value: float, epoch: datetime = WINDOWS_EPOCH, duration: bool = False):
+    """
+    Convert an Excel date serial to a datetime, time or timedelta like openpyxl.
+
+    Args:
+        value (float): The serial number.
+        epoch (datetime): WINDOWS_EPOCH, or MAC_EPOCH for 1904 workbooks.
+        duration (bool): The number format is a duration, e.g. [h]:mm.
+
+    Returns:
+        The converted value.
+    """
+    if duration:
+        td = timedelta(days=value)
+        if td.microseconds:
+            td = timedelta(seconds=td.total_seconds() // 1, microseconds=round(td.microseconds, -3))
+        return td
+    day, fraction = divmod(value, 1)
+    diff = timedelta(milliseconds=round(fraction * 86400 * 1000))
+    if 0 <= value < 1 and diff.days == 0:
+        mins, seconds = divmod(diff.seconds, 60)
+        hours, mins = divmod(mins, 60)
+        return datetime.min.replace(hour=hours, minute=mins, second=seconds,
+                                    microsecond=diff.microseconds).time()
+    # Excel counts a 29 February 1900 that never existed
+    if 0 < value < 60 and epoch == WINDOWS_EPOCH:
+        day += 1
+    return epoch + timedelta(days=day) + diff
+
+def _unescape(text: str) -> str:
+    # Characters not allowed in XML are written as _xHHHH_
+    if "_x" not in text:
+        return text
+    return _ESCAPED_RE.sub(lambda match: chr(int(match.group(1), 16)), text)
+
+def _string_text(element) -> str:
+    # Plain (<t>) or rich text (<r><t>) string, phonetic runs (<rPh>) are left out
+    parts = []
+    for child in element:
+        if child.tag == _TEXT:
+            parts.append(child.text or "")
+        elif child.tag == _RUN:
+            text = child.find(_TEXT)
+            if text is not None:
+                parts.append(text.text or "")
+    return _unescape("".join(parts))
+
+def _column_index(ref: str, cache: Dict[str, int]) -> int:
+    # 0-based column of a cell reference like "AB12"
+    letters = ref.rstrip("0123456789")
+    index = cache.get(letters)
+    if index is None:
+        index = 0
+        for letter in letters:
+            index = index * 26 + ord(letter) - 64
+        index -= 1
+        cache[letters] = index
+    return index
+
+class XlsxBook:
+    """Workbook level parts needed to read the cell values of a sheet: sheet paths, shared strings and date styles."""
+
+    def __init__(self, archive: zipfile.ZipFile):
+        """
+        Read the workbook, relationship, shared string and style parts.
+
+        Args:
+            archive (zipfile.ZipFile): The opened xlsx archive.
+        """
+        self.archive = archive
+        workbook = ET.fromstring(archive.read("xl/workbook.xml"))
+        rels = ET.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+        targets = {rel.get("Id"): rel.get("Target") for rel in rels.iter(PACKAGE_REL_NS + "Relationship")}
+        self.sheets: List[Tuple[str, str]] = []
+        for sheet in workbook.iter(MAIN_NS + "sheet"):
+            target = targets[sheet.get(REL_NS + "id")]
+            path = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+            self.sheets.append((sheet.get("name"), path))
+        view = workbook.find(f"{MAIN_NS}bookViews/{MAIN_NS}workbookView")
+        self.active = int(view.get("activeTab", 0)) if view is not None else 0
+        properties = workbook.find(MAIN_NS + "workbookPr")
+        date1904 = properties is not None and properties.get("date1904") in ("1", "true")
+        self.epoch = MAC_EPOCH if date1904 else WINDOWS_EPOCH
+        shared_path = next((posixpath.normpath(posixpath.join("xl", target)) for target in targets.values()
+                            if target.endswith("sharedStrings.xml")), None)
+        self.strings = self._readStrings(shared_path)
+        self.date_styles, self.duration_styles = self._readStyles()
+
+    def _readStrings(self, path) -> List[str]:
+        if path is None or path not in self.archive.namelist():
+            return []
+        strings = []
+        with self.archive.open(path) as strings_file:
+            for _, element in ET.iterparse(strings_file):
+                if element.tag == MAIN_NS + "si":
+                    strings.append(_string_text(element))
+                    element.clear()
+        return strings
+
+    def _readStyles(self) -> Tuple[Set[int], Set[int]]:
+        # Indices of the cell styles whose number format is a date or a duration
+        if "xl/styles.xml" not in self.archive.namelist():
+            return set(), set()
+        styles = ET.fromstring(self.archive.read("xl/styles.xml"))
+        formats = dict(BUILTIN_DATE_FORMATS)
+        for fmt in styles.iter(MAIN_NS + "numFmt"):
+            formats[int(fmt.get("numFmtId"))] = fmt.get("formatCode", "")
+        date_styles, duration_styles = set(), set()
+        cell_xfs = styles.find(MAIN_NS + "cellXfs")
+        for style_id, xf in enumerate(cell_xfs if cell_xfs is not None else []):
+            fmt = formats.get(int(xf.get("numFmtId", 0)))
+            if fmt is None or not is_date_format(fmt):
+                continue
+            date_styles.add(style_id)
+            if _TIMEDELTA_RE.search(fmt.split(";")[0]):
+                duration_styles.add(style_id)
+        return date_styles, duration_styles
+
+    def iterRows(self, index: int) -> Iterator[Tuple[int, List]]:
+        """
+        Stream the rows of a sheet.
+
+        Args:
+            index (int): Position of the sheet in the workbook.
+
+        Returns:
+            Iterator[Tuple[int, List]]: Row number and cell values of every row holding cells,
+            None for the empty cells before the last one.
+        """
+        strings, epoch = self.strings, self.epoch
+        date_styles, duration_styles = self.date_styles, self.duration_styles
+        columns: Dict[str, int] = {}
+        row_num = 0
+        with self.archive.open(self.sheets[index][1]) as sheet_file:
+            sheet_data = None
+            for event, element in ET.iterparse(sheet_file, events=("start", "end")):
+                if event == "start":
+                    if element.tag == _SHEET_DATA:
+                        sheet_data = element
+                    continue
+                if element.tag != _ROW:
+                    continue
+                row_num = int(element.get("r", row_num + 1))
+                values = []
+                for cell in element.iter(_CELL):
+                    ref = cell.get("r")
+                    col = _column_index(ref, columns) if ref else len(values)
+                    cell_type = cell.get("t", "n")
+                    raw = cell.find(_VALUE)
+                    text = raw.text if raw is not None else None
+                    if cell_type == "inlineStr":
+                        inline = cell.find(_INLINE)
+                        value = _string_text(inline) if inline is not None else None
+                    elif text is None:
+                        value = None
+                    elif cell_type == "n":
+                        value = float(text) if "." in text or "E" in text or "e" in text else int(text)
+                        style = cell.get("s")
+                        if style is not None and int(style) in date_styles:
+                            value = from_excel(value, epoch, int(style) in duration_styles)
+                    elif cell_type == "s":
+                        value = strings[int(text)]
+                    elif cell_type == "str":
+                        value = _unescape(text)
+                    elif cell_type == "b":
+                        value = text in ("1", "true")
+                    elif cell_type == "d":
+                        value = datetime.fromisoformat(text.rstrip("Z"))
+                    else:
+                        # Error values like #N/A are kept as text
+                        value = text
+                    if col >= len(values):
+                        values.extend([None] * (col - len(values) + 1))
+                    values[col] = value
+                # Detach the rows already read, a cleared row kept in the tree still takes memory
+                if sheet_data is not None:
+                    sheet_data.remove(element)
+                else:
+                    element.clear()
+                yield row_num, values
+
+def iter_sheet_rows(path: str, sheet_index=None) -> Iterator[Tuple[int, List]]:
+    """
+    Stream the cell values of a sheet of an xlsx file.
+
+    Args:
+        path (str): Path of the xlsx file.
+        sheet_index (Optional[int]): Position of the sheet, None for the active sheet.
+
+    Returns:
+        Iterator[Tuple[int, List]]: Row number and cell values of every row holding cells.
+    """
+    with zipfile.ZipFile(path) as archive:
+        book = XlsxBook(archive)
+        yield from book.iterRows(book.active if sheet_index is None else sheet_index)
+
+def read_custom_properties(path: str) -> Dict[str, str]:
+    """
+    Read the custom document properties of an xlsx file.
+
+    Args:
+        path (str): Path of the xlsx file.
+
+    Returns:
+        Dict[str, str]: Property names and values as text.
+    """
+    with zipfile.ZipFile(path) as archive:
+        if "docProps/custom.xml" not in archive.namelist():
+            return {}
+        properties = ET.fromstring(archive.read("docProps/custom.xml"))
+    return {prop.get("name"): next(iter(prop)).text for prop in properties.iter(CUSTOM_NS + "property")
+            if len(prop)}